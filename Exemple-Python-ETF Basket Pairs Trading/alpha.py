@@ -2,6 +2,7 @@
 from AlgorithmImports import *
 import numpy as np
 from datetime import timedelta, datetime
+from pair_spreads import PairSpreads
 #endregion
 
 class FilteredPairsAlphaModel(PearsonCorrelationPairsTradingAlphaModel):
@@ -27,77 +28,43 @@ class FilteredPairsAlphaModel(PearsonCorrelationPairsTradingAlphaModel):
         # On estime ~6.5h de marché par jour, donc 2 jours ~ 13 barres
         self.cooldown = timedelta(days=cooldown_days)
 
-        # Pour chaque paire : store {"beta","mean","std"}
-        self.spread_stats = {pair: {"beta": 1.0, "mean": 0, "std": 1} for pair in pairs}
-
-        self.last_signal_time = {pair: datetime.min for pair in pairs}
+        # beta/mean/std et dernier signal de chaque paire, en colonnes numpy
+        self.spreads = PairSpreads(pairs)
 
     def update_pairs(self, new_pairs):
         self.pairs = new_pairs
-        removed_pairs = set(self.spread_stats.keys()) - set(new_pairs)
-        for rp in removed_pairs:
-            self.spread_stats.pop(rp, None)
-            self.last_signal_time.pop(rp, None)
-
-        for p in new_pairs:
-            if p not in self.spread_stats:
-                self.spread_stats[p] = {"beta": 1.0, "mean": 0, "std": 1}
-            if p not in self.last_signal_time:
-                self.last_signal_time[p] = datetime.min
+        self.spreads.set_pairs(new_pairs)
 
     def generate_insights(self, algorithm, data):
         insights = []
-        log_messages = []
-
-        for etf1, etf2 in self.pairs:
-            # Check data dispos
-            if etf1 not in data or etf2 not in data:
-                log_messages.append(f"Data not available for pair {etf1}-{etf2}.")
-                continue
-
-            # cooldown check
-            if (algorithm.Time - self.last_signal_time[(etf1, etf2)]) < self.cooldown:
-                continue
-
-            price1 = data[etf1].Close
-            price2 = data[etf2].Close
-            if price2 == 0:
-                continue
-
-            stats = self.spread_stats[(etf1, etf2)]
-            # Beta(t+1) = 0.9 * beta(t) + 0.1 * (p1/p2)
-            new_beta = 0.9 * stats["beta"] + 0.1 * (price1 / price2)
-            stats["beta"] = new_beta
+        spreads = self.spreads
+        missing, signal, z = spreads.update(spreads.gather(data), algorithm.Time, self.threshold, self.cooldown)
 
-            spread = price1 - stats["beta"] * price2
-
-            old_mean = stats["mean"]
-            old_std = stats["std"]
-
-            new_mean = 0.9 * old_mean + 0.1 * spread
-            stats["mean"] = new_mean
-            new_std = 0.9 * old_std + 0.1 * abs(spread - new_mean)
-            stats["std"] = max(new_std, 1e-5)
-
-            z_score = (spread - new_mean) / stats["std"]
-
-            if z_score > self.threshold:
+        for pair_id in np.flatnonzero(signal):
+            etf1, etf2 = spreads.pairs[pair_id]
+            if signal[pair_id] > 0:
                 insights.append(Insight.price(etf1, timedelta(hours=6), InsightDirection.Down))
                 insights.append(Insight.price(etf2, timedelta(hours=6), InsightDirection.Up))
-                log_messages.append(f"[{algorithm.Time}] SHORT {etf1} / LONG {etf2}, Z-score: {z_score:.2f}")
-                self.last_signal_time[(etf1, etf2)] = algorithm.Time
-
-            elif z_score < -self.threshold:
+            else:
                 insights.append(Insight.price(etf1, timedelta(hours=6), InsightDirection.Up))
                 insights.append(Insight.price(etf2, timedelta(hours=6), InsightDirection.Down))
-                log_messages.append(f"[{algorithm.Time}] LONG {etf1} / SHORT {etf2}, Z-score: {z_score:.2f}")
-                self.last_signal_time[(etf1, etf2)] = algorithm.Time
 
-        if log_messages:
+        # Logs dans l'ordre des paires ; seuls les 5 premiers messages sont construits
+        logged = np.flatnonzero(missing | (signal != 0))
+        if len(logged):
             max_logs = 5
-            algorithm.Log("\n".join(log_messages[:max_logs]))
-            if len(log_messages) > max_logs:
-                algorithm.Log(f"{len(log_messages) - max_logs} additional logs suppressed.")
+            log_messages = [self.log_message(algorithm, spreads.pairs[pair_id], missing[pair_id], signal[pair_id], z[pair_id])
+                            for pair_id in logged[:max_logs]]
+            algorithm.Log("\n".join(log_messages))
+            if len(logged) > max_logs:
+                algorithm.Log(f"{len(logged) - max_logs} additional logs suppressed.")
 
         return insights
 
+    def log_message(self, algorithm, pair, missing, signal, z_score):
+        etf1, etf2 = pair
+        if missing:
+            return f"Data not available for pair {etf1}-{etf2}."
+        if signal > 0:
+            return f"[{algorithm.Time}] SHORT {etf1} / LONG {etf2}, Z-score: {z_score:.2f}"
+        return f"[{algorithm.Time}] LONG {etf1} / SHORT {etf2}, Z-score: {z_score:.2f}"
@@ -0,0 +1,126 @@
+#region imports
+from AlgorithmImports import *
+import numpy as np
+import pandas as pd
+from collections import deque
+from arch.unitroot.cointegration import engle_granger
+#endregion
+
+class RecursiveCointegration:
+    """
+    Vecteur de cointégration d'un ensemble de symboles, tenu à jour barre par barre.
+
+    Même régression que engle_granger(trend='n') : le premier symbole sur les autres,
+    sans constante, sur les `window` dernières barres alignées. Les coefficients sont
+    mis à jour par moindres carrés récursifs (ajout de la nouvelle barre, retrait de la
+    plus ancienne : O(k²) par barre, plus le conditionnement d'une matrice k x k). Le
+    test ADF complet (p-value) n'est relancé que toutes les `test_every` barres, ou
+    quand la moyenne des résidus dérive de plus de `drift_bound` écarts types depuis
+    le dernier test.
+
+    Sur une fenêtre plate ou colinéaire, x'x est singulière ou mal conditionnée : la
+    récursion ne suivrait plus les moindres carrés. La régression et le test sont alors
+    refaits en entier à chaque barre, jusqu'à ce que la fenêtre redevienne régulière.
+    """
+
+    # Conditionnement maximal de x'x pour la récursion (au-delà : régression complète)
+    max_condition = 1e6
+
+    def __init__(self, symbols, rows, last_time, window=120, test_every=35, drift_bound=0.5):
+        """
+        Args:
+            symbols: symboles, dans l'ordre des colonnes de rows
+            rows: log-returns alignés (une ligne par barre, une colonne par symbole, ordre chronologique)
+            last_time: EndTime de la dernière ligne
+            window: nombre de barres de la régression
+            test_every: nombre de barres entre deux tests ADF
+            drift_bound: dérive tolérée de la moyenne des résidus (en écarts types)
+        """
+        self.symbols = list(symbols)
+        self.window = window
+        self.test_every = test_every
+        self.drift_bound = drift_bound
+        # Poids de la moyenne exponentielle des résidus
+        self.alpha = 2.0 / (window + 1)
+
+        self.rows = deque(np.asarray(rows, dtype=float)[-window:], maxlen=window)
+        self.last_time = last_time
+        self.test()
+
+    def test(self):
+        """
+        Régression et test Engle-Granger complets sur la fenêtre : remet à zéro
+        la dérive numérique de la récursion et le compteur de barres.
+        """
+        data = np.array(self.rows)
+        y, x = data[:, 0], data[:, 1:]
+        model = engle_granger(pd.Series(y), pd.DataFrame(x), trend="n", lags=0)
+        self.pvalue = model.pvalue
+        self.vector = np.asarray(model.cointegrating_vector, dtype=float)
+
+        xtx = x.T @ x
+        self.recursive = self.well_conditioned(xtx)
+        if self.recursive:
+            self.P = np.linalg.inv(xtx)
+            self.beta = self.P @ (x.T @ y)
+        else:
+            # Solution de norme minimale, sur x directement (x'x doublerait le conditionnement)
+            self.P = None
+            self.beta = np.linalg.lstsq(x, y, rcond=None)[0]
+        residuals = y - x @ self.beta
+        self.residual_std = max(residuals.std(), 1e-12)
+        self.residual_mean = 0.0
+        self.since_test = 0
+
+    def well_conditioned(self, matrix):
+        singular_values = np.linalg.svd(matrix, compute_uv=False)
+        return singular_values[-1] > singular_values[0] / self.max_condition
+
+    def needs_test(self):
+        return (self.since_test >= self.test_every
+                or abs(self.residual_mean) > self.drift_bound * self.residual_std)
+
+    def push(self, time, row):
+        """
+        Barre complète (un log-return par symbole, dans l'ordre de symbols) à time ;
+        les temps déjà vus (warm-up rejoué) sont ignorés.
+        """
+        if self.last_time is not None and time <= self.last_time:
+            return
+        self.last_time = time
+        row = np.asarray(row, dtype=float)
+        if np.isfinite(row).all():
+            self.update(row)
+
+    def update(self, row):
+        y, x = row[0], row[1:]
+        self.residual_mean += self.alpha * (y - x @ self.beta - self.residual_mean)
+        oldest = self.rows[0] if len(self.rows) == self.window else None
+        self.rows.append(row)
+        if not self.recursive or (oldest is not None and not self._downdate(oldest)):
+            # Fenêtre (devenue) mal conditionnée : régression et test complets
+            self.test()
+            return
+        # Ajout de la barre (Sherman-Morrison)
+        px = self.P @ x
+        self.P -= np.outer(px, px) / (1.0 + x @ px)
+        self.beta += self.P @ x * (y - x @ self.beta)
+        if not self.well_conditioned(self.P):
+            self.test()
+            return
+        self.vector = np.concatenate(([1.0], -self.beta))
+        self.since_test += 1
+
+    def _downdate(self, row):
+        """
+        Retrait de la plus ancienne barre de la fenêtre ; False, sans rien modifier,
+        quand la matrice restante serait singulière ou mal conditionnée.
+        """
+        y, x = row[0], row[1:]
+        px = self.P @ x
+        remaining = 1.0 - x @ px
+        if remaining <= 1.0 / self.max_condition:
+            return False
+        self.P += np.outer(px, px) / remaining
+        self.beta -= self.P @ x * (y - x @ self.beta)
+        return True
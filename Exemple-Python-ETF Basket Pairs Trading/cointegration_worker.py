@@ -0,0 +1,27 @@
+"""
+Test Engle-Granger des paires, exécuté dans les processus de pair_discovery.
+
+Ce module n'importe rien de LEAN (ni AlgorithmImports, ni clr) : un processus
+lancé en spawn le réimporte seul, et ne reçoit que des tableaux numpy de floats
+et des indices de colonnes entiers.
+"""
+import numpy as np
+from arch.unitroot.cointegration import engle_granger
+
+_values = None
+
+def init_worker(values):
+    global _values
+    _values = values
+
+def pvalues(pairs, values=None):
+    """
+    p-values Engle-Granger (trend='n', lags=0) des paires (i, j) de colonnes de values,
+    chaque série sans ses NaN.
+    """
+    values = _values if values is None else values
+    result = []
+    for i, j in pairs:
+        y, x = values[:, i], values[:, j]
+        result.append(engle_granger(y[~np.isnan(y)], x[~np.isnan(x)], trend="n", lags=0).pvalue)
+    return result
@@ -0,0 +1,54 @@
+#region imports
+from AlgorithmImports import *
+import numpy as np
+#endregion
+
+def price_adjustment_factor(slice, symbol, normalization_mode):
+    """
+    Factor turning the prices received before the ex-date into prices comparable with
+    the next ones: SplitFactor for an effective split, (reference price - distribution) /
+    reference price for a dividend. It is 1 when the data feed is already adjusted
+    (Adjusted / TotalReturn, and SplitAdjusted for splits).
+    """
+    raw = normalization_mode in (DataNormalizationMode.Raw, DataNormalizationMode.ScaledRaw)
+    factor = 1.0
+    if raw and symbol in slice.Splits:
+        split = slice.Splits[symbol]
+        if split.Type == SplitType.SplitOccurred:
+            factor *= float(split.SplitFactor)
+    if (raw or normalization_mode == DataNormalizationMode.SplitAdjusted) and symbol in slice.Dividends:
+        dividend = slice.Dividends[symbol]
+        reference = float(dividend.ReferencePrice)
+        if reference > 0:
+            factor *= (reference - float(dividend.Distribution)) / reference
+    return factor
+
+class PriceWindow:
+    """
+    Last input prices of an indicator, enough to rebuild its state (WarmUpPeriod).
+    On a split or a dividend they are rescaled in place and replayed into the
+    indicator: no history request and no new consolidator.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.times = [None] * size
+        self.prices = np.zeros(size)
+        self.count = 0
+
+    def record(self, time, price):
+        self.prices[:-1] = self.prices[1:]
+        self.prices[-1] = price
+        self.times = self.times[1:] + [time]
+        self.count = min(self.count + 1, self.size)
+
+    def clear(self):
+        self.count = 0
+
+    def rescale(self, factor):
+        self.prices *= factor
+
+    def replay(self, indicator):
+        indicator.Reset()
+        for time, price in zip(self.times[self.size - self.count:], self.prices[self.size - self.count:]):
+            indicator.Update(time, float(price))
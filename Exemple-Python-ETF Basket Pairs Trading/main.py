@@ -4,6 +4,8 @@ from universe import SectorETFUniverseSelectionModel
 from portfolio import CointegratedVectorPortfolioConstructionModel
 from risk import TrailingStopRiskManagementModel
 from alpha import FilteredPairsAlphaModel
+from pair_discovery import discover_pairs, price_panel
+from return_panel import ReturnPanel
 # endregion
 
 class ETFPairsTrading(QCAlgorithm):
@@ -32,6 +34,8 @@ class ETFPairsTrading(QCAlgorithm):
         threshold_param = self.GetParameter("threshold") or "2.2"
         self.lookback = int(lookback_param)
         self.zscore_threshold = float(threshold_param)
+        # Nombre de paires suivies par l'alpha (le moteur de spreads en supporte des milliers)
+        self.max_pairs = int(self.GetParameter("max_pairs") or "3")
 
         # BROKERAGE & MARGIN
         self.SetBrokerageModel(BrokerageName.InteractiveBrokersBrokerage, AccountType.Margin)
@@ -51,13 +55,17 @@ class ETFPairsTrading(QCAlgorithm):
         )
         self.AddAlpha(self.filteredAlpha)
 
+        # LOG-RETURNS PARTAGÉS (une colonne par symbole, index temporel commun)
+        self.return_panel = ReturnPanel(capacity=240)
+
         # PORTFOLIO CONSTRUCTION
         self.pcm = CointegratedVectorPortfolioConstructionModel(
             algorithm=self,
             lookback=120,            # plus long que l'alpha
             resolution=self.resolution,
             rebalance=Expiry.EndOfWeek,
-            max_position_size=0.20
+            max_position_size=0.20,
+            return_panel=self.return_panel
         )
         # Désactive le rebalance auto sur changement de l'univers
         self.pcm.rebalance_portfolio_on_security_changes = False
@@ -103,21 +111,10 @@ class ETFPairsTrading(QCAlgorithm):
             self.Log("No historical data available for these symbols.")
             return
 
-        prices = history.close.unstack(level=0)
-        results = []
-        from itertools import combinations
-        from arch.unitroot.cointegration import engle_granger
-
-        for etf1, etf2 in combinations(symbols, 2):
-            etf1_prices = prices[etf1].dropna()
-            etf2_prices = prices[etf2].dropna()
-            if len(etf1_prices) == len(etf2_prices) and len(etf1_prices) > 50:
-                model = engle_granger(etf1_prices, etf2_prices, trend="n", lags=0)
-                corr = etf1_prices.corr(etf2_prices)
-                vol = etf1_prices.std() + etf2_prices.std()
-                # On desserre => pvalue < 0.1 et corr > 0.6
-                if model.pvalue < 0.1 and corr > 0.6 and vol > 0.01:
-                    results.append((etf1, etf2, model.pvalue, corr, vol))
+        prices = price_panel(history, symbols)
+        # Filtre corrélation/volatilité vectorisé, puis Engle-Granger en parallèle sur les survivants
+        # On desserre => pvalue < 0.1 et corr > 0.6
+        results = discover_pairs(prices, min_correlation=0.6, max_pvalue=0.1, min_volatility=0.01, min_bars=50)
 
         if not results:
             self.Log("No valid cointegrated pairs found.")
@@ -125,7 +122,7 @@ class ETFPairsTrading(QCAlgorithm):
 
         # Trier par corr * vol, puis pvalue
         results.sort(key=lambda x: (-x[3] * x[4], x[2]))
-        top_pairs = [(etf1, etf2) for etf1, etf2, _, _, _ in results[:3]]
+        top_pairs = [(etf1, etf2) for etf1, etf2, _, _, _ in results[:self.max_pairs]]
 
         # Ajout forcé en Hourly
         for etf1, etf2 in top_pairs:
@@ -0,0 +1,122 @@
+#region imports
+from AlgorithmImports import *
+import os
+import sys
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import cointegration_worker
+#endregion
+
+def price_panel(history, symbols):
+    """
+    Clôtures de History(symbols, ...) avec une colonne par symbole, dans l'ordre de symbols.
+    unstack trie les colonnes, or leur ordre fixe l'orientation (etf1, etf2) des paires :
+    le sens du test Engle-Granger et le signe du spread de l'alpha.
+    """
+    return history.close.unstack(level=0).reindex(columns=symbols)
+
+def discover_pairs(prices, min_correlation=0.6, max_pvalue=0.10, min_volatility=0.01, min_bars=50, workers=None):
+    """
+    Découverte de paires cointégrées sur un panel de prix (une colonne par symbole).
+
+    Les filtres bon marché passent d'abord sur toutes les paires à la fois : une seule
+    matrice de corrélation (np.corrcoef) sur le panel aligné, la volatilité (somme des
+    écarts types) et le nombre de barres. Seules les paires qui survivent passent le
+    test Engle-Granger, réparti sur un pool de processus.
+
+    Args:
+        prices: DataFrame de prix (index temps, colonnes symboles)
+        min_correlation: corrélation des prix minimale (None => pas de filtre)
+        max_pvalue: p-value Engle-Granger maximale
+        min_volatility: somme minimale des écarts types (None => pas de filtre)
+        min_bars: nombre de barres minimal (les deux séries doivent en avoir autant)
+        workers: nombre de processus (None => un par CPU hors de LEAN, aucun dans LEAN ;
+            1 => dans le processus courant)
+
+    Returns:
+        liste de (etf1, etf2, pvalue, corr, vol) dans l'ordre de itertools.combinations
+    """
+    columns = list(prices.columns)
+    values = prices.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+
+    std = np.full(len(columns), np.nan)
+    enough = counts > 1
+    std[enough] = np.nanstd(values[:, enough], axis=0, ddof=1)
+    vol = std[:, None] + std[None, :]
+
+    candidates = np.triu(counts[:, None] == counts[None, :], k=1) & (counts > min_bars)[:, None]
+    if min_volatility is not None:
+        candidates &= vol > min_volatility
+
+    corr = pair_correlations(prices, values, valid, candidates)
+    if min_correlation is not None:
+        candidates &= corr > min_correlation
+
+    first, second = np.nonzero(candidates)
+    pairs = list(zip(first.tolist(), second.tolist()))
+    pvalues = cointegration_pvalues(values, pairs, workers)
+
+    return [(columns[i], columns[j], pvalue, corr[i, j], vol[i, j])
+            for (i, j), pvalue in zip(pairs, pvalues) if pvalue < max_pvalue]
+
+def pair_correlations(prices, values, valid, candidates):
+    """
+    Matrice des corrélations de Pearson des paires candidates.
+    Les colonnes qui ont les mêmes barres manquantes sont alignées ensemble et passent
+    dans un seul np.corrcoef ; les rares paires aux trous différents sont calculées
+    sur leurs barres communes comme Series.corr.
+    """
+    n = values.shape[1]
+    corr = np.full((n, n), np.nan)
+    groups = {}
+    for column in range(n):
+        groups.setdefault(valid[:, column].tobytes(), []).append(column)
+
+    group_of = np.empty(n, dtype=np.intp)
+    for group_id, members in enumerate(groups.values()):
+        group_of[members] = group_id
+        rows = valid[:, members[0]]
+        if len(members) > 1 and rows.sum() > 1:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                block = np.corrcoef(values[rows][:, members], rowvar=False)
+            corr[np.ix_(members, members)] = block
+
+    for i, j in zip(*np.nonzero(candidates & (group_of[:, None] != group_of[None, :]))):
+        corr[i, j] = prices.iloc[:, i].corr(prices.iloc[:, j])
+    return corr
+
+def in_lean():
+    # Sous LEAN (backtest, live, research) Python est hébergé par .NET via pythonnet
+    return 'clr' in sys.modules
+
+def can_spawn():
+    # Un processus spawn réexécute le script principal : s'il n'est pas sur le disque
+    # (stdin), le processus meurt au démarrage et le pool peut rester bloqué
+    main = getattr(sys.modules.get('__main__'), '__file__', None)
+    return main is None or os.path.exists(main)
+
+def cointegration_pvalues(values, pairs, workers=None):
+    """
+    p-values Engle-Granger des paires (indices de colonnes de values, tableau de prix
+    float avec NaN), dans l'ordre. Le tableau est envoyé une fois par processus, les
+    paires par paquets ; en série dans LEAN, ou si le pool échoue pour une raison
+    quelconque.
+    """
+    if workers is None:
+        workers = 1 if in_lean() else os.cpu_count() or 1
+    if workers <= 1 or len(pairs) < 2 * workers or not can_spawn():
+        return cointegration_worker.pvalues(pairs, values)
+
+    size = -(-len(pairs) // (4 * workers))
+    chunks = [pairs[k:k + size] for k in range(0, len(pairs), size)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                                 initializer=cointegration_worker.init_worker, initargs=(values,)) as pool:
+            return [pvalue for chunk in pool.map(cointegration_worker.pvalues, chunks) for pvalue in chunk]
+    except Exception:
+        # Pas de sous-processus possible dans cet environnement => test en série
+        return cointegration_worker.pvalues(pairs, values)
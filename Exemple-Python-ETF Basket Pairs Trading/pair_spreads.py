@@ -0,0 +1,103 @@
+#region imports
+from AlgorithmImports import *
+import numpy as np
+#endregion
+
+class PairSpreads:
+    """
+    Moteur de spreads en colonnes pour FilteredPairsAlphaModel.
+    beta, mean, std et l'heure du dernier signal de toutes les paires sont stockés
+    dans des tableaux numpy indexés par l'id de la paire ; les prix des deux jambes
+    sont rassemblés par indexation avancée et tous les spreads / z-scores sont
+    mis à jour en une seule opération vectorisée (des milliers de paires par barre).
+    """
+
+    def __init__(self, pairs=()):
+        self.pairs = []
+        self.ids = {}
+        self.symbols = []
+        self.legs = np.zeros((2, 0), dtype=np.intp)
+        self.beta = np.ones(0)
+        self.mean = np.zeros(0)
+        self.std = np.ones(0)
+        self.last_signal = np.full(0, np.datetime64('NaT'), dtype='datetime64[us]')
+        self.set_pairs(pairs)
+
+    def set_pairs(self, pairs):
+        """
+        Remplace la liste des paires : les paires conservées gardent leurs statistiques,
+        les nouvelles repartent de beta=1, mean=0, std=1 sans signal.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        n = len(pairs)
+        beta, mean, std = np.ones(n), np.zeros(n), np.ones(n)
+        last_signal = np.full(n, np.datetime64('NaT'), dtype='datetime64[us]')
+
+        kept = [(new_id, self.ids[pair]) for new_id, pair in enumerate(pairs) if pair in self.ids]
+        if kept:
+            new_ids, old_ids = np.array(kept, dtype=np.intp).T
+            beta[new_ids] = self.beta[old_ids]
+            mean[new_ids] = self.mean[old_ids]
+            std[new_ids] = self.std[old_ids]
+            last_signal[new_ids] = self.last_signal[old_ids]
+
+        # Table des symboles : chaque jambe de paire pointe vers une colonne de prix
+        columns = {}
+        legs = np.zeros((2, n), dtype=np.intp)
+        for pair_id, (etf1, etf2) in enumerate(pairs):
+            legs[0, pair_id] = columns.setdefault(etf1, len(columns))
+            legs[1, pair_id] = columns.setdefault(etf2, len(columns))
+
+        self.pairs = pairs
+        self.ids = {pair: pair_id for pair_id, pair in enumerate(pairs)}
+        self.symbols = list(columns)
+        self.legs = legs
+        self.beta, self.mean, self.std, self.last_signal = beta, mean, std, last_signal
+
+    def gather(self, data):
+        """
+        Prix de clôture de chaque symbole de la table dans le slice (NaN si absent).
+        Une lecture par symbole, pas par paire.
+        """
+        prices = np.full(len(self.symbols), np.nan)
+        for column, symbol in enumerate(self.symbols):
+            if symbol in data:
+                prices[column] = data[symbol].Close
+        return prices
+
+    def update(self, prices, now, threshold, cooldown):
+        """
+        Met à jour les paires actives (données présentes, hors cooldown, price2 != 0)
+        et enregistre l'heure des signaux.
+
+        Returns:
+            missing: paires dont une jambe n'a pas de données
+            signal: +1 si z > threshold (SHORT etf1 / LONG etf2), -1 si z < -threshold, 0 sinon
+            z: z-score des paires mises à jour (NaN pour les autres)
+        """
+        price1 = prices[self.legs[0]]
+        price2 = prices[self.legs[1]]
+        missing = np.isnan(price1) | np.isnan(price2)
+
+        now = np.datetime64(now, 'us')
+        cooled = np.isnat(self.last_signal) | ((now - self.last_signal) >= np.timedelta64(cooldown))
+        active = np.flatnonzero(~missing & cooled & (price2 != 0))
+
+        p1, p2 = price1[active], price2[active]
+        # Beta(t+1) = 0.9 * beta(t) + 0.1 * (p1/p2)
+        beta = 0.9 * self.beta[active] + 0.1 * (p1 / p2)
+        spread = p1 - beta * p2
+        mean = 0.9 * self.mean[active] + 0.1 * spread
+        std = np.maximum(0.9 * self.std[active] + 0.1 * np.abs(spread - mean), 1e-5)
+        self.beta[active] = beta
+        self.mean[active] = mean
+        self.std[active] = std
+
+        z = np.full(len(self.pairs), np.nan)
+        z[active] = (spread - mean) / std
+
+        signal = np.zeros(len(self.pairs), dtype=np.int8)
+        signal[z > threshold] = 1
+        signal[z < -threshold] = -1
+        self.last_signal[signal != 0] = now
+        return missing, signal, z
@@ -1,8 +1,10 @@
 #region imports
 from AlgorithmImports import *
 from Portfolio.EqualWeightingPortfolioConstructionModel import EqualWeightingPortfolioConstructionModel
-from arch.unitroot.cointegration import engle_granger
-from utils import reset_and_warm_up
+from cointegration_cache import RecursiveCointegration
+from return_panel import ReturnPanel
+from corporate_actions import PriceWindow, price_adjustment_factor
+from utils import bulk_warm_up
 #endregion
 
 class CointegratedVectorPortfolioConstructionModel(EqualWeightingPortfolioConstructionModel):
@@ -14,12 +16,19 @@ class CointegratedVectorPortfolioConstructionModel(EqualWeightingPortfolioConstr
     pondérer LONG/SHORT selon la 'cointegrating_vector'.
     """
 
+    # Nombre max d'ensembles de symboles dont le vecteur de cointégration est suivi
+    max_cached_sets = 16
+
     def __init__(self,
                  algorithm,
                  lookback=120,
                  resolution=Resolution.Hour,
                  rebalance=Expiry.EndOfWeek,  # Garde l'équivalent "END_OF_WEEK"
-                 max_position_size=0.20):
+                 max_position_size=0.20,
+                 test_every=35,
+                 drift_bound=0.5,
+                 max_pvalue=0.10,
+                 return_panel=None):
         """
         Args:
             algorithm: l'instance principale de l'algo
@@ -27,16 +36,28 @@ class CointegratedVectorPortfolioConstructionModel(EqualWeightingPortfolioConstr
             resolution: résolution des barres (Hourly par défaut)
             rebalance: fréquence de rebalancement par défaut (ex: EndOfWeek)
             max_position_size: fraction max du portefeuille par position (ex: 0.20 = 20%)
+            test_every: barres entre deux tests Engle-Granger complets (ex: 35 = 1 semaine en Hourly)
+            drift_bound: dérive des résidus (en écarts types) qui force un nouveau test
+            max_pvalue: p-value max pour considérer l'ensemble cointégré
+            return_panel: ReturnPanel partagé (un panel propre de 2 * lookback barres par défaut)
         """
         super().__init__(rebalance, PortfolioBias.LongShort)
         self.algorithm = algorithm
         self.lookback = lookback
         self.resolution = resolution
         self.security_data = {}
+        # Log-returns de tous les symboles, alignés sur un index temporel commun
+        self.return_panel = return_panel or ReturnPanel(capacity=2 * lookback)
 
         # Limite la taille max par symbole (optionnel)
         self.max_position_size = max_position_size
 
+        # Vecteur de cointégration par ensemble de symboles actifs, mis à jour à chaque log-return
+        self.test_every = test_every
+        self.drift_bound = drift_bound
+        self.max_pvalue = max_pvalue
+        self.cointegration = {}
+
         # Contrôle si on veut rebalancer quand l'univers change
         self.rebalance_portfolio_on_security_changes = True
 
@@ -45,84 +66,132 @@ class CointegratedVectorPortfolioConstructionModel(EqualWeightingPortfolioConstr
         super().OnSecuritiesChanged(algorithm, changes)
 
         # Initialisation ou nettoyage
-        for added in changes.AddedSecurities:
-            self.init_security_data(algorithm, added)
+        added_data = [self.init_security_data(algorithm, added) for added in changes.AddedSecurities]
+        # Un seul warm-up (une requête d'historique) pour tout le lot de symboles ajoutés
+        self.warm_up_indicators(added_data)
         for removed in changes.RemovedSecurities:
             self.dispose_security_data(algorithm, removed)
 
     def init_security_data(self, algorithm, sec_obj):
         """
-        Prépare les structures de données (LogReturn, RollingWindow, consolidator...) pour chaque security.
+        Prépare les structures de données (LogReturn, consolidator...) pour chaque security ;
+        les log-returns sont écrits dans return_panel.
         """
         data = {
             "symbol": sec_obj.Symbol,  # On stocke le Symbol
             "logr": LogReturn(1),
-            "window": RollingWindow[IndicatorDataPoint](self.lookback),
-            "consolidator": TradeBarConsolidator(timedelta(hours=1))
+            "consolidator": TradeBarConsolidator(timedelta(hours=1)),
+            "replaying": False
         }
+        # Derniers prix vus par LogReturn (enregistrés par chaque consolidator, cf. reset_and_warm_up)
+        data["prices"] = PriceWindow(data["logr"].WarmUpPeriod)
+        data["consolidator"].DataConsolidated += lambda _, bar: data["prices"].record(bar.EndTime, bar.Close)
 
-        data["logr"].Updated += lambda _, updated: data["window"].Add(
-            IndicatorDataPoint(updated.EndTime, updated.Value)
-        )
+        data["logr"].Updated += lambda _, updated: self.on_log_return(data, updated)
         algorithm.RegisterIndicator(sec_obj.Symbol, data["logr"], data["consolidator"])
         algorithm.SubscriptionManager.AddConsolidator(sec_obj.Symbol, data["consolidator"])
 
         self.security_data[sec_obj.Symbol] = data
-        self.warm_up_indicator(data)
+        self.return_panel.add(sec_obj.Symbol)
+        return data
+
+    def on_log_return(self, data_dict, updated):
+        if data_dict["replaying"]:
+            return
+        symbol = data_dict["symbol"]
+        time = updated.EndTime
+        if not self.return_panel.write(symbol, time, updated.Value):
+            return
+        # La barre entre dans les régressions dès que tous leurs symboles l'ont reçue
+        for estimator in self.cointegration.values():
+            if symbol in estimator.symbols:
+                row = self.return_panel.row(time, estimator.symbols)
+                if not np.isnan(row).any():
+                    estimator.push(time, row)
+
+    def drop_cointegration(self, symbol):
+        for symbols in [key for key in self.cointegration if symbol in key]:
+            del self.cointegration[symbols]
 
     def warm_up_indicator(self, data_dict):
-        # On appelle la fonction reset_and_warm_up avec la résolution (Hourly) et le lookback
-        reset_and_warm_up(self.algorithm, data_dict, self.resolution, self.lookback)
+        self.warm_up_indicators([data_dict])
+
+    def warm_up_indicators(self, data_dicts):
+        # Log-returns de tout le lookback calculés d'un bloc (bulk_warm_up), écrits directement dans le panel
+        warmed = bulk_warm_up(self.algorithm, data_dicts, self.resolution, self.lookback)
+        for symbol, (times, values) in warmed.items():
+            self.return_panel.write_many(symbol, times, values)
 
     def dispose_security_data(self, algorithm, security):
         symbol = security.Symbol
         if symbol in self.security_data:
+            self.drop_cointegration(symbol)
             data_dict = self.security_data.pop(symbol)
             self.reset(data_dict)
             algorithm.SubscriptionManager.RemoveConsolidator(symbol, data_dict["consolidator"])
 
     def reset(self, data_dict):
         data_dict["logr"].Reset()
-        data_dict["window"].Reset()
+        self.return_panel.remove(data_dict["symbol"])
 
     def handle_corporate_actions(self, algorithm, slice):
+        """
+        Split / dividende : les prix gardés pour LogReturn sont ajustés en place
+        et l'indicateur est reconstruit à partir d'eux, sans requête d'historique.
+        Les log-returns du panel ne dépendent pas de l'échelle des prix : ils
+        restent valides, comme les vecteurs de cointégration en cache.
+        """
         symbols = set(slice.Dividends.keys()).union(slice.Splits.keys())
         for symbol in symbols:
             if symbol in self.security_data:
-                self.warm_up_indicator(self.security_data[symbol])
+                # Mode du titre lui-même : AddEquity, ou un réglage de l'univers modifié depuis, peut différer
+                mode = algorithm.Securities[symbol].DataNormalizationMode
+                factor = price_adjustment_factor(slice, symbol, mode)
+                if factor != 1.0:
+                    self.adjust_indicator(self.security_data[symbol], factor)
+
+    def adjust_indicator(self, data_dict, factor):
+        data_dict["prices"].rescale(factor)
+        # Le rejeu ne doit pas réécrire le panel (premier point à 0 tant que LogReturn n'est pas prêt)
+        data_dict["replaying"] = True
+        try:
+            data_dict["prices"].replay(data_dict["logr"])
+        finally:
+            data_dict["replaying"] = False
 
     def DetermineTargetPercent(self, activeInsights: List[Insight]) -> Dict[Insight, float]:
         """
         Surclassement de la méthode standard pour allouer des poids LONG/SHORT.
-        On exécute un test Engle-Granger sur 2 symboles (simpliste).
+        Le vecteur de cointégration de l'ensemble de symboles est suivi en continu
+        (RecursiveCointegration) ; le test Engle-Granger complet n'est relancé que
+        selon test_every / drift_bound.
         """
 
         if len(activeInsights) < 2:
             # Pas assez de signaux pour faire du pairs-trading
             return {insight: 0 for insight in activeInsights}
 
-        # On construit un DataFrame (symbol -> returns) à partir de window
-        data_map = {}
-        symbols_in_insights = [i.Symbol for i in activeInsights]
-        for sym in symbols_in_insights:
-            if sym in self.security_data:
-                data_map[sym] = self.returns(self.security_data[sym])
-            else:
-                data_map[sym] = pd.Series(dtype=float)
-
-        df = pd.DataFrame(data_map).replace([np.inf, -np.inf], np.nan).dropna(how='any')
+        symbols = tuple(i.Symbol for i in activeInsights)
+        estimator = self.cointegration.get(symbols)
+        if estimator is None:
+            estimator = self.create_cointegration(symbols)
+            if estimator is None:
+                self.live_log(self.algorithm, "Not enough columns or data => zero allocation.")
+                return {insight: 0 for insight in activeInsights}
+        elif estimator.needs_test():
+            estimator.test()
+        # Les ensembles les plus récemment utilisés restent en cache
+        self.cointegration.pop(symbols, None)
+        self.cointegration[symbols] = estimator
+        while len(self.cointegration) > self.max_cached_sets:
+            del self.cointegration[next(iter(self.cointegration))]
 
-        if df.shape[1] < 2 or df.empty:
-            self.live_log(self.algorithm, "Not enough columns or data => zero allocation.")
-            return {insight: 0 for insight in activeInsights}
-
-        model = engle_granger(df.iloc[:, 0], df.iloc[:, 1:], trend='n', lags=0)
         # On desserre un peu la condition p-value
-        if model.pvalue > 0.10:
+        if estimator.pvalue > self.max_pvalue:
             # Pas cointegré => pas de position
             return {insight: 0 for insight in activeInsights}
 
-        coint_vector = model.cointegrating_vector
+        coint_vector = estimator.vector
         total_weight = sum(abs(coint_vector))
 
         result = {}
@@ -133,19 +202,20 @@ class CointegratedVectorPortfolioConstructionModel(EqualWeightingPortfolioConstr
 
         return result
 
-    def returns(self, data_dict: dict) -> pd.Series:
-        if "window" not in data_dict:
-            return pd.Series(dtype=float)
-
-        arr = [x.Value for x in data_dict["window"]]
-        idx = [x.EndTime for x in data_dict["window"]]
-
-        tmp = {}
-        for t, val in zip(idx, arr):
-            tmp[t] = val
-        ser = pd.Series(tmp).sort_index()
-
-        return ser.iloc[::-1]
+    def create_cointegration(self, symbols):
+        """
+        Premier ajustement d'un ensemble de symboles, sur les lignes du panel
+        où ils ont tous un log-return (ordre chronologique).
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if len(symbols) < 2 or any(sym not in self.return_panel.columns for sym in symbols):
+            return None
+        times, rows = self.return_panel.aligned(symbols, self.lookback)
+        if len(rows) == 0:
+            return None
+        return RecursiveCointegration(symbols, rows, times[-1].item(),
+                                      window=self.lookback, test_every=self.test_every,
+                                      drift_bound=self.drift_bound)
 
     def live_log(self, algorithm, msg: str):
         algorithm.Log(msg)
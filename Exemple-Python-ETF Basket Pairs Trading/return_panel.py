@@ -0,0 +1,176 @@
+#region imports
+from AlgorithmImports import *
+import numpy as np
+#endregion
+
+class ReturnPanel:
+    """
+    Log-returns de tous les symboles suivis dans un seul tableau numpy 2-D :
+    une ligne par EndTime (index temporel commun), une colonne par symbole.
+
+    C'est un tampon circulaire de `capacity` lignes écrit en double (ligne i et
+    i + capacity), de sorte que les n dernières lignes sont toujours une vue
+    contiguë : window() et column() ne copient rien.
+    """
+
+    def __init__(self, capacity=240, columns=16):
+        self.capacity = capacity
+        self.values = np.full((2 * capacity, columns), np.nan)
+        self.times = np.full(2 * capacity, np.datetime64('NaT'), dtype='datetime64[us]')
+        self.row_times = [None] * capacity
+        self.rows = {}
+        self.count = 0
+        self.last_time = None
+        self.columns = {}
+        self.free_columns = list(range(columns - 1, -1, -1))
+
+    def add(self, symbol):
+        if symbol in self.columns:
+            return self.columns[symbol]
+        if not self.free_columns:
+            self._grow()
+        column = self.free_columns.pop()
+        self.columns[symbol] = column
+        return column
+
+    def remove(self, symbol):
+        column = self.columns.pop(symbol, None)
+        if column is not None:
+            self.values[:, column] = np.nan
+            self.free_columns.append(column)
+
+    def _grow(self):
+        old = self.values.shape[1]
+        self.values = np.concatenate([self.values, np.full((2 * self.capacity, old), np.nan)], axis=1)
+        self.free_columns.extend(range(2 * old - 1, old - 1, -1))
+
+    def _append(self, time):
+        position = self.count % self.capacity
+        evicted = self.row_times[position]
+        if evicted is not None:
+            del self.rows[evicted]
+        self.row_times[position] = time
+        self.rows[time] = self.count
+        self.values[position] = np.nan
+        self.values[position + self.capacity] = np.nan
+        self.times[position] = self.times[position + self.capacity] = np.datetime64(time, 'us')
+        self.count += 1
+        self.last_time = time
+        return position
+
+    def write(self, symbol, time, value):
+        """
+        Écrit le log-return de symbol à time. Un temps plus récent que la dernière
+        ligne ouvre une nouvelle ligne ; un temps plus ancien absent du panel
+        (sorti du tampon ou jamais vu) est ignoré et write renvoie False.
+        """
+        column = self.columns.get(symbol)
+        if column is None:
+            column = self.add(symbol)
+        sequence = self.rows.get(time)
+        if sequence is not None:
+            position = sequence % self.capacity
+        elif self.last_time is None or time > self.last_time:
+            position = self._append(time)
+        else:
+            return False
+        self.values[position, column] = value
+        self.values[position + self.capacity, column] = value
+        return True
+
+    def write_many(self, symbol, times, values):
+        """
+        Écrit une série de log-returns de symbol (temps croissants) en une fois ;
+        renvoie le nombre de valeurs gardées dans le panel. Contrairement à write, un temps plus
+        ancien que la dernière ligne et absent du panel n'est pas ignoré : sa ligne
+        est insérée à sa place (symbole dont l'historique ne couvre pas la même
+        période que les autres). Seuls les temps plus anciens que les `capacity`
+        lignes gardées sont perdus.
+        """
+        column = self.add(symbol)
+        times = list(times)[-self.capacity:]
+        values = np.asarray(values, dtype=float)[-self.capacity:]
+        if self.last_time is not None:
+            missing = [time for time in times if time < self.last_time and time not in self.rows]
+            if missing:
+                self._insert(missing)
+        positions = []
+        kept = []
+        for i, time in enumerate(times):
+            sequence = self.rows.get(time)
+            if sequence is not None:
+                positions.append(sequence % self.capacity)
+            elif self.last_time is None or time > self.last_time:
+                positions.append(self._append(time))
+            else:
+                # plus ancien que toutes les lignes gardées
+                continue
+            kept.append(i)
+        positions = np.array(positions, dtype=np.intp)
+        self.values[positions, column] = values[kept]
+        self.values[positions + self.capacity, column] = values[kept]
+        # les premières lignes peuvent avoir été évincées par les suivantes
+        return sum(times[i] in self.rows for i in kept)
+
+    def _insert(self, times):
+        """
+        Ajoute des lignes vides aux temps donnés (plus anciens que la dernière ligne) :
+        le tampon est réécrit dans l'ordre chronologique à partir de la position 0, en
+        gardant les `capacity` lignes les plus récentes.
+        """
+        start, end = self._span(None)
+        old_times = [self.row_times[sequence % self.capacity] for sequence in range(self.count - (end - start), self.count)]
+        old_values = self.values[start:end].copy()
+        merged = sorted(set(old_times).union(times))[-self.capacity:]
+        source = {time: i for i, time in enumerate(old_times)}
+
+        self.values[:] = np.nan
+        self.times[:] = np.datetime64('NaT')
+        self.row_times = merged + [None] * (self.capacity - len(merged))
+        self.rows = {time: i for i, time in enumerate(merged)}
+        moved = [(i, source[time]) for i, time in enumerate(merged) if time in source]
+        if moved:
+            target, origin = np.array(moved, dtype=np.intp).T
+            self.values[target] = self.values[target + self.capacity] = old_values[origin]
+        n = len(merged)
+        self.times[:n] = self.times[self.capacity:self.capacity + n] = np.array(merged, dtype='datetime64[us]')
+        self.count = n
+        self.last_time = merged[-1]
+
+    def _span(self, n):
+        n = min(self.count, self.capacity) if n is None else min(n, self.count, self.capacity)
+        start = (self.count - n) % self.capacity
+        return start, start + n
+
+    def window(self, n=None):
+        """
+        (temps, valeurs) des n dernières lignes, toutes colonnes : vues sans copie
+        """
+        start, end = self._span(n)
+        return self.times[start:end], self.values[start:end]
+
+    def column(self, symbol, n=None):
+        """
+        Les n derniers log-returns de symbol (NaN si absent à ce temps) : vue sans copie
+        """
+        start, end = self._span(n)
+        return self.values[start:end, self.columns[symbol]]
+
+    def row(self, time, symbols):
+        """
+        Valeurs des symboles à time, None si ce temps n'est pas dans le panel
+        """
+        sequence = self.rows.get(time)
+        if sequence is None:
+            return None
+        return self.values[sequence % self.capacity, [self.columns[symbol] for symbol in symbols]]
+
+    def aligned(self, symbols, n=None):
+        """
+        (temps, valeurs) des lignes, parmi les n dernières, où tous les symboles
+        ont un log-return fini, colonnes dans l'ordre de symbols (ordre chronologique)
+        """
+        times, values = self.window(n)
+        values = values[:, [self.columns[symbol] for symbol in symbols]]
+        complete = np.isfinite(values).all(axis=1)
+        return times[complete], values[complete]
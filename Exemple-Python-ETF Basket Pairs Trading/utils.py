@@ -1,5 +1,7 @@
 #region imports
 from AlgorithmImports import *
+import numpy as np
+import pandas as pd
 #endregion
 
 def reset_and_warm_up(algorithm, data_dict, resolution, lookback=None):
@@ -42,6 +44,11 @@ def reset_and_warm_up(algorithm, data_dict, resolution, lookback=None):
     # Mais celui-ci s'adapte automatiquement au 'resolution' s'il est déjà planifié.
     new_cons = TradeBarConsolidator(timedelta(hours=1))
     algorithm.RegisterIndicator(symbol, indicator, new_cons)
+    # Derniers prix de l'indicateur, pour l'ajuster en place sur split/dividende
+    prices = data_dict.get("prices")
+    if prices is not None:
+        prices.clear()
+        new_cons.DataConsolidated += lambda _, bar: prices.record(bar.EndTime, bar.Close)
 
     # "Replay" des barres historiques pour remplir l'indicateur
     for bar in bars:
@@ -50,3 +57,68 @@ def reset_and_warm_up(algorithm, data_dict, resolution, lookback=None):
     data_dict["consolidator"] = new_cons
     return new_cons
 
+
+def bulk_warm_up(algorithm, data_dicts, resolution, lookback=None):
+    """
+    Warm-up de plusieurs symboles en une seule requête d'historique (ex: un lot de
+    constituants ajoutés par l'univers). Les log-returns de toute la période sont
+    calculés avec numpy sur les clôtures ; l'indicateur 'logr' ne reçoit que ses
+    WarmUpPeriod derniers prix, ce qui suffit à son état final. Le consolidator
+    en place est conservé.
+
+    Le consolidator étant horaire, les clôtures de l'historique sont celles qu'il
+    produirait pour une résolution Hour ou plus large ; en dessous, on retombe sur
+    reset_and_warm_up (rejeu barre par barre).
+
+    Args:
+        algorithm: instance QCAlgorithm
+        data_dicts: dicts contenant "symbol", "logr", "consolidator" (et "prices" en option)
+        resolution: resolution des barres (ex: Resolution.Hour)
+        lookback: nombre de barres historiques (défaut: WarmUpPeriod de l'indicateur)
+
+    Returns:
+        {symbol: (temps, log-returns)} pour les symboles réchauffés par ce chemin,
+        le premier log-return étant celui de la deuxième barre
+    """
+    if not data_dicts:
+        return {}
+    if resolution in (Resolution.Tick, Resolution.Second, Resolution.Minute):
+        for data_dict in data_dicts:
+            reset_and_warm_up(algorithm, data_dict, resolution, lookback)
+        return {}
+
+    lookback = lookback or max(data_dict["logr"].WarmUpPeriod for data_dict in data_dicts)
+    history = algorithm.History([data_dict["symbol"] for data_dict in data_dicts], lookback, resolution,
+                                dataNormalizationMode=DataNormalizationMode.Raw)
+    closes = history["close"].unstack(level=0) if not history.empty else pd.DataFrame()
+
+    warmed = {}
+    for data_dict in data_dicts:
+        symbol = data_dict["symbol"]
+        series = closes[symbol].dropna() if symbol in closes.columns else pd.Series(dtype=float)
+        if series.empty:
+            algorithm.Log(f"No history for {symbol}.")
+            continue
+
+        times = list(series.index.to_pydatetime())
+        prices = series.to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            warmed[symbol] = (times[1:], np.log(prices[1:] / prices[:-1]))
+
+        # Etat final de l'indicateur : ses derniers prix seulement, sans publier de valeurs
+        indicator = data_dict["logr"]
+        size = indicator.WarmUpPeriod
+        data_dict["replaying"] = True
+        try:
+            indicator.Reset()
+            for time, price in zip(times[-size:], prices[-size:]):
+                indicator.Update(time, float(price))
+        finally:
+            data_dict["replaying"] = False
+
+        window = data_dict.get("prices")
+        if window is not None:
+            window.clear()
+            for time, price in zip(times[-window.size:], prices[-window.size:]):
+                window.record(time, price)
+    return warmed
@@ -0,0 +1,37 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import os
+import pickle
+import zlib
+
+
+def save_checkpoint(algo, key, state, path=None):
+    '''
+    Saves state as a compressed pickle in the ObjectStore under key, or in the local file path if given
+    '''
+    data = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    if path:
+        with open(path, 'wb') as f:
+            f.write(data)
+    else:
+        algo.ObjectStore.SaveBytes(key, bytearray(data))
+
+def load_checkpoint(algo, key, path=None):
+    '''
+    Returns the state saved by save_checkpoint, None if there is none
+    '''
+    if path:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+    else:
+        if not algo.ObjectStore.ContainsKey(key):
+            return None
+        data = bytes(algo.ObjectStore.ReadBytes(key))
+    try:
+        return pickle.loads(zlib.decompress(data))
+    except Exception as e:
+        algo.Log(f"Could not read checkpoint {path or key}: {e}")
+        return None
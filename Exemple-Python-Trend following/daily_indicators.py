@@ -0,0 +1,112 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import numpy as np
+
+from ema_oracle import EmaRegime
+
+
+class DailyIndicators:
+    '''
+    Indicators of one symbol fed by its hourly bar stream only: the hourly RSI, and the daily indicators
+    (MACD, Bollinger, RSI, EMA200, EMA50, ADX, ATR) of the daily bars consolidated from the same stream.
+    Each daily bar is fanned out to all of them and to the EMA50 / EMA200 regime; the ADX rolling window
+    only holds the ADX of the warm-up history, as its range is the reference of the adx gates.
+    '''
+
+    def __init__(self, algo, symbol, adx_rolling_window_length, ema_rolling_window_length, rsi_period=14):
+        self.symbol = symbol
+        self.hourly_rsi = RelativeStrengthIndex(rsi_period)
+        self.macd = MovingAverageConvergenceDivergence(12, 26, 9, MovingAverageType.Exponential)
+        self.bollinger = BollingerBands(20, 2, MovingAverageType.Simple)
+        self.rsi = RelativeStrengthIndex(rsi_period)
+        self.ema200 = ExponentialMovingAverage(200)
+        self.ema50 = ExponentialMovingAverage(50)
+        self.ema_regime = EmaRegime(ema_rolling_window_length)
+        self.adx = AverageDirectionalIndex(14)
+        self.atr = AverageTrueRange(14)
+        self.adx_rolling = RollingWindow[float](adx_rolling_window_length)
+        self.max_adx = float('inf')
+        self.min_adx = float('-inf')
+
+        # the daily bars are built from the hourly bars the consolidator passes on, not from a subscription of their own
+        self.daily_consolidator = TradeBarConsolidator(timedelta(days=1))
+        self.daily_consolidator.DataConsolidated += self.on_daily_bar
+        self.consolidator = IdentityDataConsolidator[TradeBar]()
+        self.consolidator.DataConsolidated += self.on_hourly_bar
+        algo.SubscriptionManager.AddConsolidator(symbol, self.consolidator)
+
+    def on_hourly_bar(self, sender, bar):
+        self.update_hourly(bar)
+
+    def update_hourly(self, bar):
+        self.hourly_rsi.Update(bar.EndTime, bar.Close)
+        self.daily_consolidator.Update(bar)
+
+    def on_daily_bar(self, sender, bar):
+        self.update(bar)
+
+    def update(self, bar):
+        self.macd.Update(bar.EndTime, bar.Close)
+        self.bollinger.Update(bar.EndTime, bar.Close)
+        self.rsi.Update(bar.EndTime, bar.Close)
+        self.ema200.Update(bar.EndTime, bar.Close)
+        self.ema50.Update(bar.EndTime, bar.Close)
+        self.adx.Update(bar)
+        self.atr.Update(bar)
+        self.ema_regime.update(self.ema50.Current.Value, self.ema200.Current.Value)
+
+    def warm_up(self, bar):
+        self.update(bar)
+        self.add_adx(self.adx.Current.Value)
+
+    def add_adx(self, value):
+        self.adx_rolling.Add(value)
+        # range of the adx window for the adx gates, no need to scan it on every hourly bar
+        self.max_adx = max(self.adx_rolling)
+        self.min_adx = min(self.adx_rolling)
+
+    def daily_bars(self, hourly, now):
+        '''
+        Splits hourly history columns (see HistoryCache.history_columns) into the daily bars of the days
+        finished at now, aggregated like the daily consolidator, and the hourly bars of the unfinished day
+        '''
+        time = hourly['time']
+        days = time.astype('datetime64[D]')
+        if len(days) == 0:
+            return [], []
+        starts = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))
+        ends = np.concatenate((starts[1:], [len(days)]))
+        finished = np.count_nonzero(days[starts] + np.timedelta64(1, 'D') <= np.datetime64(now, 'D'))
+
+        opens = hourly['open'][starts[:finished]].tolist()
+        highs = np.maximum.reduceat(hourly['high'], starts)[:finished].tolist()
+        lows = np.minimum.reduceat(hourly['low'], starts)[:finished].tolist()
+        closes = hourly['close'][ends[:finished] - 1].tolist()
+        volumes = np.add.reduceat(hourly['volume'], starts)[:finished].tolist()
+        day_starts = days[starts[:finished]].astype('datetime64[us]').tolist()
+        one_day = timedelta(days=1)
+        daily = [TradeBar(day_starts[i], self.symbol, opens[i], highs[i], lows[i], closes[i], volumes[i], one_day)
+                 for i in range(finished)]
+        unfinished = hourly_bars(self.symbol, hourly, starts[finished] if finished < len(starts) else len(time))
+        return daily, unfinished
+
+    def dispose(self, algo):
+        self.consolidator.DataConsolidated -= self.on_hourly_bar
+        algo.SubscriptionManager.RemoveConsolidator(self.symbol, self.consolidator)
+
+
+def hourly_bars(symbol, hourly, start=0, end=None):
+    '''
+    TradeBars of the rows start:end of hourly history columns
+    '''
+    rows = slice(start, end)
+    times = hourly['time'][rows].tolist()
+    end_times = hourly['end_time'][rows].tolist()
+    opens = hourly['open'][rows].tolist()
+    highs = hourly['high'][rows].tolist()
+    lows = hourly['low'][rows].tolist()
+    closes = hourly['close'][rows].tolist()
+    volumes = hourly['volume'][rows].tolist()
+    return [TradeBar(times[i], symbol, opens[i], highs[i], lows[i], closes[i], volumes[i], end_times[i] - times[i])
+            for i in range(len(times))]
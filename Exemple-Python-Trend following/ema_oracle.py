@@ -0,0 +1,35 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+from collections import deque
+
+
+class EmaRegime:
+    '''
+    EMA50 / EMA200 regime of one symbol over the last size samples:
+    ema_trend is the number of samples with the EMA50 above the EMA200, derivative the latest
+    slope of the EMA50 (last value of np.gradient over the window, divided by the current EMA50).
+    Both are updated in O(1) per sample.
+    '''
+
+    def __init__(self, size):
+        self.size = size
+        self.above = deque(maxlen=size)
+        self.ema_trend = 0
+        self.ema50 = None
+        self.previous_ema50 = None
+
+    def update(self, ema50, ema200):
+        if len(self.above) == self.size:
+            self.ema_trend -= self.above[0]
+        above = ema50 > ema200
+        self.above.append(above)
+        self.ema_trend += above
+        self.previous_ema50 = self.ema50
+        self.ema50 = ema50
+
+    @property
+    def derivative(self):
+        if self.previous_ema50 is None:
+            return float('nan')
+        return (self.ema50 - self.previous_ema50) / self.ema50
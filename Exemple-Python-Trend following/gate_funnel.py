@@ -0,0 +1,44 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+from datetime import timedelta
+import numpy as np
+
+
+class GateFunnel:
+    '''
+    Number of symbols reaching each stage of the entry gates, summed over interval and
+    flushed as one log line (and optionally one chart series per stage) instead of
+    one line per rejection reason per bar.
+    '''
+
+    def __init__(self, stages, interval=timedelta(days=1), plot=False):
+        self.stages = tuple(stages)
+        self.index = {stage: i for i, stage in enumerate(self.stages)}
+        self.interval = interval
+        self.plot = plot
+        self.counts = np.zeros(len(self.stages), dtype=np.int64)
+        self.bars = 0
+        self.start = None
+
+    def record(self, stage, count):
+        self.counts[self.index[stage]] += count
+
+    def end_bar(self, algo):
+        if self.start is None:
+            self.start = algo.Time
+        self.bars += 1
+        if algo.Time - self.start >= self.interval:
+            self.flush(algo)
+
+    def flush(self, algo):
+        if self.bars == 0:
+            return
+        counts = ", ".join(f"{stage}={count}" for stage, count in zip(self.stages, self.counts.tolist()))
+        algo.Log(f"gate funnel {self.start} to {algo.Time} ({self.bars} bars): {counts}")
+        if self.plot:
+            for stage, count in zip(self.stages, self.counts.tolist()):
+                algo.Plot("gate funnel", stage, count / self.bars)
+        self.counts[:] = 0
+        self.bars = 0
+        self.start = None
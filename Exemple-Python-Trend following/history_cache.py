@@ -0,0 +1,144 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import os
+import numpy as np
+
+
+class HistoryCache:
+    '''
+    Columnar cache of TradeBar history, one .npz file per (symbol, resolution) in the ObjectStore folder.
+    Each file holds a contiguous range of the last bars requested: a warm-up that overlaps it only requests
+    the bars from its last one on, and all the symbols of a warm-up share one History call per resolution.
+    The history is adjusted for splits and dividends: when the last cached bar comes back with other prices,
+    the cached range is on an old price scale and the symbol is requested again in full.
+    '''
+
+    columns = ('time', 'end_time', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, algo, folder='history_cache'):
+        self.algo = algo
+        self.folder = folder
+        self.frames = {}
+
+    def history(self, symbols, count, resolution):
+        '''
+        Last count bars (ending at algo.Time) of every symbol, as {symbol: [TradeBar]}
+        '''
+        return {symbol: self._trade_bars(symbol, frame, start, end) if frame is not None else []
+                for symbol, (frame, start, end) in self._ranges(symbols, count, resolution).items()}
+
+    def history_columns(self, symbols, count, resolution):
+        '''
+        Same bars as history, as {symbol: {column: array}} (views of the cache, empty arrays without history)
+        '''
+        result = {}
+        for symbol, (frame, start, end) in self._ranges(symbols, count, resolution).items():
+            if frame is None:
+                result[symbol] = {name: np.zeros(0, dtype='datetime64[us]' if 'time' in name else float) for name in self.columns}
+            else:
+                result[symbol] = {name: frame[name][start:end] for name in self.columns}
+        return result
+
+    def _ranges(self, symbols, count, resolution):
+        # fetches what is missing, returns {symbol: (frame, start, end)} of the last count bars
+        now = np.datetime64(self.algo.Time, 'us')
+        full = []
+        since = {}
+        for symbol in symbols:
+            frame = self._load(symbol, resolution)
+            if frame is None or np.count_nonzero(frame['end_time'] <= now) < count:
+                full.append(symbol)
+            elif frame['end_time'][-1] < now:
+                # from the start of the last cached bar, so that it is fetched again and can be compared
+                since[symbol] = frame['time'][-1]
+
+        if since:
+            start = min(since.values()).item()
+            fetched = self._columns(self.algo.History[TradeBar](list(since), start, self.algo.Time, resolution))
+            for symbol in since:
+                if self._same_scale(self.frames[(symbol, resolution)], fetched.get(symbol)):
+                    self._store(symbol, resolution, fetched.get(symbol), count, extend=True)
+                else:
+                    full.append(symbol)
+        if full:
+            fetched = self._columns(self.algo.History[TradeBar](full, count, resolution))
+            for symbol in full:
+                self._store(symbol, resolution, fetched.get(symbol), count, extend=False)
+
+        ranges = {}
+        for symbol in symbols:
+            frame = self.frames.get((symbol, resolution))
+            if frame is None:
+                ranges[symbol] = (None, 0, 0)
+                continue
+            end = np.searchsorted(frame['end_time'], now, side='right')
+            ranges[symbol] = (frame, max(0, end - count), end)
+        return ranges
+
+    def _columns(self, history):
+        # History[TradeBar] of several symbols yields one dictionary of bars per time step
+        rows = {}
+        for bars in history:
+            for bar in bars.Values:
+                rows.setdefault(bar.Symbol, []).append((bar.Time, bar.EndTime, bar.Open, bar.High, bar.Low, bar.Close, bar.Volume))
+        frames = {}
+        for symbol, symbol_rows in rows.items():
+            time, end_time, open_, high, low, close, volume = zip(*symbol_rows)
+            frames[symbol] = {
+                'time': np.array(time, dtype='datetime64[us]'),
+                'end_time': np.array(end_time, dtype='datetime64[us]'),
+                'open': np.array(open_, dtype=float),
+                'high': np.array(high, dtype=float),
+                'low': np.array(low, dtype=float),
+                'close': np.array(close, dtype=float),
+                'volume': np.array(volume, dtype=float),
+            }
+        return frames
+
+    def _trade_bars(self, symbol, frame, start, end):
+        times = frame['time'][start:end].tolist()
+        end_times = frame['end_time'][start:end].tolist()
+        opens = frame['open'][start:end].tolist()
+        highs = frame['high'][start:end].tolist()
+        lows = frame['low'][start:end].tolist()
+        closes = frame['close'][start:end].tolist()
+        volumes = frame['volume'][start:end].tolist()
+        return [TradeBar(times[i], symbol, opens[i], highs[i], lows[i], closes[i], volumes[i], end_times[i] - times[i])
+                for i in range(len(times))]
+
+    def _path(self, symbol, resolution):
+        key = f"{self.folder}/{str(symbol.ID).replace(' ', '_')}_{resolution}.npz"
+        return self.algo.ObjectStore.GetFilePath(key)
+
+    def _load(self, symbol, resolution):
+        if (symbol, resolution) not in self.frames:
+            path = self._path(symbol, resolution)
+            if os.path.exists(path):
+                with np.load(path) as stored:
+                    self.frames[(symbol, resolution)] = {name: stored[name] for name in self.columns}
+        return self.frames.get((symbol, resolution))
+
+    def _same_scale(self, frame, fetched):
+        # the last cached bar, fetched again, has the same prices: no split or dividend since it was stored
+        if fetched is None:
+            return True
+        last = np.flatnonzero(fetched['end_time'] == frame['end_time'][-1])
+        if len(last) == 0:
+            return False
+        return all(np.isclose(fetched[name][last[0]], frame[name][-1], rtol=1e-6, atol=0)
+                   for name in ('open', 'high', 'low', 'close'))
+
+    def _store(self, symbol, resolution, fetched, count, extend):
+        if fetched is None:
+            return
+        frame = self.frames.get((symbol, resolution))
+        # a full request replaces the cached range, so that it stays contiguous
+        if extend and frame is not None:
+            fetched = {name: np.concatenate([fetched[name], frame[name]]) for name in self.columns}
+        # keep one bar per end time (the newly fetched one), sorted, and only the last count bars
+        _, keep = np.unique(fetched['end_time'], return_index=True)
+        keep = keep[-count:]
+        frame = {name: fetched[name][keep] for name in self.columns}
+        self.frames[(symbol, resolution)] = frame
+        np.savez(self._path(symbol, resolution), **frame)
@@ -3,34 +3,143 @@ from AlgorithmImports import *
 from tqdm import tqdm
 import pandas as pd
 #endregion
+from collections import deque
+
+from ring_buffer import RingBuffer
 
 def get_macd_score(macd_rolling, trend, macd_params):
     # last 35 macd histogram data points
-    hists = [x.hist for x in macd_rolling][:macd_params['cross_check_length']]
-    macds = [x.macd for x in macd_rolling][:macd_params['macd_above_below_length']]
+    hists = macd_rolling.view('hist')[:macd_params['cross_check_length']]
+    macds = macd_rolling.view('macd')[:macd_params['macd_above_below_length']]
 
     # detect a recent cross above or below 0
     cross = 0
     current = hists[0]
     if current >= 0:
-        if any(x < 0 for x in hists):
+        if (hists < 0).any():
             cross = 1
     elif current <= 0:
-        if any(x > 0 for x in hists):
+        if (hists > 0).any():
             cross = -1
     
     score = 0
     if trend > 0:
-        if all(x > macd_params['long_macd_threshold'] for x in macds) and macds[0] > macd_params['long_macd_threshold']:
+        if (macds > macd_params['long_macd_threshold']).all() and macds[0] > macd_params['long_macd_threshold']:
             #if cross == 1:
             score = 1
     elif trend < 0:
-        if all(x > macd_params['short_macd_threshold'] for x in macds) and macds[0] > macd_params['short_macd_threshold']:
+        if (macds > macd_params['short_macd_threshold']).all() and macds[0] > macd_params['short_macd_threshold']:
             #if cross == -1:
             score = 2
     
     return score
 
 
+class MacdScorer(RingBuffer):
+    '''
+    Macd window that streams the inputs of get_macd_score: the number of negative and positive
+    histogram values over the first cross_check_length bars of the window, and the minimum macd
+    over the first macd_above_below_length bars (monotonic deque), so score and cross are O(1).
+    '''
+
+    def __init__(self, capacity, macd_params):
+        super().__init__(capacity, ('fast', 'slow', 'signal', 'macd', 'hist'))
+        self.cross_check_length = macd_params['cross_check_length']
+        self.macd_above_below_length = macd_params['macd_above_below_length']
+        self._reset_counters()
+
+    def _reset_counters(self):
+        # absolute index of the next bar, bar i is stored at i % capacity
+        self.appended = 0
+        self.negative_hists = 0
+        self.positive_hists = 0
+        self.nan_macds = 0
+        # (index, macd) with increasing macd, the front is the minimum
+        self.macd_minimum = deque()
+
+    def clear(self):
+        super().clear()
+        self._reset_counters()
+
+    def append(self, fast, slow, signal, macd, hist):
+        new = self.appended
+        old_start = new - self.count
+        start = old_start
+        if self.count == self.capacity:
+            # the oldest bar leaves the window, and both tracked ranges
+            self._remove_hist(self.data[4, self.head])
+            self._remove_macd(start, self.data[3, self.head])
+            start += 1
+        super().append(fast, slow, signal, macd, hist)
+        self.appended = new + 1
+
+        # the tracked ranges are the first bars of the window: at most one bar joins each of them
+        hist_end = min(start + self.cross_check_length, new + 1)
+        if hist_end > min(old_start + self.cross_check_length, new):
+            self._add_hist(self._value(4, hist_end - 1))
+        macd_end = min(start + self.macd_above_below_length, new + 1)
+        if macd_end > min(old_start + self.macd_above_below_length, new):
+            self._add_macd(macd_end - 1, self._value(3, macd_end - 1))
+
+    def _value(self, field, index):
+        return float(self.data[field, index % self.capacity])
+
+    def _add_hist(self, hist):
+        if hist < 0:
+            self.negative_hists += 1
+        elif hist > 0:
+            self.positive_hists += 1
+
+    def _remove_hist(self, hist):
+        if hist < 0:
+            self.negative_hists -= 1
+        elif hist > 0:
+            self.positive_hists -= 1
+
+    def _add_macd(self, index, macd):
+        if macd != macd:
+            self.nan_macds += 1
+            return
+        while self.macd_minimum and self.macd_minimum[-1][1] >= macd:
+            self.macd_minimum.pop()
+        self.macd_minimum.append((index, macd))
+
+    def _remove_macd(self, index, macd):
+        if macd != macd:
+            self.nan_macds -= 1
+        elif self.macd_minimum and self.macd_minimum[0][0] == index:
+            self.macd_minimum.popleft()
+
+    def _macds_above(self, threshold):
+        # all(x > threshold for x in macds)
+        return self.nan_macds == 0 and (not self.macd_minimum or self.macd_minimum[0][1] > threshold)
+
+    def cross(self):
+        '''
+        Same cross flag as get_macd_score: 1 / -1 when the histogram crossed above / below 0
+        '''
+        current = self.data[4, (self.appended - self.count) % self.capacity]
+        if current >= 0:
+            if self.negative_hists > 0:
+                return 1
+        elif current <= 0:
+            if self.positive_hists > 0:
+                return -1
+        return 0
 
+    def score(self, trend, macd_params):
+        '''
+        Same score as get_macd_score on this window
+        '''
+        if (macd_params['cross_check_length'] != self.cross_check_length
+                or macd_params['macd_above_below_length'] != self.macd_above_below_length):
+            return get_macd_score(self, trend, macd_params)
 
+        score = 0
+        if trend > 0:
+            if self._macds_above(macd_params['long_macd_threshold']):
+                score = 1
+        elif trend < 0:
+            if self._macds_above(macd_params['short_macd_threshold']):
+                score = 2
+        return score
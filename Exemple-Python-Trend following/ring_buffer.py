@@ -0,0 +1,44 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import numpy as np
+
+
+class RingBuffer:
+    '''
+    Fixed size window of rows of floats (e.g. lower, middle, upper, price of the bollinger bands).
+    Each field is one preallocated float64 array written twice (at head and head + capacity),
+    so the ordered window is always a contiguous slice and can be returned without copying.
+    '''
+
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.fields = {name: i for i, name in enumerate(fields)}
+        self.data = np.zeros((len(fields), 2 * capacity))
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, *values):
+        head = self.head
+        self.data[:, head] = values
+        self.data[:, head + self.capacity] = values
+        self.head = (head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def view(self, field):
+        '''
+        Values of field, oldest first (a view: it follows the next appends)
+        '''
+        start = (self.head - self.count) % self.capacity
+        return self.data[self.fields[field], start:start + self.count]
+
+    def newest_first(self, field):
+        return self.view(field)[::-1]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
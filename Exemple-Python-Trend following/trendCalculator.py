@@ -4,7 +4,6 @@ from AlgorithmImports import *
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
-from scipy.signal import argrelextrema
 from collections import deque
 from matplotlib.lines import Line2D
 from datetime import timedelta
@@ -13,160 +12,239 @@ from datetime import timedelta
     Much of this code is sourced at the following link: https://raposa.trade/blog/higher-highs-lower-lows-and-calculating-price-trends-in-python/
 '''
 
-def getHigherLows(data: np.array, order, K):
-  '''
-  Finds consecutive higher lows in price pattern.
-  Must not be exceeded within the number of periods indicated by the width 
-  parameter for the value to be confirmed.
-  K determines how many consecutive lows need to be higher.
-  '''
-  # Get lows
-  low_idx = argrelextrema(data, np.less, order=order)[0]
-  lows = data[low_idx]
-  # Ensure consecutive lows are higher than previous lows
-  extrema = []
-  ex_deque = deque(maxlen=K)
-  for i, idx in enumerate(low_idx):
-    if i == 0:
-      ex_deque.append(idx)
-      continue
-    if lows[i] < lows[i-1]:
-      ex_deque.clear()
-
-    ex_deque.append(idx)
-    if len(ex_deque) == K:
-      extrema.append(ex_deque.copy())
-
-  return extrema
-
-def getLowerHighs(data: np.array, order=5, K=2):
-  '''
-  Finds consecutive lower highs in price pattern.
-  Must not be exceeded within the number of periods indicated by the width 
-  parameter for the value to be confirmed.
-  K determines how many consecutive highs need to be lower.
-  '''
-  # Get highs
-  high_idx = argrelextrema(data, np.greater, order=order)[0]
-  highs = data[high_idx]
-  # Ensure consecutive highs are lower than previous highs
-  extrema = []
-  ex_deque = deque(maxlen=K)
-  for i, idx in enumerate(high_idx):
-    if i == 0:
-      ex_deque.append(idx)
-      continue
-    if highs[i] > highs[i-1]:
-      ex_deque.clear()
-
-    ex_deque.append(idx)
-    if len(ex_deque) == K:
-      extrema.append(ex_deque.copy())
-
-  return extrema
-
-def getHigherHighs(data: np.array, order, K):
-  '''
-  Finds consecutive higher highs in price pattern.
-  Must not be exceeded within the number of periods indicated by the width 
-  parameter for the value to be confirmed.
-  K determines how many consecutive highs need to be higher.
-  '''
-  # Get highs
-  high_idx = argrelextrema(data, np.greater, order = order)[0]
-  highs = data[high_idx]
-  # Ensure consecutive highs are higher than previous highs
-  extrema = []
-  ex_deque = deque(maxlen=K)
-  for i, idx in enumerate(high_idx):
-    if i == 0:
-      ex_deque.append(idx)
-      continue
-    if highs[i] < highs[i-1]:
-      ex_deque.clear()
-
-    ex_deque.append(idx)
-    if len(ex_deque) == K:
-      extrema.append(ex_deque.copy())
-
-  return extrema
-
-def getLowerLows(data: np.array, order, K):
-  '''
-  Finds consecutive lower lows in price pattern.
-  Must not be exceeded within the number of periods indicated by the width 
-  parameter for the value to be confirmed.
-  K determines how many consecutive lows need to be lower.
-  '''
-  # Get lows
-  low_idx = argrelextrema(data, np.less, order=order)[0]
-  lows = data[low_idx]
-  # Ensure consecutive lows are lower than previous lows
-  extrema = []
-  ex_deque = deque(maxlen=K)
-  for i, idx in enumerate(low_idx):
-    if i == 0:
-      ex_deque.append(idx)
-      continue
-    if lows[i] > lows[i-1]:
-      ex_deque.clear()
-
-    ex_deque.append(idx)
-    if len(ex_deque) == K:
-      extrema.append(ex_deque.copy())
-
-  return extrema
-
 def get_trend(close_data, order, K):
     '''
-    Get the trend of the stock
+    Get the trend of the stock (close_data most recent first)
     '''
+    close = np.array([x for x in close_data], dtype=float)[::-1]
+    return trend_kernel(close, order, K)
 
-    close_data = [x for x in close_data]
-    close_data.reverse()
-
-    # data set to dataframe empty
-    data = pd.DataFrame()
-    data['Close'] = close_data
-    close = data['Close'].values
-
-    hh = getHigherHighs(close, order, K)
-    hl = getHigherLows(close, order, K)
-    ll = getLowerLows(close, order, K)
-    lh = getLowerHighs(close, order, K)
-
-
-    # format for tuples inside patterns: [type, location first price, location second price, first price, second price]
-    patterns = []
-    for pattern in hh:
-    # append a tuple with date and "hh"
-        patterns.append(('hh', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
-    for pattern in hl:
-        patterns.append(('hl', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
-    for pattern in ll:
-        patterns.append(('ll', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
-    for pattern in lh:
-        patterns.append(('lh', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
-
-    # sort by the second date
-    patterns.sort(key=lambda x: x[2], reverse=True)
-
-    trend = 0
-
-    total_movements = patterns
-    total_swing_up = 0
-    total_swing_down = 0
-    for x in total_movements:
-        if x[0] == 'hh' or x[0] == 'hl':
-            total_swing_up += (x[4] - x[3])
-        else:
-            total_swing_down += (x[4] - x[3])
-    
-    total_swing = total_swing_up + total_swing_down
-
-    return total_swing
-                           
-
-
+def extrema_masks(data, order):
+    '''
+    Local highs and lows of data along its last axis, the points of argrelextrema(data, np.greater / np.less, order=order):
+    strictly above (below) every other point within order of them, first and last points excluded
+    '''
+    highs = np.ones(data.shape, dtype=bool)
+    lows = np.ones(data.shape, dtype=bool)
+    for shift in range(1, order + 1):
+        left, right = data[..., :-shift], data[..., shift:]
+        highs[..., :-shift] &= left > right
+        highs[..., shift:] &= right > left
+        lows[..., :-shift] &= left < right
+        lows[..., shift:] &= right < left
+    highs[..., 0] = highs[..., -1] = False
+    lows[..., 0] = lows[..., -1] = False
+    return highs, lows
+
+def _run_swings(positions, values, K, rising):
+    # patterns of K consecutive rising (falling) extrema: (position of the second point, swing of the first two points)
+    n = len(values)
+    if n < K:
+        return positions[:0], values[:0]
+    breaks = np.empty(n, dtype=bool)
+    breaks[0] = True
+    breaks[1:] = values[1:] < values[:-1] if rising else values[1:] > values[:-1]
+    index = np.arange(n)
+    run_start = np.maximum.accumulate(np.where(breaks, index, 0))
+    last = np.flatnonzero(index - run_start + 1 >= K)
+    first = last - K + 1
+    return positions[first + 1], values[first + 1] - values[first]
+
+def swing_sum(high_positions, high_values, low_positions, low_values, K):
+    '''
+    Sum of the swings of the hh, hl, ll and lh patterns of the extrema (positions increasing), computed without
+    building them: each side is added most recent first, so the result is the same to the last bit
+    '''
+    total = 0
+    for side in (((high_positions, high_values, True), (low_positions, low_values, True)),
+                 ((low_positions, low_values, False), (high_positions, high_values, False))):
+        swings = [_run_swings(positions, values, K, rising) for positions, values, rising in side]
+        positions = np.concatenate([p for p, _ in swings])
+        if len(positions):
+            values = np.concatenate([v for _, v in swings])
+            total = total + np.cumsum(values[np.argsort(-positions)])[-1]
+    return total
+
+def _swing_sums_2d(data, highs, lows, K):
+    # one row per window: the swings are written at the position of their second point, zero elsewhere,
+    # and each row is added from the most recent position back
+    rows, n = data.shape
+    row_index = np.arange(rows)[:, None]
+    columns = np.broadcast_to(np.arange(n), data.shape)
+    total = np.zeros(rows)
+    for side in (((highs, True), (lows, True)), ((lows, False), (highs, False))):
+        swings = np.zeros(data.shape)
+        for mask, rising in side:
+            last = np.maximum.accumulate(np.where(mask, columns, -1), axis=1)
+            previous = np.full(data.shape, -1)
+            previous[:, 1:] = last[:, :-1]
+            previous_value = data[row_index, np.maximum(previous, 0)]
+            breaks = mask & ((previous < 0) | ((data < previous_value) if rising else (data > previous_value)))
+            count = np.cumsum(mask, axis=1)
+            run_start = np.maximum.accumulate(np.where(breaks, count, 0), axis=1)
+            emit = mask & (count - run_start + 1 >= K)
+            # positions of the first two points of the last K extrema
+            second = columns
+            for _ in range(K - 2):
+                second = previous[row_index, second]
+            first = previous[row_index, second]
+            r, c = np.nonzero(emit)
+            swings[r, second[r, c]] = data[r, second[r, c]] - data[r, first[r, c]]
+        total = total + np.cumsum(swings[:, ::-1], axis=1)[:, -1]
+    return total
+
+def trend_kernel(data, order, K):
+    '''
+    get_trend of data (oldest first) in one pass: extrema by sliding comparisons, runs of K consecutive
+    extrema by vectorized diffs, then the swing sum. A 2-D data gives the trend of each row.
+    '''
+    data = np.asarray(data, dtype=float)
+    highs, lows = extrema_masks(data, order)
+    if data.ndim == 1:
+        high_positions = np.flatnonzero(highs)
+        low_positions = np.flatnonzero(lows)
+        return swing_sum(high_positions, data[high_positions], low_positions, data[low_positions], K)
+    return _swing_sums_2d(data, highs, lows, K)
+
+def rolling_trend(values, size, order, K):
+    '''
+    Trend of every window of size values (oldest first), the values of a TrendTracker fed with values once it is full
+    '''
+    windows = np.lib.stride_tricks.sliding_window_view(np.asarray(values, dtype=float), size)
+    return trend_kernel(windows, order, K)
 
+class TrendTracker:
+    '''
+    Incremental version of get_trend for a rolling window that is fed one value at a time.
+    For every point of the window we keep how many neighbours (within order) prevent it from
+    being a local high/low, so a new bar only touches the order points around each edge of the
+    window. The swings are summed again only when the highs or lows change, and give exactly
+    get_trend(window, order, K).
+    '''
 
+    def __init__(self, size, order, K):
+        self.size = size
+        self.order = order
+        self.K = K
+        self.count = 0
+        self.values = [0.0] * size
+        self.hi_blockers = [0] * size
+        self.lo_blockers = [0] * size
+        # absolute indexes of the confirmed highs and lows, oldest first
+        self.highs = deque()
+        self.lows = deque()
+        self.trend = 0
+        self.changed = False
+
+    def update(self, value):
+        value = float(value)
+        size = self.size
+        order = self.order
+        values = self.values
+        hi_blockers = self.hi_blockers
+        lo_blockers = self.lo_blockers
+        t = self.count
+
+        # oldest value leaves the window: its newer neighbours lose a blocker
+        dropped = t >= size
+        if dropped:
+            old = t - size
+            old_value = values[old % size]
+            for a in range(old + 1, min(old + order, t - 1) + 1):
+                v = values[a % size]
+                if not v > old_value:
+                    hi_blockers[a % size] -= 1
+                if not v < old_value:
+                    lo_blockers[a % size] -= 1
+
+        # new value enters the window
+        start = max(0, t + 1 - size)
+        hi = lo = 0
+        for a in range(max(start, t - order), t):
+            v = values[a % size]
+            if not value > v:
+                hi += 1
+            if not value < v:
+                lo += 1
+            if not v > value:
+                hi_blockers[a % size] += 1
+            if not v < value:
+                lo_blockers[a % size] += 1
+        values[t % size] = value
+        hi_blockers[t % size] = hi
+        lo_blockers[t % size] = lo
+        self.count = t + 1
+
+        # only the points within order of an edge can have changed
+        if t - start < 2 * order + 2:
+            self.changed |= self._rebuild(self.highs, hi_blockers, start, t)
+            self.changed |= self._rebuild(self.lows, lo_blockers, start, t)
+            return
+        self.changed |= self._refresh_right(self.highs, hi_blockers, t - order, t)
+        self.changed |= self._refresh_right(self.lows, lo_blockers, t - order, t)
+        if dropped:
+            self.changed |= self._refresh_left(self.highs, hi_blockers, start, start + order)
+            self.changed |= self._refresh_left(self.lows, lo_blockers, start, start + order)
+
+    def _rebuild(self, extrema, blockers, start, end):
+        new = [a for a in range(start + 1, end) if blockers[a % self.size] == 0]
+        if new == list(extrema):
+            return False
+        extrema.clear()
+        extrema.extend(new)
+        return True
+
+    def _refresh_right(self, extrema, blockers, first, end):
+        removed = []
+        while extrema and extrema[-1] >= first:
+            removed.append(extrema.pop())
+        added = [a for a in range(end - 1, first - 1, -1) if blockers[a % self.size] == 0]
+        extrema.extend(reversed(added))
+        return removed != added
+
+    def _refresh_left(self, extrema, blockers, start, last):
+        removed = []
+        while extrema and extrema[0] <= last:
+            removed.append(extrema.popleft())
+        added = [a for a in range(start + 1, last + 1) if blockers[a % self.size] == 0]
+        extrema.extendleft(reversed(added))
+        return removed != added
+
+    def _swings(self, extrema):
+        '''
+        Runs of K consecutive rising and falling extrema in one pass (the hh/hl and lh/ll patterns),
+        as (position of the second point, swing of the first two points)
+        '''
+        size = self.size
+        K = self.K
+        values = self.values
+        positions = list(extrema)
+        points = [values[idx % size] for idx in positions]
+        rising = []
+        falling = []
+        up_run = down_run = 0
+        previous = None
+        for j, current in enumerate(points):
+            up_run = 1 if previous is None or current < previous else up_run + 1
+            down_run = 1 if previous is None or current > previous else down_run + 1
+            previous = current
+            if up_run >= K:
+                first = j - K + 1
+                rising.append((positions[first + 1], points[first + 1] - points[first]))
+            if down_run >= K:
+                first = j - K + 1
+                falling.append((positions[first + 1], points[first + 1] - points[first]))
+        return rising, falling
+
+    def get_trend(self):
+        '''
+        Same value as get_trend on the current window: each side is added most recent first like swing_sum
+        '''
+        if self.changed:
+            hh, lh = self._swings(self.highs)
+            hl, ll = self._swings(self.lows)
+            total_swing_up = sum(swing for _, swing in sorted(hh + hl, reverse=True))
+            total_swing_down = sum(swing for _, swing in sorted(ll + lh, reverse=True))
+            self.trend = total_swing_up + total_swing_down
+            self.changed = False
+        return self.trend
@@ -0,0 +1,51 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import numpy as np
+
+
+def top_k(values, k):
+    '''
+    Indices of the k largest values, largest first, ties in their original order
+    (same as sorted(..., reverse=True)[:k] but without sorting everything)
+    '''
+    n = len(values)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        kth = np.partition(values, n - k)[n - k]
+        above = np.flatnonzero(values > kth)
+        ties = np.flatnonzero(values == kth)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(n)
+    # stable sort of the candidates only
+    return candidates[np.argsort(-values[candidates], kind='stable')]
+
+
+class TopKSelection:
+    '''
+    Coarse/fine selection by dollar volume: the price and market cap filters are applied
+    before ranking, and only the top k are ranked.
+    '''
+
+    def __init__(self, coarse_size=1000, final_size=600, min_price=10, min_market_cap=2000000000):
+        self.coarse_size = coarse_size
+        self.final_size = final_size
+        self.min_price = min_price
+        self.min_market_cap = min_market_cap
+
+    def coarse(self, coarse):
+        coarse = [x for x in coarse if x.HasFundamentalData]
+        dollar_volumes = np.fromiter((x.DollarVolume for x in coarse), dtype=float, count=len(coarse))
+        return [coarse[i].Symbol for i in top_k(dollar_volumes, self.coarse_size)]
+
+    def fine(self, fine):
+        fine = list(fine)
+        n = len(fine)
+        prices = np.fromiter((x.price for x in fine), dtype=float, count=n)
+        market_caps = np.fromiter((x.MarketCap for x in fine), dtype=float, count=n)
+        passed = np.flatnonzero((prices > self.min_price) & (market_caps > self.min_market_cap))
+        symbols = [fine[i].Symbol for i in passed]
+        dollar_volumes = np.fromiter((fine[i].DollarVolume for i in passed), dtype=float, count=len(passed))
+        return [symbols[i] for i in top_k(dollar_volumes, self.final_size)]
@@ -1,5 +1,6 @@
 #region imports
 from AlgorithmImports import *
+from corporate_actions import PriceWindow, price_adjustment_factor
 #endregion
 class DualMomentumAlphaModel(AlphaModel):
 
@@ -15,15 +16,11 @@ class DualMomentumAlphaModel(AlphaModel):
         for symbol in set(data.splits.keys() + data.dividends.keys()):
             security = algorithm.securities[symbol]
             if security in self.securities_list:
-                security.indicator.reset()
-                algorithm.subscription_manager.remove_consolidator(security.symbol, security.consolidator)
-                self._register_indicator(algorithm, security)
-
-                history = algorithm.history[TradeBar](security.symbol, 7,
-                                                      Resolution.DAILY,
-                                                      data_normalization_mode=DataNormalizationMode.SCALED_RAW)
-                for bar in history:
-                    security.consolidator.update(bar)
+                # the weekly consolidator is kept, only the momentum inputs are rescaled
+                factor = price_adjustment_factor(data, symbol, security.data_normalization_mode)
+                if factor != 1:
+                    security.prices.rescale(factor)
+                    security.prices.replay(security.indicator)
 
         if data.quote_bars.count == 0:
             return []
@@ -73,6 +70,7 @@ class DualMomentumAlphaModel(AlphaModel):
             sector = security.Fundamentals.AssetClassification.MorningstarSectorCode
             security_by_symbol[security.symbol] = security
             security.indicator = MomentumPercent(1)
+            security.prices = PriceWindow(security.indicator.warm_up_period)
             self._register_indicator(algorithm, security)
             self.securities_list.append(security)
 
@@ -93,5 +91,6 @@ class DualMomentumAlphaModel(AlphaModel):
         security.consolidator = TradeBarConsolidator(Calendar.WEEKLY)
         algorithm.subscription_manager.add_consolidator(security.symbol, security.consolidator)
         algorithm.register_indicator(security.symbol, security.indicator, security.consolidator)
+        security.consolidator.data_consolidated += lambda _, bar: security.prices.record(bar.end_time, bar.close)
 
 
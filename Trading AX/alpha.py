@@ -3,33 +3,26 @@ from datetime import timedelta
 from collections import deque
 import numpy as np
 
-from trendCalculator import get_trend
+from trendCalculator import TrendTracker
 
-from macd_oracle import get_macd_score
-from bollinger_oracle import get_bollinger_buy_and_short
+from macd_oracle import MacdScorer
+from bollinger_oracle import BollingerScorer
 from rsi_oracle import get_rsi_buy_short
+from daily_indicators import DailyIndicators, hourly_bars
+from history_cache import HistoryCache
+from checkpoint import save_checkpoint, load_checkpoint
+from gate_funnel import GateFunnel
+from entry_scheduler import EntryScheduler
+from trailing_stop import TrailingStops
+from signal_batch import SignalBatch
+from plot_sink import PlotSink
 
 class custom_alpha(AlphaModel):
-    # contain bollinger band information
-    class bollinger_holder:
-        def __init__(self, lower, middle, upper, price):
-            self.lower = lower
-            self.middle = middle
-            self.upper = upper
-            self.price = price
-    
-    # contain macd information
-    class macd_holder:
-        def __init__(self, fast, slow, signal, macd, hist):
-            self.fast = fast
-            self.slow = slow
-            self.signal = signal
-            self.macd = macd
-            self.hist = hist
-
-    def __init__(self, algo):
+    def __init__(self, algo, params=None):
         self.algo = self
         self.plotting = False
+        # diagnostics of the first symbol only, a few points per series and per day
+        self.plot_sink = PlotSink(algo, max_symbols=1, points_per_flush=8)
        
 
         # MACD Parameters
@@ -40,15 +33,16 @@ class custom_alpha(AlphaModel):
         # Bollinger Band Parameters
         self.Bollinger_window_size = 140
         self.long_threshold = 1
-        self.bollinger_params = {'long_threshold': self.long_threshold, 'short_threshold': self.long_threshold}
 
         # EMA parameters
         self.ema_rolling_window_length = 250
+        self.ema_trend_threshold = 210
         self.derivative_threshold = .005
 
         # RSI Parameters
         self.price_rolling_window_length = 90 
         self.RSIS_rolling_window_length = 90 
+        self.hourly_bars_per_day = 7
 
         # ADX parameters
         self.adx_rolling_window_length = 35
@@ -73,41 +67,56 @@ class custom_alpha(AlphaModel):
         self.obv_K_order = 2
         
         # Portfolio Management Parameters
-        self.look_for_entries = {}
-        self.entry_scores = {}
-        self.hold_length = {}
+        self.look_for_entries = EntryScheduler(max_wait=70)
         self.max_position_size = .15
         self.activeStocks = set()
         self.insight_expiry = 14
         self.insight_expiry_sell = 6
         self.port_bias = 1000
+
+        # Checkpoint parameters
+        self.checkpoint_key = "custom_alpha/checkpoint"
+        self.checkpoint_path = None # local file to use instead of the ObjectStore
+        self.checkpoint_every = timedelta(days=1)
+        self.last_checkpoint = None
+
+        # overrides of the parameters above by name, 'macd_params.long_macd_threshold' for a key of a dict parameter
+        for name, value in (params or {}).items():
+            if '.' in name:
+                name, key = name.split('.', 1)
+                setattr(self, name, dict(getattr(self, name), **{key: value}))
+            else:
+                setattr(self, name, value)
+        self.bollinger_params = {'long_threshold': self.long_threshold, 'short_threshold': self.long_threshold}
         
         # Indicators
         self.trend_rolling_windows = {}
+        self.price_trends = {}
+        self.rsi_trends = {}
+        self.obv_trends = {}
         self.MACDS = {}
-        self.macd_consolidators = {}
         self.MACDS_rolling_windows = {}
         self.Bollingers = {}
-        self.bollinger_consolidators = {}
         self.Bollingers_rolling_windows = {}
         self.RSIS = {}
         self.RSIS_trend = {}
         self.RSIS_rolling_windows = {}
-        self.rsi_consolidators = {}
         self.EMAS = {}
-        self.EMAS_rolling_windows = {}
-        self.ema_consolidators = {}
         self.EMAS50 = {}
-        self.EMAS50_rolling_windows = {}
-        self.ema50_consolidators = {}
+        self.ema_regimes = {}
         self.ADX = {}
-        self.adx_consolidators = {}
         self.adx_rolling = {}
         self.obvs = {}
         self.obvs_rolling = {}
+        self.obv_offsets = {}
         self.ATRS = {}
-        self.atr_consolidators = {}
-        self.peak_prices = {}
+        self.daily_indicators = {}
+        self.history_cache = HistoryCache(algo)
+        self.trailing_stops = TrailingStops(self.atr_stop_multiplier)
+        self.signals = SignalBatch(self.ema_trend_threshold, self.derivative_threshold, self.adx_threshold,
+                                   self.obv_threshold, self.port_bias)
+        # symbols reaching each entry gate, logged once per interval
+        self.funnel = GateFunnel(('active', 'data', 'macd ready') + SignalBatch.long_stages, interval=timedelta(days=1))
 
         self.universe_type = "equity"
         if self.universe_type != "equity":
@@ -116,9 +125,15 @@ class custom_alpha(AlphaModel):
         self.symbols_invested_in_last_iteration = set()
         self.symbols_invested_in_last_iteration.add(algo.AddEquity("TYL", Resolution.Hour).Symbol)
 
+        # state saved by a previous run, restored symbol by symbol when they are added
+        self.checkpoint = load_checkpoint(algo, self.checkpoint_key, self.checkpoint_path)
+        if self.checkpoint is not None and self.checkpoint['params'] != self.checkpoint_params():
+            algo.Log("Checkpoint saved with other parameters, warming up from history")
+            self.checkpoint = None
+
     def Update(self, algo, data):
-        self.nobuyreasons = []
         insights = []
+        self.signals.clear()
         if self.symbols_invested_in_last_iteration != None:
             for symbol in self.symbols_invested_in_last_iteration:
                 self.activeStocks.add(symbol)
@@ -131,98 +146,40 @@ class custom_alpha(AlphaModel):
         if self.universe_type != "equity" and self.universe_equity not in self.activeStocks:
             self.activeStocks.add(self.universe_equity) 
 
+        with_data = 0
         for symbol in self.activeStocks:
 
             # region update indicators
 
             if not data.ContainsKey(symbol) or data[symbol] is None:
-                self.nobuyreasons.append("no data")
                 continue
+            with_data += 1
 
             if not self.MACDS[symbol].IsReady:
-                self.nobuyreasons.append("macd not ready")
                 continue
             
 
-            self.trend_rolling_windows[symbol].Add(data[symbol].Close)
-            self.Bollingers_rolling_windows[symbol].append(self.bollinger_holder(self.Bollingers[symbol].LowerBand.Current.Value, self.Bollingers[symbol].MiddleBand.Current.Value, self.Bollingers[symbol].UpperBand.Current.Value, data[symbol].price))
-            self.MACDS_rolling_windows[symbol].append(self.macd_holder(self.MACDS[symbol].Fast.Current.Value, self.MACDS[symbol].Slow.Current.Value, self.MACDS[symbol].Signal.Current.Value, self.MACDS[symbol].Current.Value, self.MACDS[symbol].histogram.Current.Value))
-            self.RSIS_rolling_windows[symbol].Add(self.RSIS_trend[symbol].Current.Value)
-            self.EMAS_rolling_windows[symbol].Add(self.EMAS[symbol].Current.Value)
-            self.EMAS50_rolling_windows[symbol].Add(self.EMAS50[symbol].Current.Value)
-            self.obvs_rolling[symbol].Add(self.obvs[symbol].Current.Value)
+            self.update_windows(symbol, data[symbol].Close)
             
             # endregion
 
 
-            price_trend = get_trend(self.trend_rolling_windows[symbol], self.trend_order, self.K_order)/data[symbol].price
-            rsi_trend = get_trend(self.RSIS_rolling_windows[symbol], self.rsi_trend_order, self.rsi_K_order)/self.RSIS[symbol].Current.Value
-            obv_trend = get_trend(self.obvs_rolling[symbol], self.obv_trend_order, self.obv_K_order)/self.obvs[symbol].Current.Value
+            price_trend = self.price_trends[symbol].get_trend()/data[symbol].price
+            rsi_trend = self.rsi_trends[symbol].get_trend()/self.RSIS[symbol].Current.Value
+            obv_trend = self.obv_trends[symbol].get_trend()/self.obv_value(symbol)
 
             
             # if 50 ema has been above 200 ema for a while, trend is up
-            ema_trend = 0
-            ema50s = [x for x in self.EMAS50_rolling_windows[symbol]]
-            ema200s = [x for x in self.EMAS_rolling_windows[symbol]]
+            ema_trend = self.ema_regimes[symbol].ema_trend
+            derivative = self.ema_regimes[symbol].derivative
             
-            for i in range(len(ema50s)):
-                if ema50s[i] > ema200s[i]:
-                    ema_trend += 1
-            
-            bollinger_score_buy_short = get_bollinger_buy_and_short(algo, self.Bollingers_rolling_windows[symbol], 1, self.bollinger_params)
-            macd_score = get_macd_score(self.MACDS_rolling_windows[symbol], 1, self.macd_params)  
+            bollinger_score_buy_short = self.Bollingers_rolling_windows[symbol].score(1, self.bollinger_params)
+            macd_score = self.MACDS_rolling_windows[symbol].score(1, self.macd_params)  
             rsi_score = get_rsi_buy_short(price_trend, rsi_trend)
 
-            prices = [x for x in self.EMAS50_rolling_windows[symbol]]
-            prices.reverse()
-            derivative = np.gradient(prices)/self.EMAS50_rolling_windows[symbol][0]
-
-            # buy signal
-            if ema_trend >= 210:
-                # if in ema uptrend, buy if price between midle and upper bollinger
-                if bollinger_score_buy_short == 1:
-                    if macd_score == 1:
-                        if rsi_score == 1:
-                            if derivative[-1] > self.derivative_threshold:
-                                if self.ADX[symbol].Current.Value > self.adx_threshold:
-                                    max_adx = max(self.adx_rolling[symbol])
-                                    current_adx = self.ADX[symbol].Current.Value
-                                    if current_adx >= max_adx * .95:
-                                        if obv_trend > self.obv_threshold:
-                                            open_orders = algo.Transactions.GetOpenOrders(symbol)
-                                            if not algo.Portfolio[symbol].Invested and len(open_orders) == 0:
-                                                if symbol not in self.look_for_entries or self.look_for_entries[symbol] == 0:
-                                                    self.look_for_entries[symbol] = 1
-                                                    self.entry_scores[symbol] = abs(int(derivative[-1] * self.ADX[symbol].Current.Value * max(price_trend, 1) * max(rsi_trend, 1) * max(obv_trend, 1) * 100 + self.port_bias))
-                                        else:
-                                            self.nobuyreasons.append("obv trend too low")
-                                    else:
-                                        self.nobuyreasons.append("adx not at max")
-                                else:
-                                    self.nobuyreasons.append("adx below threshold")
-                            else:
-                                self.nobuyreasons.append("not in derivative uptrend")
-                        else:
-                            self.nobuyreasons.append("not in rsi uptrend")
-                    else:
-                        self.nobuyreasons.append("not in macd uptrend")
-                else:
-                    self.nobuyreasons.append("not in bollinger uptrend")
-            else:
-                self.nobuyreasons.append("not in ema uptrend")
-                if bollinger_score_buy_short == 2:
-                    if macd_score == 2:
-                        if rsi_score == 2:
-                            if derivative[-1] < -self.derivative_threshold:
-                                if self.ADX[symbol].Current.Value > self.adx_threshold:
-                                    min_adx = min(self.adx_rolling[symbol])
-                                    current_adx = self.ADX[symbol].Current.Value
-                                    if current_adx <= min_adx * 1.05:
-                                        if obv_trend < -self.obv_threshold:
-                                            open_orders = algo.Transactions.GetOpenOrders(symbol)
-                                            if not algo.Portfolio[symbol].Invested and len(open_orders) == 0:
-                                                self.look_for_entries[symbol] = -1
-                                                self.entry_scores[symbol] = abs(int(derivative[-1] * self.ADX[symbol].Current.Value * max(price_trend, 1) * max(rsi_trend, 1) * max(obv_trend, 1) * 100 + self.port_bias))
+            daily = self.daily_indicators[symbol]
+            self.signals.put(symbol, ema_trend, bollinger_score_buy_short, macd_score, rsi_score, derivative,
+                             daily.adx.Current.Value, daily.max_adx, daily.min_adx, price_trend, rsi_trend, obv_trend)
 
             # generate sell signal
             #if self.RSIS[symbol].Current.Value < 50:
@@ -234,188 +191,274 @@ class custom_alpha(AlphaModel):
             #        insight = Insight.price(symbol, timedelta(days=self.insight_expiry_sell), InsightDirection.Flat, weight = 1)
             #        insights.append(insight)
             
-            if self.plotting:
-                if symbol in self.peak_prices and self.peak_prices[symbol] != None:
-                    algo.Plot("price", "atr trail", self.peak_prices[symbol] - self.atr_stop_multiplier * self.ATRS[symbol].Current.Value)
-                    algo.Plot("price", "peak", self.peak_prices[symbol])
-                algo.Plot("atr", "atr", self.ATRS[symbol].Current.Value)
-                algo.Plot("macd", "macd", self.MACDS[symbol].Current.Value)
-                algo.Plot("adx", "adx", self.ADX[symbol].Current.Value)
-                algo.Plot("obv trend", "obv trend", obv_trend)
-                algo.Plot("obv", "obv", self.obvs[symbol].Current.Value)
-                algo.Plot("trend", "price_trend", price_trend)
-                algo.Plot("trend", "rsi_trend", rsi_trend)
-                algo.Plot("rsi", "rsi", self.RSIS[symbol].Current.Value)
-
-                algo.Plot("price", "ema50", self.EMAS50[symbol].Current.Value)
-                algo.Plot("price", "ema200", self.EMAS[symbol].Current.Value)
-
-                algo.Plot("bollinger_score", "bollinger_score", bollinger_score_buy_short)
-                algo.Plot("macd_score", "macd_score", macd_score)
-                algo.Plot("rsi_score", "rsi_score", rsi_score)
-
-                algo.Plot("derivative", "derivative", derivative[-1])
-
-                algo.Plot("ema_trend: ", "ema_trend", ema_trend)
-                algo.Plot("price", "price", data[symbol].Close)
-                algo.Plot("price", "bollinger_middle", self.Bollingers[symbol].MiddleBand.Current.Value)
-                algo.Plot("price", "bollinger_upper", self.Bollingers[symbol].UpperBand.Current.Value)
-                algo.Plot("trend", "price_trend", price_trend)
-
-        # print out by order of most the nobuyreasons and their number of occurences
-        for reason in sorted(set(self.nobuyreasons), key = lambda x: self.nobuyreasons.count(x), reverse = True):
-            algo.Log(reason + ": " + str(self.nobuyreasons.count(reason)))  
-
-
-
-        if len(self.look_for_entries.keys()) > 0:
-            for key in self.look_for_entries:
-                if self.look_for_entries[key] > 0:
-                    self.look_for_entries[key] += 1
-                    if self.look_for_entries[key] > 70:
-                        self.look_for_entries[key] = 0
-                        self.hold_length[key] = None
-                    else:
-                        #self.Log("Looking for entry for: " + str(key))
-                        if data[key].price > self.Bollingers[key].MiddleBand.Current.Value:
-                            #insight = Insight(key, timedelta(days=2), InsightType.PRICE, InsightDirection.Down, self.entry_scores[key])
-                            insight = Insight.price(key, timedelta(days=self.insight_expiry), InsightDirection.Up, weight = self.entry_scores[key])
-                            self.peak_prices[key] = data[key].price
-                            self.hold_length[key] = 1
-                            insights.append(insight)
-                            self.look_for_entries[key] = 0
-                elif self.look_for_entries[key] < 0:
-                    self.look_for_entries[key] -= 1
-                    if self.look_for_entries[key] < -70:
-                        self.look_for_entries[key] = 0
-                        self.hold_length[key] = None
-                    else:
-                        #self.Log("Looking for entry for: " + str(key))
-                        if data[key].price < self.Bollingers[key].MiddleBand.Current.Value:
-                            #insight = Insight(key, timedelta(days=2), InsightType.PRICE, InsightDirection.Down, self.entry_scores[key])
-                            insight = Insight.price(key, timedelta(days=self.insight_expiry), InsightDirection.Down, weight = self.entry_scores[key])
-                            insights.append(insight)
-                            self.peak_prices[key] = data[key].price
-                            self.hold_length[key] = -1
-                            self.look_for_entries[key] = 0
-            # endregion
+            if self.plotting and self.plot_sink.wants(symbol):
+                peak_price = self.trailing_stops.peak_price(symbol)
+                if peak_price is not None:
+                    self.plot_sink.plot(symbol, "price", "atr trail", peak_price - self.atr_stop_multiplier * self.ATRS[symbol].Current.Value)
+                    self.plot_sink.plot(symbol, "price", "peak", peak_price)
+                self.plot_sink.plot(symbol, "atr", "atr", self.ATRS[symbol].Current.Value)
+                self.plot_sink.plot(symbol, "macd", "macd", self.MACDS[symbol].Current.Value)
+                self.plot_sink.plot(symbol, "adx", "adx", self.ADX[symbol].Current.Value)
+                self.plot_sink.plot(symbol, "obv trend", "obv trend", obv_trend)
+                self.plot_sink.plot(symbol, "obv", "obv", self.obv_value(symbol))
+                self.plot_sink.plot(symbol, "trend", "price_trend", price_trend)
+                self.plot_sink.plot(symbol, "trend", "rsi_trend", rsi_trend)
+                self.plot_sink.plot(symbol, "rsi", "rsi", self.RSIS[symbol].Current.Value)
+
+                self.plot_sink.plot(symbol, "price", "ema50", self.EMAS50[symbol].Current.Value)
+                self.plot_sink.plot(symbol, "price", "ema200", self.EMAS[symbol].Current.Value)
+
+                self.plot_sink.plot(symbol, "bollinger_score", "bollinger_score", bollinger_score_buy_short)
+                self.plot_sink.plot(symbol, "macd_score", "macd_score", macd_score)
+                self.plot_sink.plot(symbol, "rsi_score", "rsi_score", rsi_score)
+
+                self.plot_sink.plot(symbol, "derivative", "derivative", derivative)
+
+                self.plot_sink.plot(symbol, "ema_trend: ", "ema_trend", ema_trend)
+                self.plot_sink.plot(symbol, "price", "price", data[symbol].Close)
+                self.plot_sink.plot(symbol, "price", "bollinger_middle", self.Bollingers[symbol].MiddleBand.Current.Value)
+                self.plot_sink.plot(symbol, "price", "bollinger_upper", self.Bollingers[symbol].UpperBand.Current.Value)
+
+        # buy / short signals, evaluated for all the symbols at once
+        long_entries, short_entries, funnel = self.signals.evaluate()
+        for symbol, score in long_entries:
+            open_orders = algo.Transactions.GetOpenOrders(symbol)
+            if not algo.Portfolio[symbol].Invested and len(open_orders) == 0:
+                if symbol not in self.look_for_entries:
+                    self.look_for_entries.schedule(symbol, 1, score)
+        for symbol, score in short_entries:
+            open_orders = algo.Transactions.GetOpenOrders(symbol)
+            if not algo.Portfolio[symbol].Invested and len(open_orders) == 0:
+                self.look_for_entries.schedule(symbol, -1, score)
+        self.funnel.record('active', len(self.activeStocks))
+        self.funnel.record('data', with_data)
+        self.funnel.record('macd ready', np.count_nonzero(self.signals.ready))
+        for stage, count in funnel:
+            self.funnel.record(stage, count)
+        self.funnel.end_bar(algo)
+        if self.plotting:
+            self.plot_sink.end_bar()
+
+
+
+        for key in self.look_for_entries.step():
+            self.trailing_stops.stop_counting(key)
+        for key, direction, score in self.look_for_entries.items():
+            if not data.ContainsKey(key) or data[key] is None:
+                continue
+            price = data[key].price
+            middle = self.Bollingers[key].MiddleBand.Current.Value
+            if direction > 0 and price > middle:
+                #insight = Insight(key, timedelta(days=2), InsightType.PRICE, InsightDirection.Down, score)
+                insights.append(Insight.price(key, timedelta(days=self.insight_expiry), InsightDirection.Up, weight = score))
+                self.trailing_stops.open(key, price, 1)
+                self.look_for_entries.remove(key)
+            elif direction < 0 and price < middle:
+                insights.append(Insight.price(key, timedelta(days=self.insight_expiry), InsightDirection.Down, weight = score))
+                self.trailing_stops.open(key, price, -1)
+                self.look_for_entries.remove(key)
 
         added_insights = self.atr_trail_stop_loss(algo, data)
         for insight in added_insights:
             insights.append(insight)
+
+        if self.checkpoint_every is not None and not algo.IsWarmingUp:
+            if self.last_checkpoint is None or algo.Time - self.last_checkpoint >= self.checkpoint_every:
+                self.save_state(algo)
         return insights
+
+    def update_windows(self, symbol, price):
+        '''
+        Adds the current indicator values of symbol to its rolling windows
+        '''
+        self.trend_rolling_windows[symbol].Add(price)
+        self.price_trends[symbol].update(price)
+        self.Bollingers_rolling_windows[symbol].append(self.Bollingers[symbol].LowerBand.Current.Value, self.Bollingers[symbol].MiddleBand.Current.Value, self.Bollingers[symbol].UpperBand.Current.Value, price)
+        self.MACDS_rolling_windows[symbol].append(self.MACDS[symbol].Fast.Current.Value, self.MACDS[symbol].Slow.Current.Value, self.MACDS[symbol].Signal.Current.Value, self.MACDS[symbol].Current.Value, self.MACDS[symbol].histogram.Current.Value)
+        self.RSIS_rolling_windows[symbol].Add(self.RSIS_trend[symbol].Current.Value)
+        self.rsi_trends[symbol].update(self.RSIS_trend[symbol].Current.Value)
+        self.obvs_rolling[symbol].Add(self.obv_value(symbol))
+        self.obv_trends[symbol].update(self.obv_value(symbol))
+
+    def obv_value(self, symbol):
+        # a restored obv is rebuilt from less history: the offset puts it back on the saved level
+        return self.obvs[symbol].Current.Value + self.obv_offsets.get(symbol, 0)
+
+    def checkpoint_params(self):
+        # a checkpoint is only restored into windows of the same shape
+        return (self.price_rolling_window_length, self.RSIS_rolling_window_length, self.obv_rolling_window_length,
+                self.ema_rolling_window_length, self.adx_rolling_window_length, self.macd_candles_history_size, self.Bollinger_window_size,
+                self.trend_order, self.K_order, self.rsi_trend_order, self.rsi_K_order, self.obv_trend_order, self.obv_K_order,
+                tuple(sorted(self.macd_params.items())))
+
+    def save_state(self, algo):
+        symbols = {}
+        for symbol in self.activeStocks:
+            if symbol not in self.daily_indicators or not self.MACDS[symbol].IsReady:
+                continue
+            symbols[str(symbol.ID)] = {
+                'trend_window': list(self.trend_rolling_windows[symbol]),
+                'rsi_window': list(self.RSIS_rolling_windows[symbol]),
+                'obv_window': list(self.obvs_rolling[symbol]),
+                'obv': self.obv_value(symbol),
+                'adx_window': list(self.adx_rolling[symbol]),
+                'price_trend': self.price_trends[symbol],
+                'rsi_trend': self.rsi_trends[symbol],
+                'obv_trend': self.obv_trends[symbol],
+                'macd_window': self.MACDS_rolling_windows[symbol],
+                'bollinger_window': self.Bollingers_rolling_windows[symbol],
+                'ema_regime': self.ema_regimes[symbol],
+                'pending_entry': self.look_for_entries.state(symbol),
+                'trailing_stop': self.trailing_stops.state(symbol),
+            }
+        save_checkpoint(algo, self.checkpoint_key, {'time': algo.Time, 'params': self.checkpoint_params(), 'symbols': symbols},
+                        self.checkpoint_path)
+        self.last_checkpoint = algo.Time
     
     def atr_trail_stop_loss(self, algo, data):
         added_insights = []
-        for key in algo.Portfolio.Keys:
-            if key in self.peak_prices and self.peak_prices[key] != None and key in self.hold_length:
-                if self.hold_length[key] != None:
-                    self.hold_length[key] += 1
-                if algo.Portfolio[key].IsLong:
-                    if key in data and data[key] != None:
-                        price = data[key].price
-                    else:
-                        price = self.trend_rolling_windows[key][0]
-                    if price > self.peak_prices[key]: 
-                        self.peak_prices[key] = price
-                    if price < self.peak_prices[key] - self.atr_stop_multiplier * self.ATRS[key].Current.Value:
-                        added_insights.append(Insight.price(key, timedelta(days=7), InsightDirection.Flat, weight = 1))
-                        algo.Liquidate(key)
-                        self.hold_length[key] = None
-                        self.peak_prices[key] = None
-                else:
-                    if key in data and data[key] != None:
-                        price = data[key].price
-                    else:
-                        price = self.trend_rolling_windows[key][0]
-                    if price < self.peak_prices[key]:
-                        self.peak_prices[key] = price
-                    if price > self.peak_prices[key] + self.atr_stop_multiplier * self.ATRS[key].Current.Value:
-                        added_insights.append(Insight.price(key, timedelta(days=7), InsightDirection.Flat, weight = 1))
-                        algo.Liquidate(key)
-                        self.hold_length[key] = None
-                        self.peak_prices[key] = None
+        prices = {}
+        atrs = {}
+        is_long = {}
+        for key in self.trailing_stops.rows:
+            if key in data and data[key] != None:
+                prices[key] = data[key].price
+            else:
+                prices[key] = self.trend_rolling_windows[key][0]
+            atrs[key] = self.ATRS[key].Current.Value
+            is_long[key] = algo.Portfolio[key].IsLong
+        for key in self.trailing_stops.update(prices, atrs, is_long):
+            added_insights.append(Insight.price(key, timedelta(days=7), InsightDirection.Flat, weight = 1))
+            algo.Liquidate(key)
         return added_insights
 
     def OnSecuritiesChanged(self, algo, changes):
         # region removed securities
         for x in changes.RemovedSecurities:
             self.activeStocks.remove(x.Symbol)
+            self.signals.remove(x.Symbol)
+            self.look_for_entries.remove(x.Symbol)
+            if x.Symbol in self.daily_indicators:
+                self.daily_indicators.pop(x.Symbol).dispose(algo)
 
         # can't open positions here since data might not be added correctly yet
         for x in changes.AddedSecurities:
             self.activeStocks.add(x.Symbol) 
+            self.signals.add(x.Symbol)
 
             self.trend_rolling_windows[x.Symbol] = RollingWindow[float](self.price_rolling_window_length)
+            self.price_trends[x.Symbol] = TrendTracker(self.price_rolling_window_length, self.trend_order, self.K_order)
+            self.rsi_trends[x.Symbol] = TrendTracker(self.RSIS_rolling_window_length, self.rsi_trend_order, self.rsi_K_order)
+            self.obv_trends[x.Symbol] = TrendTracker(self.obv_rolling_window_length, self.obv_trend_order, self.obv_K_order)
 
-            self.MACDS[x.Symbol] = MovingAverageConvergenceDivergence(12, 26, 9, MovingAverageType.Exponential)
-            self.macd_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.MACDS[x.Symbol], self.macd_consolidators[x.Symbol])
-            self.MACDS_rolling_windows[x.Symbol] = deque(maxlen=self.macd_candles_history_size)
+            if x.Symbol in self.daily_indicators:
+                self.daily_indicators[x.Symbol].dispose(algo)
+            daily = DailyIndicators(algo, x.Symbol, self.adx_rolling_window_length, self.ema_rolling_window_length)
+            self.daily_indicators[x.Symbol] = daily
+
+            self.MACDS[x.Symbol] = daily.macd
+            self.MACDS_rolling_windows[x.Symbol] = MacdScorer(self.macd_candles_history_size, self.macd_params)
            
-            self.Bollingers[x.Symbol] = BollingerBands(20, 2, MovingAverageType.Simple)
-            self.bollinger_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.Bollingers[x.Symbol], self.bollinger_consolidators[x.Symbol])
-            self.Bollingers_rolling_windows[x.Symbol] = deque(maxlen=self.Bollinger_window_size)
-
-            self.RSIS_trend[x.Symbol] = algo.rsi(x.Symbol, 14, Resolution.Hour)
-            self.RSIS[x.Symbol] = RelativeStrengthIndex(14)
-            self.rsi_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.RSIS[x.Symbol], self.rsi_consolidators[x.Symbol])
+            self.Bollingers[x.Symbol] = daily.bollinger
+            self.Bollingers_rolling_windows[x.Symbol] = BollingerScorer(self.Bollinger_window_size)
+
+            self.RSIS_trend[x.Symbol] = daily.hourly_rsi
+            self.RSIS[x.Symbol] = daily.rsi
             self.RSIS_rolling_windows[x.Symbol] = RollingWindow[float](self.RSIS_rolling_window_length)
 
-            self.EMAS[x.Symbol] = ExponentialMovingAverage(200)
-            self.ema_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.EMAS[x.Symbol], self.ema_consolidators[x.Symbol])
-            self.EMAS_rolling_windows[x.Symbol] = RollingWindow[float](self.ema_rolling_window_length)
-            
-            self.EMAS50[x.Symbol] = ExponentialMovingAverage(50)
-            self.ema50_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.EMAS50[x.Symbol], self.ema50_consolidators[x.Symbol])
-            self.EMAS50_rolling_windows[x.Symbol] = RollingWindow[float](self.ema_rolling_window_length)
+            self.EMAS[x.Symbol] = daily.ema200
+            self.EMAS50[x.Symbol] = daily.ema50
+            self.ema_regimes[x.Symbol] = daily.ema_regime
 
-            self.ADX[x.Symbol] = AverageDirectionalIndex(14)
-            self.adx_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.ADX[x.Symbol], self.adx_consolidators[x.Symbol])
-            self.adx_rolling[x.Symbol] = RollingWindow[float](self.adx_rolling_window_length)
+            self.ADX[x.Symbol] = daily.adx
+            self.adx_rolling[x.Symbol] = daily.adx_rolling
 
             self.obvs[x.Symbol] = algo.obv(x.Symbol)
             self.obvs_rolling[x.Symbol] = RollingWindow[float](self.obv_rolling_window_length)
 
-            self.ATRS[x.Symbol] = AverageTrueRange(14)
-            self.atr_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.ATRS[x.Symbol], self.atr_consolidators[x.Symbol])
-
-            history = algo.History[TradeBar](x.Symbol,self.ema_rolling_window_length*3, Resolution.Hour)
-            history2 = algo.History[TradeBar](x.Symbol,self.ema_rolling_window_length*3, Resolution.Daily)
-            for bar in history:
-                self.RSIS_trend[x.Symbol].Update(bar.EndTime, bar.Close)
-                self.RSIS_rolling_windows[x.Symbol].Add(self.RSIS_trend[x.Symbol].Current.Value)
-            
-            for bar in history2:
-                self.trend_rolling_windows[x.Symbol].Add(bar.Close)
-
-                self.MACDS[x.Symbol].Update(bar.EndTime, bar.Close)
-                new_macd = self.macd_holder(self.MACDS[x.Symbol].Fast.Current.Value, self.MACDS[x.Symbol].Slow.Current.Value, self.MACDS[x.Symbol].Signal.Current.Value, self.MACDS[x.Symbol].Current.Value, self.MACDS[x.Symbol].histogram.Current.Value)
-                self.MACDS_rolling_windows[x.Symbol].append(new_macd)
-                
-                self.Bollingers[x.Symbol].Update(bar.EndTime, bar.Close)
-                new_bol = self.bollinger_holder(self.Bollingers[x.Symbol].LowerBand.Current.Value, self.Bollingers[x.Symbol].MiddleBand.Current.Value, self.Bollingers[x.Symbol].UpperBand.Current.Value, bar.Close)
-                self.Bollingers_rolling_windows[x.Symbol].append(new_bol)
-                
-                self.RSIS[x.Symbol].Update(bar.EndTime, bar.Close)
+            self.ATRS[x.Symbol] = daily.atr
 
-                self.EMAS[x.Symbol].Update(bar.EndTime, bar.Close)
-                self.EMAS_rolling_windows[x.Symbol].Add(self.EMAS[x.Symbol].Current.Value)
-                self.EMAS50[x.Symbol].Update(bar.EndTime, bar.Close)
-                self.EMAS50_rolling_windows[x.Symbol].Add(self.EMAS50[x.Symbol].Current.Value)
-
-                self.ADX[x.Symbol].Update(bar)
-                self.adx_rolling[x.Symbol].Add(self.ADX[x.Symbol].Current.Value)
+        # warm up all the added symbols with one hourly history request, the daily bars are built from it
+        added = [x.Symbol for x in changes.AddedSecurities]
+        if len(added) == 0:
+            return
+        history = self.history_cache.history_columns(added, self.ema_rolling_window_length*3*self.hourly_bars_per_day, Resolution.Hour)
+        for x in changes.AddedSecurities:
+            state = None
+            if self.checkpoint is not None:
+                state = self.checkpoint['symbols'].pop(str(x.Symbol.ID), None)
+            hourly = history[x.Symbol]
+            if state is not None and len(hourly['end_time']) > 0 and hourly['end_time'][0] <= np.datetime64(self.checkpoint['time'], 'us') and self.checkpoint['time'] <= algo.Time:
+                self.restore_symbol(x.Symbol, state, self.checkpoint['time'], hourly)
+            else:
+                self.warm_up_symbol(x.Symbol, hourly, algo.Time)
 
-                self.obvs[x.Symbol].Update(bar)
-                self.obvs_rolling[x.Symbol].Add(self.obvs[x.Symbol].Current.Value)
+    def warm_up_symbol(self, symbol, hourly, now):
+        daily = self.daily_indicators[symbol]
+        history2, unfinished = daily.daily_bars(hourly, now)
 
-                self.ATRS[x.Symbol].Update(bar)
+        # the hourly RSI is warmed up with the most recent hourly bars only
+        rsi_start = max(0, len(hourly['close']) - self.ema_rolling_window_length*3)
+        for end_time, close in zip(hourly['end_time'][rsi_start:].tolist(), hourly['close'][rsi_start:].tolist()):
+            self.RSIS_trend[symbol].Update(end_time, close)
+            self.RSIS_rolling_windows[symbol].Add(self.RSIS_trend[symbol].Current.Value)
+            self.rsi_trends[symbol].update(self.RSIS_trend[symbol].Current.Value)
+        
+        for bar in history2:
+            self.trend_rolling_windows[symbol].Add(bar.Close)
+            self.price_trends[symbol].update(bar.Close)
 
+            daily.warm_up(bar)
+            self.MACDS_rolling_windows[symbol].append(self.MACDS[symbol].Fast.Current.Value, self.MACDS[symbol].Slow.Current.Value, self.MACDS[symbol].Signal.Current.Value, self.MACDS[symbol].Current.Value, self.MACDS[symbol].histogram.Current.Value)
+            
+            self.Bollingers_rolling_windows[symbol].append(self.Bollingers[symbol].LowerBand.Current.Value, self.Bollingers[symbol].MiddleBand.Current.Value, self.Bollingers[symbol].UpperBand.Current.Value, bar.Close)
 
+            self.obvs[symbol].Update(bar)
+            self.obvs_rolling[symbol].Add(self.obvs[symbol].Current.Value)
+            self.obv_trends[symbol].update(self.obvs[symbol].Current.Value)
+
+        # the day in progress goes on in the daily consolidator
+        for bar in unfinished:
+            daily.daily_consolidator.Update(bar)
+
+    def restore_symbol(self, symbol, state, saved_at, hourly):
+        '''
+        Restores the windows of symbol from a checkpoint, rebuilds its indicators from the cached
+        history up to the checkpoint, then replays only the hourly bars missed since then
+        '''
+        daily = self.daily_indicators[symbol]
+        saved = np.searchsorted(hourly['end_time'], np.datetime64(saved_at, 'us'), side='right')
+        daily_bars, unfinished = daily.daily_bars({name: column[:saved] for name, column in hourly.items()}, saved_at)
+        for bar in daily_bars:
+            daily.update(bar)
+        for bar in unfinished:
+            daily.daily_consolidator.Update(bar)
+        for bar in hourly_bars(symbol, hourly, max(0, saved - self.ema_rolling_window_length*3), saved):
+            self.RSIS_trend[symbol].Update(bar.EndTime, bar.Close)
+            self.obvs[symbol].Update(bar)
+        self.obv_offsets[symbol] = state['obv'] - self.obvs[symbol].Current.Value
+        for value in reversed(state['adx_window']):
+            daily.add_adx(value)
+
+        for window, values in ((self.trend_rolling_windows[symbol], state['trend_window']),
+                               (self.RSIS_rolling_windows[symbol], state['rsi_window']),
+                               (self.obvs_rolling[symbol], state['obv_window'])):
+            for value in reversed(values):
+                window.Add(value)
+        self.price_trends[symbol] = state['price_trend']
+        self.rsi_trends[symbol] = state['rsi_trend']
+        self.obv_trends[symbol] = state['obv_trend']
+        self.MACDS_rolling_windows[symbol] = state['macd_window']
+        self.Bollingers_rolling_windows[symbol] = state['bollinger_window']
+        self.ema_regimes[symbol] = daily.ema_regime = state['ema_regime']
+        if state.get('pending_entry') is not None:
+            direction, score, bars_left = state['pending_entry']
+            self.look_for_entries.schedule(symbol, direction, score, wait=bars_left)
+        if state.get('trailing_stop') is not None:
+            self.trailing_stops.open(symbol, *state['trailing_stop'])
+
+        for bar in hourly_bars(symbol, hourly, saved):
+            daily.update_hourly(bar)
+            self.obvs[symbol].Update(bar)
+            if self.MACDS[symbol].IsReady:
+                self.update_windows(symbol, bar.Close)
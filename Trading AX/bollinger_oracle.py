@@ -1,45 +1,34 @@
 #region imports
 from AlgorithmImports import *
 #endregion
+import math
+import numpy as np
 
+from ring_buffer import RingBuffer
 
-def get_bollinger_buy_and_short(QCalgo, bollinger_rolling_window,trend, bollinger_params):  
+
+def get_bollinger_buy_and_short(QCalgo, bollinger_rolling_window,trend, bollinger_params):
     score = 0
-    lowers = [x.lower for x in bollinger_rolling_window]
-    middles = [x.middle for x in bollinger_rolling_window]
-    uppers = [x.upper for x in bollinger_rolling_window]
-    prices = [x.price for x in bollinger_rolling_window]
-    lowers.reverse()
-    middles.reverse()
-    uppers.reverse()
-    prices.reverse()
-
-    above_upper = 0
-    middle_upper = 0
-    lower_middle = 0
-    below_lower = 0
+    # most recent first
+    lowers = bollinger_rolling_window.newest_first('lower')
+    middles = bollinger_rolling_window.newest_first('middle')
+    uppers = bollinger_rolling_window.newest_first('upper')
+    prices = bollinger_rolling_window.newest_first('price')
 
-    amount_above = 0
-    amount_below = .0001
-    for i in range(len(lowers)):
-        low = lowers[i]
-        middle = middles[i]
-        high = uppers[i]
-        price = prices[i]
-
-        if price >= high:
-            above_upper += 1
-        elif price >= middle:
-            middle_upper += 1
-        elif price >= low:
-            lower_middle += 1
-        else:
-            below_lower += 1
+    at_or_above_upper = prices >= uppers
+    at_or_above_middle = prices >= middles
+    # lower_middle + below_lower
+    below_middle_count = np.count_nonzero(~at_or_above_upper & ~at_or_above_middle)
 
-        if price >= middle and amount_below == .0001:
-            amount_above += (price-middle)
-        elif price < middle:
-            amount_below += (middle-price)
+    # amount_above only adds up until the first bar below the middle band
+    below = prices < middles
+    first_below = np.argmax(below) if below.any() else len(prices)
+    amount_above = 0
+    if first_below > 0:
+        head = slice(0, first_below)
+        amount_above = np.cumsum(np.where(at_or_above_middle[head], prices[head] - middles[head], 0.0))[-1]
+    # cumsum adds in order, like the loop it replaces
+    amount_below = np.cumsum(np.concatenate(([.0001], middles[below] - prices[below])))[-1]
 
     most_recent = prices[0]
     current_location = None
@@ -61,12 +50,81 @@ def get_bollinger_buy_and_short(QCalgo, bollinger_rolling_window,trend, bollinge
                 return .5
     elif trend < 0:
         if current_location == "lower_middle" or current_location == "below_lower":
-            if (lower_middle + below_lower) / len(prices) >= bollinger_params['short_threshold']:
+            if below_middle_count / len(prices) >= bollinger_params['short_threshold']:
                 score = 2
 
     return score
 
 
+class BollingerScorer(RingBuffer):
+    '''
+    Bollinger window that keeps the counters of get_bollinger_buy_and_short up to date
+    as bars enter and leave it, so the score is O(1) per bar instead of a scan of the window.
+    '''
+
+    def __init__(self, capacity):
+        super().__init__(capacity, ('lower', 'middle', 'upper', 'price'))
+        # lower_middle + below_lower
+        self.below_middle_count = 0
+        # bars strictly below the middle band
+        self.below_count = 0
+        # price - middle summed over the bars since the last one below the middle band
+        self.amount_above = 0.0
+        self.amount_below = .0001
+
+    def append(self, lower, middle, upper, price):
+        if self.count == self.capacity:
+            self._leave(*self.data[:, self.head].tolist())
+        self._enter(lower, middle, upper, price)
+        super().append(lower, middle, upper, price)
+
+    def clear(self):
+        super().clear()
+        self.below_middle_count = 0
+        self.below_count = 0
+        self.amount_above = 0.0
+        self.amount_below = .0001
+
+    def _enter(self, lower, middle, upper, price):
+        if not price >= upper and not price >= middle:
+            self.below_middle_count += 1
+        if price < middle:
+            self.below_count += 1
+            self.amount_below += middle - price
+            self.amount_above = 0.0
+        elif price >= middle:
+            self.amount_above += price - middle
 
+    def _leave(self, lower, middle, upper, price):
+        if not price >= upper and not price >= middle:
+            self.below_middle_count -= 1
+        if price < middle:
+            self.below_count -= 1
+            self.amount_below -= middle - price
+            if self.below_count == 0:
+                self.amount_below = .0001
+        elif price >= middle and self.below_count == 0:
+            # no bar below the middle band left: the oldest bar was part of amount_above
+            self.amount_above -= price - middle
 
+    def score(self, trend, bollinger_params):
+        '''
+        Same score as get_bollinger_buy_and_short on this window
+        '''
+        newest = (self.head - 1) % self.capacity
+        price = self.data[3, newest]
+        at_or_above_band = price >= self.data[2, newest] or price >= self.data[1, newest]
 
+        if trend > 0:
+            if at_or_above_band:
+                ratio = self.amount_above / self.amount_below
+                threshold = bollinger_params['long_threshold']
+                # the running sums may differ from the scan in the last bits, rescan when it matters
+                if math.isclose(ratio, threshold, rel_tol=1e-9, abs_tol=1e-12):
+                    return get_bollinger_buy_and_short(None, self, trend, bollinger_params)
+                return 1 if ratio >= threshold else .5
+        elif trend < 0:
+            if not at_or_above_band:
+                if self.below_middle_count / self.count >= bollinger_params['short_threshold']:
+                    return 2
+        return 0
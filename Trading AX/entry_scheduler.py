@@ -0,0 +1,69 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import heapq
+import itertools
+
+
+class EntryScheduler:
+    '''
+    Symbols waiting for their entry trigger, with their direction (1 long, -1 short) and entry score.
+    A candidate expires max_wait bars after it was scheduled: expiries are kept in a heap,
+    so a bar only costs the live candidates and the ones expiring on it.
+    '''
+
+    def __init__(self, max_wait=70):
+        self.max_wait = max_wait
+        self.bar = 0
+        # symbol -> (direction, score, expiry bar)
+        self.pending = {}
+        self.expiries = []
+        self.counter = itertools.count()
+
+    def __contains__(self, symbol):
+        return symbol in self.pending
+
+    def __len__(self):
+        return len(self.pending)
+
+    def schedule(self, symbol, direction, score, wait=None):
+        expiry = self.bar + (self.max_wait if wait is None else wait)
+        self.pending[symbol] = (direction, score, expiry)
+        heapq.heappush(self.expiries, (expiry, next(self.counter), symbol))
+
+    def remove(self, symbol):
+        # its heap entry is dropped when it reaches the top
+        return self.pending.pop(symbol, None)
+
+    def step(self):
+        '''
+        Moves to the next bar, returns the symbols whose candidacy expired on it
+        '''
+        self.bar += 1
+        expired = []
+        while self.expiries and self.expiries[0][0] <= self.bar:
+            expiry, _, symbol = heapq.heappop(self.expiries)
+            entry = self.pending.get(symbol)
+            if entry is not None and entry[2] == expiry:
+                del self.pending[symbol]
+                expired.append(symbol)
+        # stale entries (triggered, removed or rescheduled symbols) would otherwise pile up
+        if len(self.expiries) > 4 * len(self.pending) + 64:
+            self.expiries = [(expiry, next(self.counter), symbol) for symbol, (_, _, expiry) in self.pending.items()]
+            heapq.heapify(self.expiries)
+        return expired
+
+    def items(self):
+        '''
+        (symbol, direction, score) of the live candidates, safe to remove from while iterating
+        '''
+        return [(symbol, direction, score) for symbol, (direction, score, _) in self.pending.items()]
+
+    def state(self, symbol):
+        '''
+        (direction, score, bars left) of symbol, None if it is not waiting for an entry
+        '''
+        entry = self.pending.get(symbol)
+        if entry is None:
+            return None
+        return entry[0], entry[1], entry[2] - self.bar
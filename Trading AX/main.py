@@ -2,6 +2,7 @@
 from datetime import datetime
 from AlgorithmImports import *
 from alpha import custom_alpha
+from universe_selection import TopKSelection
 
 # endregion
 
@@ -29,6 +30,7 @@ class CompetitionAlgorithm(QCAlgorithm):
         self.rebalanceTime = self.time
         self.universe_type = "equity"
 
+        self.selection = TopKSelection(coarse_size=1000, final_size=self.final_universe_size)
         if self.universe_type == "equity":
             self.AddUniverse(self.CoarseFilter, self.FineFilter)
 
@@ -49,13 +51,10 @@ class CompetitionAlgorithm(QCAlgorithm):
             return self.Universe.Unchanged
         self.rebalanceTime = self.Time + timedelta(days=300)
         
-        sortedByDollarVolume = sorted(coarse, key=lambda x: x.DollarVolume, reverse=True)
-        return [x.Symbol for x in sortedByDollarVolume if x.HasFundamentalData][:1000]
+        return self.selection.coarse(coarse)
     
     def FineFilter(self, fine):
-        sortedbyVolume = sorted(fine, key=lambda x: x.DollarVolume, reverse=True ) 
-        fine_output = [x.Symbol for x in sortedbyVolume if x.price > 10 and x.MarketCap > 2000000000][:self.final_universe_size]
-        return fine_output
+        return self.selection.fine(fine)
     
     class MyPCM(InsightWeightingPortfolioConstructionModel): 
         # override to set leverage higher
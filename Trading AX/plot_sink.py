@@ -0,0 +1,79 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+from datetime import timedelta
+import numpy as np
+
+
+class PlotSink:
+    '''
+    Buffers the diagnostic points of custom_alpha and adds them to the charts once per flush_every.
+    Only max_symbols symbols are plotted (the first ones asking), and each series keeps at most
+    points_per_flush evenly spaced points of each flush, up to max_points points in total.
+    Points keep the time they were recorded at.
+    '''
+
+    def __init__(self, algo, max_symbols=1, points_per_flush=8, max_points=4000, flush_every=timedelta(days=1)):
+        self.algo = algo
+        self.max_symbols = max_symbols
+        self.points_per_flush = points_per_flush
+        self.max_points = max_points
+        self.flush_every = flush_every
+        self.symbols = set()
+        self.charts = {}
+        # (chart, series) -> [times, values, count, points already added]
+        self.buffers = {}
+        self.last_flush = None
+
+    def wants(self, symbol):
+        if symbol in self.symbols:
+            return True
+        if len(self.symbols) < self.max_symbols:
+            self.symbols.add(symbol)
+            return True
+        return False
+
+    def plot(self, symbol, chart, series, value):
+        if self.max_symbols > 1:
+            series = f"{series} {symbol.Value}"
+        buffer = self.buffers.get((chart, series))
+        if buffer is None:
+            buffer = self.buffers[(chart, series)] = [np.empty(64, dtype='datetime64[us]'), np.empty(64), 0, 0]
+        times, values, count, _ = buffer
+        if count == len(values):
+            buffer[0] = times = np.concatenate([times, np.empty(count, dtype=times.dtype)])
+            buffer[1] = values = np.concatenate([values, np.empty(count)])
+        times[count] = np.datetime64(self.algo.Time, 'us')
+        values[count] = value
+        buffer[2] = count + 1
+
+    def end_bar(self):
+        if self.last_flush is None:
+            self.last_flush = self.algo.Time
+        elif self.algo.Time - self.last_flush >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        for (chart, series), buffer in self.buffers.items():
+            times, values, count, added = buffer
+            keep = min(count, self.points_per_flush, self.max_points - added)
+            if keep <= 0:
+                buffer[2] = 0
+                continue
+            picked = np.unique(np.linspace(0, count - 1, keep).round().astype(np.int64))
+            target = self._series(chart, series)
+            for time, value in zip(times[picked].tolist(), values[picked].tolist()):
+                target.AddPoint(time, value)
+            buffer[2] = 0
+            buffer[3] = added + len(picked)
+        self.last_flush = self.algo.Time
+
+    def _series(self, chart, series):
+        if chart not in self.charts:
+            self.charts[chart] = (Chart(chart), {})
+            self.algo.AddChart(self.charts[chart][0])
+        target_chart, all_series = self.charts[chart]
+        if series not in all_series:
+            all_series[series] = Series(series, SeriesType.Line, 0)
+            target_chart.AddSeries(all_series[series])
+        return all_series[series]
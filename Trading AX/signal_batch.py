@@ -0,0 +1,119 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import numpy as np
+
+
+class SignalBatch:
+    '''
+    Latest indicator values of every active symbol, one numpy column per value and one row per symbol.
+    The entry gates of custom_alpha are evaluated for all the rows at once instead of symbol by symbol.
+    '''
+
+    long_stages = ('ema', 'bollinger', 'macd', 'rsi', 'derivative', 'adx', 'adx max', 'obv')
+
+    columns = ('ema_trend', 'bollinger', 'macd', 'rsi', 'derivative', 'adx', 'max_adx', 'min_adx',
+               'price_trend', 'rsi_trend', 'obv_trend')
+
+    def __init__(self, ema_trend_threshold, derivative_threshold, adx_threshold, obv_threshold, port_bias, capacity=64):
+        self.ema_trend_threshold = ema_trend_threshold
+        self.derivative_threshold = derivative_threshold
+        self.adx_threshold = adx_threshold
+        self.obv_threshold = obv_threshold
+        self.port_bias = port_bias
+
+        self.rows = {}
+        self.symbols = [None] * capacity
+        self.free_rows = list(range(capacity - 1, -1, -1))
+        self.ready = np.zeros(capacity, dtype=bool)
+        self.values = {name: np.zeros(capacity) for name in self.columns}
+
+    def add(self, symbol):
+        if symbol in self.rows:
+            return self.rows[symbol]
+        if not self.free_rows:
+            self._grow()
+        row = self.free_rows.pop()
+        self.rows[symbol] = row
+        self.symbols[row] = symbol
+        self.ready[row] = False
+        return row
+
+    def remove(self, symbol):
+        row = self.rows.pop(symbol, None)
+        if row is None:
+            return
+        self.symbols[row] = None
+        self.ready[row] = False
+        self.free_rows.append(row)
+
+    def _grow(self):
+        old = len(self.symbols)
+        self.symbols.extend([None] * old)
+        self.free_rows.extend(range(2 * old - 1, old - 1, -1))
+        self.ready = np.concatenate([self.ready, np.zeros(old, dtype=bool)])
+        for name in self.columns:
+            self.values[name] = np.concatenate([self.values[name], np.zeros(old)])
+
+    def clear(self):
+        # rows only take part in the next evaluation once they are written again
+        self.ready[:] = False
+
+    def put(self, symbol, ema_trend, bollinger, macd, rsi, derivative, adx, max_adx, min_adx, price_trend, rsi_trend, obv_trend):
+        row = self.rows.get(symbol)
+        if row is None:
+            row = self.add(symbol)
+        values = self.values
+        values['ema_trend'][row] = ema_trend
+        values['bollinger'][row] = bollinger
+        values['macd'][row] = macd
+        values['rsi'][row] = rsi
+        values['derivative'][row] = derivative
+        values['adx'][row] = adx
+        values['max_adx'][row] = max_adx
+        values['min_adx'][row] = min_adx
+        values['price_trend'][row] = price_trend
+        values['rsi_trend'][row] = rsi_trend
+        values['obv_trend'][row] = obv_trend
+        self.ready[row] = True
+
+    def evaluate(self):
+        '''
+        Returns the long candidates, the short candidates (lists of (symbol, entry score))
+        and the number of symbols passing each gate of the long side, in order
+        '''
+        v = self.values
+        derivative = v['derivative']
+        adx = v['adx']
+        ema_up = v['ema_trend'] >= self.ema_trend_threshold
+
+        long_gates = (
+            ("ema", ema_up),
+            ("bollinger", v['bollinger'] == 1),
+            ("macd", v['macd'] == 1),
+            ("rsi", v['rsi'] == 1),
+            ("derivative", derivative > self.derivative_threshold),
+            ("adx", adx > self.adx_threshold),
+            ("adx max", adx >= v['max_adx'] * .95),
+            ("obv", v['obv_trend'] > self.obv_threshold),
+        )
+        longs = self.ready.copy()
+        funnel = []
+        for stage, passed in long_gates:
+            longs &= passed
+            funnel.append((stage, np.count_nonzero(longs)))
+
+        shorts = (self.ready & ~ema_up & (v['bollinger'] == 2) & (v['macd'] == 2) & (v['rsi'] == 2)
+                  & (derivative < -self.derivative_threshold) & (adx > self.adx_threshold)
+                  & (adx <= v['min_adx'] * 1.05) & (v['obv_trend'] < -self.obv_threshold))
+
+        candidates = longs | shorts
+        scores = np.zeros(len(self.symbols))
+        scores[candidates] = np.abs(np.trunc(derivative[candidates] * adx[candidates]
+                                             * np.maximum(v['price_trend'][candidates], 1)
+                                             * np.maximum(v['rsi_trend'][candidates], 1)
+                                             * np.maximum(v['obv_trend'][candidates], 1) * 100 + self.port_bias))
+
+        long_entries = [(self.symbols[row], int(scores[row])) for row in np.flatnonzero(longs)]
+        short_entries = [(self.symbols[row], int(scores[row])) for row in np.flatnonzero(shorts)]
+        return long_entries, short_entries, funnel
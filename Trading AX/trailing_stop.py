@@ -0,0 +1,97 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import numpy as np
+
+
+class TrailingStops:
+    '''
+    ATR trailing stops of the positions opened by custom_alpha, one row per position in packed arrays
+    (peak price, hold length). Only these rows are updated on each bar, all at once, instead of every
+    security of the portfolio. The side (IsLong of the portfolio, a position no longer long being trailed
+    as a short one) and the ATR change from bar to bar: they are passed to update rather than stored.
+    '''
+
+    def __init__(self, atr_stop_multiplier, capacity=16):
+        self.atr_stop_multiplier = atr_stop_multiplier
+        self.rows = {}
+        self.symbols = [None] * capacity
+        self.free_rows = list(range(capacity - 1, -1, -1))
+        self.peak = np.zeros(capacity)
+        # nan once the hold length is no longer counted
+        self.hold = np.full(capacity, np.nan)
+
+    def __contains__(self, symbol):
+        return symbol in self.rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _grow(self):
+        old = len(self.symbols)
+        self.symbols.extend([None] * old)
+        self.free_rows.extend(range(2 * old - 1, old - 1, -1))
+        self.peak = np.concatenate([self.peak, np.zeros(old)])
+        self.hold = np.concatenate([self.hold, np.full(old, np.nan)])
+
+    def open(self, symbol, price, hold_length):
+        row = self.rows.get(symbol)
+        if row is None:
+            if not self.free_rows:
+                self._grow()
+            row = self.free_rows.pop()
+            self.rows[symbol] = row
+            self.symbols[row] = symbol
+        self.peak[row] = price
+        self.hold[row] = np.nan if hold_length is None else hold_length
+
+    def close(self, symbol):
+        row = self.rows.pop(symbol, None)
+        if row is None:
+            return
+        self.symbols[row] = None
+        self.hold[row] = np.nan
+        self.free_rows.append(row)
+
+    def stop_counting(self, symbol):
+        row = self.rows.get(symbol)
+        if row is not None:
+            self.hold[row] = np.nan
+
+    def peak_price(self, symbol):
+        row = self.rows.get(symbol)
+        return None if row is None else self.peak[row]
+
+    def state(self, symbol):
+        '''
+        (peak price, hold length) of the position on symbol, None if it has no stop
+        '''
+        row = self.rows.get(symbol)
+        if row is None:
+            return None
+        hold = self.hold[row]
+        return self.peak[row], None if np.isnan(hold) else int(hold)
+
+    def update(self, prices, atrs, is_long):
+        '''
+        prices, atrs and is_long are {symbol: value} for the symbols of the stops.
+        Moves the peaks and returns the symbols whose stop was hit (their rows are closed)
+        '''
+        rows = np.fromiter(self.rows.values(), dtype=np.int64, count=len(self.rows))
+        if len(rows) == 0:
+            return []
+        symbols = [self.symbols[row] for row in rows]
+        price = np.fromiter((prices[symbol] for symbol in symbols), dtype=float, count=len(rows))
+        atr = np.fromiter((atrs[symbol] for symbol in symbols), dtype=float, count=len(rows))
+        long = np.fromiter((is_long[symbol] for symbol in symbols), dtype=bool, count=len(rows))
+
+        self.hold[rows] += 1
+        peak = np.where(long, np.maximum(self.peak[rows], price), np.minimum(self.peak[rows], price))
+        self.peak[rows] = peak
+        distance = self.atr_stop_multiplier * atr
+        hit = np.where(long, price < peak - distance, price > peak + distance)
+
+        stopped = [symbols[i] for i in np.flatnonzero(hit)]
+        for symbol in stopped:
+            self.close(symbol)
+        return stopped
@@ -0,0 +1,16 @@
+'''
+Offline stand-in for the AlgorithmImports module of QuantConnect, see lean_local/__init__.py
+'''
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lean_local.common import *
+from lean_local.indicators import *
+from lean_local.consolidators import *
+from lean_local.framework import *
+from lean_local.universe import *
+from lean_local.algorithm import *
@@ -0,0 +1 @@
+from lean_local.framework import EqualWeightingPortfolioConstructionModel
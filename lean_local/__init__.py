@@ -0,0 +1,70 @@
+'''
+Offline stand-in for the part of the QuantConnect LEAN API used by the Python projects of this workspace,
+to run them on local CSV or synthetic bars (profiling, regression benchmarks).
+
+    import lean_local
+    algorithm_class = lean_local.load_algorithm("Exemple-Python-Trend following")
+    result = lean_local.Engine(algorithm_class, lean_local.SyntheticData(100, start, end)).run()
+    print(result.statistics)
+
+or from the repository root: python -m lean_local "Exemple-Python-Trend following" --symbols 100
+
+The projects import AlgorithmImports and their sibling modules by name: activate(project) puts this package
+and the project folder first on sys.path. Simplifications: orders are filled at once at the last close,
+quote bars are the trade bars, there are no splits or dividends, and the risk parity portfolio construction
+model weighs by inverse volatility.
+'''
+import importlib
+import inspect
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_project = None
+_project_modules = set()
+
+
+def activate(project=None):
+    '''
+    Makes AlgorithmImports (and the modules of project, a folder) importable
+    '''
+    global _project
+    parent = os.path.dirname(ROOT)
+    for path in (parent, ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    if project is not None:
+        project = os.path.abspath(project)
+        if _project is not None and _project != project:
+            # the projects use the same module names (main, alpha, ...)
+            if _project in sys.path:
+                sys.path.remove(_project)
+            for name in _project_modules:
+                sys.modules.pop(name, None)
+            _project_modules.clear()
+        _project = project
+        if project not in sys.path:
+            sys.path.insert(0, project)
+
+
+def load_algorithm(project, module='main'):
+    '''
+    The QCAlgorithm subclass defined in project/module.py
+    '''
+    activate(project)
+    before = set(sys.modules)
+    main = importlib.import_module(module)
+    _project_modules.update(name for name in set(sys.modules) - before
+                            if (getattr(sys.modules[name], '__file__', None) or '').startswith(_project))
+    from lean_local.algorithm import QCAlgorithm
+    for _, value in inspect.getmembers(main, inspect.isclass):
+        if issubclass(value, QCAlgorithm) and value is not QCAlgorithm and value.__module__ == main.__name__:
+            return value
+    raise ValueError(f"No QCAlgorithm in {project}/{module}.py")
+
+
+activate()
+
+from lean_local.data import BarArrays, CsvData, DataSource, SyntheticData
+from lean_local.engine import BacktestResult, Engine
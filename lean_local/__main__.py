@@ -0,0 +1,55 @@
+'''
+python -m lean_local PROJECT [--symbols N | --csv FOLDER] [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--param name=value]
+    [--object-store FOLDER]
+'''
+import argparse
+import json
+from datetime import datetime
+
+import lean_local
+from lean_local.common import Resolution
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest a project of the workspace offline")
+    parser.add_argument('project')
+    parser.add_argument('--symbols', type=int, default=100, help="number of synthetic symbols")
+    parser.add_argument('--csv', help="folder of <TICKER>.csv bars instead of synthetic data")
+    parser.add_argument('--resolution', help="resolution of the bars (Minute, Hour, Daily), "
+                                             "by default the finest one the algorithm subscribes to")
+    parser.add_argument('--start', help="overrides the start date of the algorithm")
+    parser.add_argument('--end', help="overrides the end date of the algorithm")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history-days', type=int, default=365, help="synthetic bars before the start date")
+    parser.add_argument('--param', action='append', default=[], help="name=value returned by GetParameter")
+    parser.add_argument('--object-store', help="folder of the ObjectStore, kept between runs (default: a temporary folder)")
+    parser.add_argument('--verbose', action='store_true', help="print the logs")
+    args = parser.parse_args()
+
+    algorithm_class = lean_local.load_algorithm(args.project)
+    algorithm = algorithm_class()
+    if args.start or args.end:
+        # applied after Initialize
+        initialize = algorithm.Initialize
+
+        def Initialize():
+            initialize()
+            if args.start:
+                algorithm.SetStartDate(datetime.fromisoformat(args.start))
+            if args.end:
+                algorithm.SetEndDate(datetime.fromisoformat(args.end))
+        algorithm.Initialize = Initialize
+
+    resolution = Resolution[args.resolution] if args.resolution else None
+    if args.csv:
+        data = lean_local.CsvData(args.csv, resolution)
+    else:
+        data = lean_local.SyntheticData(args.symbols, seed=args.seed, history_days=args.history_days,
+                                        resolution=resolution)
+    parameters = dict(p.split('=', 1) for p in args.param)
+    result = lean_local.Engine(algorithm, data, parameters, args.object_store, args.verbose).run()
+    print(json.dumps(result.statistics, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,909 @@
+'''
+QCAlgorithm of the LEAN stand-in and the services it exposes: portfolio, securities, orders, history,
+consolidator subscriptions, scheduled events, charts and the object store.
+'''
+import math
+import os
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+from lean_local.common import (RESOLUTION_SPANS, Aliased, DataNormalizationMode, DayOfWeek, Resolution, SecurityType, SeriesType, Symbol,
+                               TradeBar, aliased, dispatch)
+from lean_local.consolidators import IdentityDataConsolidator, TradeBarConsolidator
+from lean_local.framework import (ImmediateExecutionModel, NullRiskManagementModel, PortfolioConstructionModel)
+from lean_local.indicators import (AverageDirectionalIndex, AverageTrueRange, BollingerBands, ExponentialMovingAverage,
+                                   LogReturn, MomentumPercent, MovingAverageConvergenceDivergence, MovingAverageType,
+                                   OnBalanceVolume, RateOfChange, RateOfChangePercent, RelativeStrengthIndex,
+                                   SimpleMovingAverage, StandardDeviation)
+from lean_local.universe import (FundamentalUniverseSelectionModel, ManualUniverseSelectionModel, UniverseDefinitions,
+                                 UniverseSelectionModel, UniverseSettings)
+
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+
+
+class _Model:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class PatternDayTradingMarginModel(_Model):
+    pass
+
+
+class SecurityMarginModel(_Model):
+    pass
+
+
+class ConstantFeeModel(_Model):
+    pass
+
+
+@aliased
+class SecurityHolding(Aliased):
+    def __init__(self, security):
+        self.security = security
+        self.Symbol = security.Symbol
+        self.Quantity = 0
+        self.AveragePrice = 0.0
+        self.Profit = 0.0
+
+    @property
+    def Price(self):
+        return self.security.Price
+
+    @property
+    def Invested(self):
+        return self.Quantity != 0
+
+    @property
+    def IsLong(self):
+        return self.Quantity > 0
+
+    @property
+    def IsShort(self):
+        return self.Quantity < 0
+
+    @property
+    def AbsoluteQuantity(self):
+        return abs(self.Quantity)
+
+    @property
+    def HoldingsValue(self):
+        return self.Quantity * self.security.Price
+
+    @property
+    def HoldingsCost(self):
+        return self.Quantity * self.AveragePrice
+
+    @property
+    def UnrealizedProfit(self):
+        return self.Quantity * (self.security.Price - self.AveragePrice)
+
+
+@aliased
+class Security(Aliased):
+    def __init__(self, algorithm, symbol, resolution, leverage=1, data_normalization_mode=DataNormalizationMode.Adjusted):
+        self.algorithm = algorithm
+        self.Symbol = symbol
+        self.Resolution = resolution
+        self.Leverage = leverage
+        self.DataNormalizationMode = data_normalization_mode
+        self.Price = 0.0
+        self.Open = self.High = self.Low = self.Close = 0.0
+        self.Volume = 0.0
+        self.HasData = False
+        self.IsTradable = True
+        self.Holdings = SecurityHolding(self)
+
+    @property
+    def Invested(self):
+        return self.Holdings.Invested
+
+    @property
+    def Fundamentals(self):
+        return self.algorithm._engine.fundamental(self.Symbol, self.algorithm.Time)
+
+    def SetLeverage(self, leverage):
+        self.Leverage = leverage
+
+    def SetMarginModel(self, model):
+        pass
+
+    def SetFeeModel(self, model):
+        pass
+
+    def SetFillModel(self, model):
+        pass
+
+    def SetSlippageModel(self, model):
+        pass
+
+    def SetBuyingPowerModel(self, model):
+        pass
+
+    def SetDataNormalizationMode(self, mode):
+        self.DataNormalizationMode = mode
+
+    def update(self, bar):
+        self.Price = self.Close = bar.Close
+        self.Open = bar.Open
+        self.High = bar.High
+        self.Low = bar.Low
+        self.Volume = bar.Volume
+        self.HasData = True
+
+    def __repr__(self):
+        return f"Security({self.Symbol})"
+
+
+class KeyValuePair:
+    __slots__ = ('Key', 'Value')
+
+    def __init__(self, key, value):
+        self.Key = key
+        self.Value = value
+
+    key = property(lambda self: self.Key)
+    value = property(lambda self: self.Value)
+
+
+@aliased
+class SecurityManager(dict):
+    '''
+    Securities / ActiveSecurities: {Symbol: Security}, also indexed by ticker
+    '''
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = Symbol.Create(key)
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            key = Symbol.Create(key)
+        return dict.__contains__(self, key)
+
+    def ContainsKey(self, key):
+        return key in self
+
+    @property
+    def Keys(self):
+        return list(dict.keys(self))
+
+    @property
+    def Values(self):
+        return list(dict.values(self))
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+@aliased
+class SecurityPortfolioManager:
+    def __init__(self, securities):
+        self.securities = securities
+        self.Cash = 0.0
+
+    def __getitem__(self, symbol):
+        return self.securities[symbol].Holdings
+
+    def __contains__(self, symbol):
+        return symbol in self.securities
+
+    def __iter__(self):
+        return (KeyValuePair(symbol, security.Holdings) for symbol, security in self.securities.items())
+
+    def __len__(self):
+        return len(self.securities)
+
+    def ContainsKey(self, symbol):
+        return symbol in self.securities
+
+    @property
+    def Keys(self):
+        return list(self.securities.keys())
+
+    @property
+    def Values(self):
+        return [security.Holdings for security in self.securities.values()]
+
+    def keys(self):
+        return self.Keys
+
+    def values(self):
+        return self.Values
+
+    def items(self):
+        return [(symbol, security.Holdings) for symbol, security in self.securities.items()]
+
+    @property
+    def TotalHoldingsValue(self):
+        return sum(security.Holdings.HoldingsValue for security in self.securities.values() if security.Holdings.Quantity)
+
+    @property
+    def TotalPortfolioValue(self):
+        return self.Cash + self.TotalHoldingsValue
+
+    @property
+    def TotalUnrealizedProfit(self):
+        return sum(security.Holdings.UnrealizedProfit for security in self.securities.values() if security.Holdings.Quantity)
+
+    @property
+    def Invested(self):
+        return any(security.Holdings.Quantity for security in self.securities.values())
+
+    @property
+    def TotalFees(self):
+        return 0.0
+
+
+@aliased
+class OrderTicket(Aliased):
+    def __init__(self, order_id, symbol, quantity, price, time, tag):
+        self.OrderId = order_id
+        self.Symbol = symbol
+        self.Quantity = quantity
+        self.QuantityFilled = quantity
+        self.AverageFillPrice = price
+        self.Time = time
+        self.Tag = tag
+        self.Status = 'Filled'
+
+
+@aliased
+class SecurityTransactionManager:
+    '''
+    Market orders are filled at once, so there is never an open order
+    '''
+
+    def __init__(self):
+        self.orders = []
+
+    def GetOpenOrders(self, symbol=None):
+        return []
+
+    def GetOrders(self, filter=None):
+        return list(self.orders)
+
+    def CancelOpenOrders(self, symbol=None, tag=None):
+        return []
+
+    @property
+    def OrdersCount(self):
+        return len(self.orders)
+
+
+@aliased
+class SubscriptionManager:
+    def __init__(self):
+        self.consolidators = {}
+
+    def AddConsolidator(self, symbol, consolidator):
+        consolidators = self.consolidators.setdefault(symbol, [])
+        if consolidator not in consolidators:
+            consolidators.append(consolidator)
+
+    def RemoveConsolidator(self, symbol, consolidator):
+        consolidators = self.consolidators.get(symbol)
+        if consolidators and consolidator in consolidators:
+            consolidators.remove(consolidator)
+
+
+@aliased
+class ObjectStore:
+    '''
+    Keys are files under root
+    '''
+
+    def __init__(self, root):
+        self.root = root
+
+    def GetFilePath(self, key):
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def ContainsKey(self, key):
+        return os.path.exists(os.path.join(self.root, key))
+
+    def SaveBytes(self, key, data):
+        with open(self.GetFilePath(key), 'wb') as f:
+            f.write(bytes(data))
+        return True
+
+    def ReadBytes(self, key):
+        with open(os.path.join(self.root, key), 'rb') as f:
+            return f.read()
+
+    def Save(self, key, text):
+        with open(self.GetFilePath(key), 'w') as f:
+            f.write(text)
+        return True
+
+    def Read(self, key):
+        with open(os.path.join(self.root, key)) as f:
+            return f.read()
+
+    def Delete(self, key):
+        path = os.path.join(self.root, key)
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
+
+@aliased
+class DataDictionary(dict):
+    '''
+    {Symbol: data} with the .NET dictionary members used by the algorithms
+    '''
+
+    def ContainsKey(self, key):
+        return key in self
+
+    @property
+    def Keys(self):
+        return list(dict.keys(self))
+
+    @property
+    def Values(self):
+        return list(dict.values(self))
+
+    @property
+    def Count(self):
+        return len(self)
+
+    def keys(self):
+        return list(dict.keys(self))
+
+    def values(self):
+        return list(dict.values(self))
+
+
+@aliased
+class Slice(DataDictionary):
+    '''
+    Trade bars of one time step. QuoteBars holds the same bars (the stand-in has no quotes),
+    Splits and Dividends are always empty.
+    '''
+
+    def __init__(self, time, bars):
+        super().__init__(bars)
+        self.Time = time
+        self.Splits = DataDictionary()
+        self.Dividends = DataDictionary()
+
+    @property
+    def Bars(self):
+        return self
+
+    @property
+    def QuoteBars(self):
+        return self
+
+    time = property(lambda self: self.Time)
+    splits = property(lambda self: self.Splits)
+    dividends = property(lambda self: self.Dividends)
+
+
+@aliased
+class Series:
+    def __init__(self, name, series_type=SeriesType.Line, unit_or_index=0, color=None):
+        self.Name = name
+        self.SeriesType = series_type
+        self.Points = []
+
+    def AddPoint(self, time, value):
+        self.Points.append((time, value))
+
+
+@aliased
+class Chart:
+    def __init__(self, name):
+        self.Name = name
+        self.Series = {}
+
+    def AddSeries(self, series):
+        self.Series[series.Name] = series
+
+
+@aliased
+class HistoryProvider:
+    '''
+    algorithm.History[TradeBar](symbols, count | start, end | span, resolution) returns the bars
+    (a list of TradeBar for one symbol, of {Symbol: TradeBar} per time step for several),
+    algorithm.History(...) the same bars as a DataFrame indexed by (symbol, time)
+    '''
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+
+    def __getitem__(self, data_type):
+        return self.bars
+
+    def _arrays(self, symbols, args, kwargs):
+        args = list(args)
+        now = self.algorithm.Time
+        resolution = kwargs.get('resolution')
+        count = start = None
+        end = now
+        if args and isinstance(args[0], int) and not isinstance(args[0], Resolution):
+            count = args.pop(0)
+        elif args and isinstance(args[0], timedelta):
+            start = now - args.pop(0)
+        elif args and isinstance(args[0], datetime):
+            start = args.pop(0)
+            if args and isinstance(args[0], datetime):
+                end = min(args.pop(0), now)
+        if args and resolution is None:
+            resolution = args.pop(0)
+        if resolution is None:
+            resolution = self.algorithm.UniverseSettings.Resolution
+
+        end64 = np.datetime64(end, 'us')
+        result = []
+        for symbol in symbols:
+            arrays = self.algorithm._engine.arrays(symbol, resolution)
+            stop = np.searchsorted(arrays.end_time, end64, side='right')
+            if count is not None:
+                first = max(0, stop - count)
+            else:
+                first = np.searchsorted(arrays.end_time, np.datetime64(start, 'us'), side='right')
+            result.append((symbol, arrays, first, stop))
+        return result
+
+    def bars(self, symbols, *args, **kwargs):
+        single = not isinstance(symbols, (list, tuple, set))
+        symbols = [symbols] if single else list(symbols)
+        symbols = [Symbol.Create(s) if isinstance(s, str) else s for s in symbols]
+        ranges = self._arrays(symbols, args, kwargs)
+        if single:
+            symbol, arrays, first, stop = ranges[0]
+            return [arrays.bar(i) for i in range(first, stop)]
+        steps = {}
+        for symbol, arrays, first, stop in ranges:
+            for i in range(first, stop):
+                bar = arrays.bar(i)
+                steps.setdefault(bar.EndTime, DataDictionary())[symbol] = bar
+        return [steps[t] for t in sorted(steps)]
+
+    def __call__(self, symbols, *args, **kwargs):
+        single = not isinstance(symbols, (list, tuple, set))
+        symbols = [symbols] if single else list(symbols)
+        symbols = [Symbol.Create(s) if isinstance(s, str) else s for s in symbols]
+        frames = []
+        for symbol, arrays, first, stop in self._arrays(symbols, args, kwargs):
+            if stop <= first:
+                continue
+            index = pd.MultiIndex.from_arrays([[symbol] * (stop - first), pd.DatetimeIndex(arrays.end_time[first:stop])],
+                                              names=['symbol', 'time'])
+            values = arrays.values[first:stop]
+            frames.append(pd.DataFrame({'open': values[:, 0], 'high': values[:, 1], 'low': values[:, 2],
+                                        'close': values[:, 3], 'volume': values[:, 4]}, index=index))
+        if not frames:
+            return pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume'])
+        return pd.concat(frames)
+
+
+@aliased
+class DateRules:
+    '''
+    Date rules are functions of (date, engine) telling whether an event happens on that date
+    '''
+
+    def EveryDay(self, *args):
+        return lambda day, engine: True
+
+    def Every(self, *days):
+        if len(days) == 1 and isinstance(days[0], (list, tuple)):
+            days = days[0]
+        weekdays = {int(d) for d in days}
+        return lambda day, engine: day.weekday() in weekdays
+
+    def MonthStart(self, *args, days_offset=0):
+        return lambda day, engine: engine.trading_day_of_month(day) == days_offset
+
+    def WeekStart(self, *args, days_offset=0):
+        return lambda day, engine: engine.trading_day_of_week(day) == days_offset
+
+    def On(self, year, month, day):
+        target = date(year, month, day)
+        return lambda d, engine: d == target
+
+
+@aliased
+class TimeRules:
+    '''
+    Time rules are functions of a date returning the times of the event on that date
+    '''
+
+    def At(self, hour, minute=0, second=0):
+        return lambda day: [datetime.combine(day, time(hour, minute, second))]
+
+    def AfterMarketOpen(self, symbol=None, minutes_after_open=0, extended_market_open=False):
+        return lambda day: [datetime.combine(day, MARKET_OPEN) + timedelta(minutes=minutes_after_open)]
+
+    def BeforeMarketClose(self, symbol=None, minutes_before_close=0, extended_market_close=False):
+        return lambda day: [datetime.combine(day, MARKET_CLOSE) - timedelta(minutes=minutes_before_close)]
+
+    def AfterMarketClose(self, symbol=None, minutes_after_close=0, extended_market_close=False):
+        return lambda day: [datetime.combine(day, MARKET_CLOSE) + timedelta(minutes=minutes_after_close)]
+
+    def Every(self, interval):
+        def times(day):
+            start = datetime.combine(day, time(0))
+            count = int(timedelta(days=1) / interval)
+            return [start + i * interval for i in range(count)]
+        return times
+
+    @property
+    def Midnight(self):
+        return self.At(0)
+
+    @property
+    def Noon(self):
+        return self.At(12)
+
+
+@aliased
+class ScheduleManager:
+    def __init__(self):
+        self.events = []
+
+    def On(self, date_rule, time_rule, action, name=None):
+        self.events.append((date_rule, time_rule, action))
+
+
+@aliased
+class AlgorithmSettings(Aliased):
+    def __init__(self):
+        self.FillForwardDataEnabled = True
+        self.MinimumOrderMarginPortfolioPercentage = 0
+        self.FreePortfolioValuePercentage = 0.0025
+        self.RebalancePortfolioOnSecurityChanges = True
+        self.RebalancePortfolioOnInsightChanges = True
+        self.WarmupResolution = None
+
+
+@aliased
+class QCAlgorithm:
+    '''
+    Subset of QCAlgorithm driven by lean_local.engine.Engine
+    '''
+
+    def __init__(self):
+        self._engine = None
+        self._time = datetime(1998, 1, 1)
+        self._start = datetime(1998, 1, 1)
+        self._end = datetime.now()
+        self._warm_up = None
+        self._warming_up = False
+        self._securities = SecurityManager()
+        self._active_securities = SecurityManager()
+        self._portfolio = SecurityPortfolioManager(self._securities)
+        self._portfolio.Cash = 100000.0
+        self._transactions = SecurityTransactionManager()
+        self._subscription_manager = SubscriptionManager()
+        self._universe_settings = UniverseSettings(Resolution.Minute)
+        self._settings = AlgorithmSettings()
+        self._schedule = ScheduleManager()
+        self._date_rules = DateRules()
+        self._time_rules = TimeRules()
+        self._history = HistoryProvider(self)
+        self._universe = UniverseDefinitions(self)
+        self._object_store = None
+        self._current_slice = None
+        self._benchmark = None
+        self._security_initializer = None
+        self._alphas = []
+        self._portfolio_construction = PortfolioConstructionModel()
+        self._execution = ImmediateExecutionModel()
+        self._risk_management = []
+        self._universe_models = []
+        self._charts = {}
+        self._logs = []
+
+    # region lifecycle, overridden by the algorithms
+
+    def Initialize(self):
+        pass
+
+    def OnData(self, data):
+        pass
+
+    def OnSecuritiesChanged(self, changes):
+        pass
+
+    def OnWarmupFinished(self):
+        pass
+
+    def OnEndOfAlgorithm(self):
+        pass
+
+    def OnOrderEvent(self, order_event):
+        pass
+
+    # endregion
+
+    # region properties
+
+    Time = property(lambda self: self._time)
+    UtcTime = property(lambda self: self._time)
+    StartDate = property(lambda self: self._start)
+    EndDate = property(lambda self: self._end)
+    IsWarmingUp = property(lambda self: self._warming_up)
+    LiveMode = property(lambda self: False)
+    Portfolio = property(lambda self: self._portfolio)
+    Securities = property(lambda self: self._securities)
+    ActiveSecurities = property(lambda self: self._active_securities)
+    Transactions = property(lambda self: self._transactions)
+    SubscriptionManager = property(lambda self: self._subscription_manager)
+    UniverseSettings = property(lambda self: self._universe_settings)
+    Settings = property(lambda self: self._settings)
+    Schedule = property(lambda self: self._schedule)
+    DateRules = property(lambda self: self._date_rules)
+    TimeRules = property(lambda self: self._time_rules)
+    History = property(lambda self: self._history)
+    Universe = property(lambda self: self._universe)
+    ObjectStore = property(lambda self: self._object_store)
+    CurrentSlice = property(lambda self: self._current_slice)
+    Benchmark = property(lambda self: self._benchmark)
+    Charts = property(lambda self: self._charts)
+
+    # endregion
+
+    # region setup
+
+    def SetStartDate(self, year, month=None, day=None):
+        self._start = year if isinstance(year, datetime) else datetime(year, month, day)
+
+    def SetEndDate(self, year, month=None, day=None):
+        self._end = year if isinstance(year, datetime) else datetime(year, month, day)
+
+    def SetCash(self, cash):
+        self._portfolio.Cash = float(cash)
+
+    def SetWarmUp(self, period, resolution=None):
+        self._warm_up = (period, resolution)
+
+    def SetWarmup(self, period, resolution=None):
+        self.SetWarmUp(period, resolution)
+
+    def SetBenchmark(self, benchmark):
+        self._benchmark = benchmark
+
+    def SetBrokerageModel(self, *args, **kwargs):
+        pass
+
+    def SetTimeZone(self, time_zone):
+        pass
+
+    def SetSecurityInitializer(self, initializer):
+        self._security_initializer = initializer
+
+    def GetParameter(self, name, default_value=None):
+        return self._engine.parameters.get(name, default_value)
+
+    # endregion
+
+    # region framework
+
+    def SetAlpha(self, alpha):
+        self._alphas = [alpha]
+
+    def AddAlpha(self, alpha):
+        self._alphas.append(alpha)
+
+    def SetPortfolioConstruction(self, model):
+        self._portfolio_construction = model
+
+    def SetExecution(self, model):
+        self._execution = model
+
+    def SetRiskManagement(self, model):
+        self._risk_management = [model]
+
+    def AddRiskManagement(self, model):
+        if isinstance(model, NullRiskManagementModel):
+            return
+        self._risk_management.append(model)
+
+    def SetUniverseSelection(self, model):
+        self._universe_models = [model]
+
+    def AddUniverseSelection(self, model):
+        self._universe_models.append(model)
+
+    def AddUniverse(self, selector, fine=None):
+        if isinstance(selector, UniverseSelectionModel):
+            self._universe_models.append(selector)
+        else:
+            self._universe_models.append(FundamentalUniverseSelectionModel(selector, fine))
+
+    # endregion
+
+    # region securities
+
+    def AddEquity(self, ticker, resolution=None, market=None, fill_forward=True, leverage=None, extended_market_hours=False,
+                  data_normalization_mode=None, **kwargs):
+        symbol = ticker if isinstance(ticker, Symbol) else Symbol.Create(ticker)
+        security = self._engine.subscribe(symbol, resolution or self._universe_settings.Resolution, data_normalization_mode)
+        if leverage is not None:
+            security.Leverage = leverage
+        return security
+
+    def AddCrypto(self, ticker, resolution=None, market=None, fill_forward=True, leverage=None, **kwargs):
+        return self.AddEquity(ticker, resolution, market, fill_forward, leverage)
+
+    def AddForex(self, ticker, resolution=None, market=None, fill_forward=True, leverage=None, **kwargs):
+        return self.AddEquity(ticker, resolution, market, fill_forward, leverage)
+
+    def AddSecurity(self, security_type, ticker, resolution=None, *args, **kwargs):
+        return self.AddEquity(ticker, resolution)
+
+    def RemoveSecurity(self, symbol):
+        self._engine.unsubscribe(symbol)
+        return True
+
+    def IsMarketOpen(self, symbol):
+        return self._time.weekday() < 5 and MARKET_OPEN <= self._time.time() <= MARKET_CLOSE
+
+    # endregion
+
+    # region orders
+
+    def MarketOrder(self, symbol, quantity, asynchronous=False, tag="", order_properties=None):
+        if isinstance(symbol, str):
+            symbol = Symbol.Create(symbol)
+        return self._engine.fill(symbol, int(quantity), tag)
+
+    def Liquidate(self, symbol=None, tag="Liquidated", asynchronous=False, order_properties=None):
+        symbols = [symbol] if symbol is not None else [s for s, security in self._securities.items() if security.Holdings.Quantity]
+        tickets = []
+        for s in symbols:
+            if isinstance(s, str):
+                s = Symbol.Create(s)
+            quantity = self._securities[s].Holdings.Quantity
+            if quantity:
+                ticket = self._engine.fill(s, -quantity, tag)
+                if ticket is not None:
+                    tickets.append(ticket)
+        return tickets
+
+    def CalculateOrderQuantity(self, symbol, target):
+        security = self._securities[symbol]
+        if security.Price == 0:
+            return 0
+        return math.trunc(target * self._portfolio.TotalPortfolioValue / security.Price) - security.Holdings.Quantity
+
+    def SetHoldings(self, symbol, percentage, liquidate_existing_holdings=False, tag="", order_properties=None):
+        if isinstance(symbol, list):
+            for target in symbol:
+                self.SetHoldings(target.Symbol, target.Quantity, liquidate_existing_holdings, tag)
+            return
+        if isinstance(symbol, str):
+            symbol = Symbol.Create(symbol)
+        if liquidate_existing_holdings:
+            for other in list(self._securities):
+                if other != symbol:
+                    self.Liquidate(other)
+        quantity = self.CalculateOrderQuantity(symbol, percentage)
+        if quantity:
+            self.MarketOrder(symbol, quantity, tag=tag)
+
+    # endregion
+
+    # region indicators
+
+    def RegisterIndicator(self, symbol, indicator, resolution=None, selector=None):
+        if isinstance(resolution, TradeBarConsolidator):
+            consolidator = resolution
+        elif resolution is None or resolution == self._engine.resolution_of(symbol):
+            consolidator = IdentityDataConsolidator()
+        elif isinstance(resolution, timedelta):
+            consolidator = TradeBarConsolidator(resolution)
+        else:
+            consolidator = TradeBarConsolidator(RESOLUTION_SPANS[resolution])
+        if selector is None:
+            consolidator.DataConsolidated += lambda sender, bar: indicator.Update(bar)
+        else:
+            consolidator.DataConsolidated += lambda sender, bar: indicator.Update(bar.EndTime, selector(bar))
+        self._subscription_manager.AddConsolidator(symbol, consolidator)
+        return consolidator
+
+    def WarmUpIndicator(self, symbol, indicator, resolution=None):
+        bars = self._history.bars(symbol, indicator.WarmUpPeriod, resolution or self._engine.resolution_of(symbol))
+        for bar in bars:
+            indicator.Update(bar)
+
+    def _helper(self, symbol, indicator, resolution):
+        self.RegisterIndicator(symbol, indicator, resolution)
+        return indicator
+
+    def SMA(self, symbol, period, resolution=None, selector=None):
+        return self._helper(symbol, SimpleMovingAverage(period), resolution)
+
+    def EMA(self, symbol, period, smoothing_factor=None, resolution=None, selector=None):
+        if isinstance(smoothing_factor, Resolution):
+            smoothing_factor, resolution = None, smoothing_factor
+        return self._helper(symbol, ExponentialMovingAverage(period, smoothing_factor), resolution)
+
+    def STD(self, symbol, period, resolution=None, selector=None):
+        return self._helper(symbol, StandardDeviation(period), resolution)
+
+    def RSI(self, symbol, period, moving_average_type=MovingAverageType.Wilders, resolution=None, selector=None):
+        if isinstance(moving_average_type, Resolution):
+            moving_average_type, resolution = MovingAverageType.Wilders, moving_average_type
+        return self._helper(symbol, RelativeStrengthIndex(period, moving_average_type), resolution)
+
+    def MACD(self, symbol, fast_period, slow_period, signal_period, moving_average_type=MovingAverageType.Exponential,
+             resolution=None, selector=None):
+        if isinstance(moving_average_type, Resolution):
+            moving_average_type, resolution = MovingAverageType.Exponential, moving_average_type
+        return self._helper(symbol, MovingAverageConvergenceDivergence(fast_period, slow_period, signal_period, moving_average_type), resolution)
+
+    def BB(self, symbol, period, k, moving_average_type=MovingAverageType.Simple, resolution=None, selector=None):
+        if isinstance(moving_average_type, Resolution):
+            moving_average_type, resolution = MovingAverageType.Simple, moving_average_type
+        return self._helper(symbol, BollingerBands(period, k, moving_average_type), resolution)
+
+    def ADX(self, symbol, period, resolution=None, selector=None):
+        return self._helper(symbol, AverageDirectionalIndex(period), resolution)
+
+    def ATR(self, symbol, period, moving_average_type=MovingAverageType.Wilders, resolution=None, selector=None):
+        if isinstance(moving_average_type, Resolution):
+            moving_average_type, resolution = MovingAverageType.Wilders, moving_average_type
+        return self._helper(symbol, AverageTrueRange(period, moving_average_type), resolution)
+
+    def OBV(self, symbol, resolution=None, selector=None):
+        return self._helper(symbol, OnBalanceVolume(), resolution)
+
+    def LOGR(self, symbol, period, resolution=None, selector=None):
+        return self._helper(symbol, LogReturn(period), resolution)
+
+    def MOMP(self, symbol, period, resolution=None, selector=None):
+        return self._helper(symbol, MomentumPercent(period), resolution)
+
+    def ROC(self, symbol, period, resolution=None, selector=None):
+        return self._helper(symbol, RateOfChange(period), resolution)
+
+    def ROCP(self, symbol, period, resolution=None, selector=None):
+        return self._helper(symbol, RateOfChangePercent(period), resolution)
+
+    # endregion
+
+    # region logging and charts
+
+    def Log(self, message):
+        self._engine.log(self._time, str(message))
+
+    def Debug(self, message):
+        self._engine.log(self._time, str(message))
+
+    def Error(self, message):
+        self._engine.log(self._time, str(message))
+
+    def Quit(self, message=""):
+        self._engine.log(self._time, f"Quit: {message}")
+        self._engine.stopped = True
+
+    def AddChart(self, chart):
+        self._charts[chart.Name] = chart
+
+    def Plot(self, chart, series, value=None):
+        if value is None:
+            chart, series, value = 'Strategy Equity', chart, series
+        target_chart = self._charts.get(chart)
+        if target_chart is None:
+            target_chart = self._charts[chart] = Chart(chart)
+        target_series = target_chart.Series.get(series)
+        if target_series is None:
+            target_series = Series(series)
+            target_chart.AddSeries(target_series)
+        target_series.AddPoint(self._time, float(value))
+
+    # endregion
@@ -0,0 +1,194 @@
+'''
+Latency benchmark of the trend following alpha (custom_alpha) on synthetic hourly bars.
+
+    python -m lean_local.benchmark --sizes 100 600 2000 --output bench.json
+    python -m lean_local.benchmark --output bench.json --baseline baseline.json
+
+For each universe size it reports the p50/p99 latency of custom_alpha.Update and atr_trail_stop_loss,
+the OnSecuritiesChanged (warm-up) time per added symbol and the peak RSS. Each size runs in its own process,
+so that the peak RSS is the one of that size. With --baseline, the results are compared to a stored run
+(written with --save-baseline) and the exit code is 1 when a metric is worse than the baseline by more than
+--tolerance.
+'''
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time as timer
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT = os.path.join(ROOT, 'Exemple-Python-Trend following')
+
+# metrics compared to the baseline, lower is better
+COMPARED = ('update_p50_ms', 'update_p99_ms', 'trail_stop_p99_ms', 'warm_up_ms_per_symbol', 'peak_rss_mb')
+
+
+class Timings:
+    '''
+    Wraps methods of an object to record the duration of each call (in ns)
+    '''
+
+    def __init__(self):
+        self.calls = {}
+        self.counts = {}
+
+    def wrap(self, obj, name, count=None):
+        method = getattr(obj, name)
+        durations = self.calls.setdefault(name, [])
+        counts = self.counts.setdefault(name, [])
+
+        def timed(*args):
+            start = timer.perf_counter_ns()
+            result = method(*args)
+            durations.append(timer.perf_counter_ns() - start)
+            if count is not None:
+                counts.append(count(*args))
+            return result
+        setattr(obj, name, timed)
+
+
+def _percentiles(durations):
+    if not durations:
+        return None, None
+    values = np.asarray(durations) / 1e6
+    return float(np.percentile(values, 50)), float(np.percentile(values, 99))
+
+
+def run_size(size, days, seed, history_days, project=PROJECT):
+    '''
+    Backtests custom_alpha on size synthetic symbols for days trading days, returns the metrics
+    '''
+    import lean_local
+    from lean_local.algorithm import QCAlgorithm
+    from lean_local.common import Resolution
+    from lean_local.framework import InsightWeightingPortfolioConstructionModel
+    from lean_local.universe import ManualUniverseSelectionModel
+
+    lean_local.activate(project)
+    from alpha import custom_alpha
+
+    start = datetime(2021, 1, 4)
+    end = start + timedelta(days=int(days * 7 / 5))
+    data = lean_local.SyntheticData(size, seed=seed, history_days=history_days)
+    timings = Timings()
+
+    class BenchmarkAlgorithm(QCAlgorithm):
+        def Initialize(self):
+            self.SetStartDate(start)
+            self.SetEndDate(end)
+            self.SetCash(1000000)
+            self.UniverseSettings.Resolution = Resolution.Hour
+            self.AddUniverseSelection(ManualUniverseSelectionModel(data.symbols()))
+            self.SetPortfolioConstruction(InsightWeightingPortfolioConstructionModel())
+            self.alpha = custom_alpha(self)
+            timings.wrap(self.alpha, 'Update')
+            timings.wrap(self.alpha, 'atr_trail_stop_loss')
+            timings.wrap(self.alpha, 'OnSecuritiesChanged', lambda algo, changes: len(changes.AddedSecurities))
+            self.SetAlpha(self.alpha)
+
+    with tempfile.TemporaryDirectory() as object_store:
+        began = timer.perf_counter()
+        result = lean_local.Engine(BenchmarkAlgorithm, data, object_store=object_store).run()
+        total = timer.perf_counter() - began
+
+    update_p50, update_p99 = _percentiles(timings.calls['Update'])
+    trail_p50, trail_p99 = _percentiles(timings.calls['atr_trail_stop_loss'])
+    added = sum(timings.counts['OnSecuritiesChanged'])
+    warm_up = sum(timings.calls['OnSecuritiesChanged']) / 1e6
+    return {
+        'symbols': size,
+        'updates': len(timings.calls['Update']),
+        'update_p50_ms': update_p50,
+        'update_p99_ms': update_p99,
+        'update_mean_ms': float(np.mean(timings.calls['Update']) / 1e6) if timings.calls['Update'] else None,
+        'trail_stop_p50_ms': trail_p50,
+        'trail_stop_p99_ms': trail_p99,
+        'warm_up_ms_per_symbol': warm_up / added if added else None,
+        'added_symbols': added,
+        # ru_maxrss is in KB on linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'trades': len(result.orders),
+        'total_s': total,
+    }
+
+
+def run(sizes, days=10, seed=0, history_days=400):
+    results = {}
+    for size in sizes:
+        # a fresh process per size: the peak RSS is not the one of the largest size run before
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            results[str(size)] = pool.submit(run_size, size, days, seed, history_days).result()
+    return {
+        'meta': {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'days': days,
+            'seed': seed,
+            'history_days': history_days,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    '''
+    Metrics worse than the baseline by more than tolerance (a fraction), as messages
+    '''
+    regressions = []
+    for size, metrics in report['results'].items():
+        reference = baseline['results'].get(size)
+        if reference is None:
+            continue
+        for name in COMPARED:
+            value, expected = metrics.get(name), reference.get(name)
+            if value is None or not expected:
+                continue
+            if value > expected * (1 + tolerance):
+                regressions.append(f"{size} symbols: {name} {value:.3f} > {expected:.3f} (+{value / expected - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency benchmark of the trend following alpha")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 600, 2000])
+    parser.add_argument('--days', type=int, default=10, help="trading days backtested after the warm-up")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history-days', type=int, default=400, help="synthetic history before the start date")
+    parser.add_argument('--output', help="JSON file of the results")
+    parser.add_argument('--baseline', help="JSON file of a previous run to compare to")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results to --baseline instead of comparing")
+    parser.add_argument('--tolerance', type=float, default=.2)
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.days, args.seed, args.history_days)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    if args.baseline:
+        if args.save_baseline:
+            with open(args.baseline, 'w') as f:
+                f.write(text)
+            return
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+'''
+Base types of the LEAN stand-in: enums, Symbol, TradeBar, IndicatorDataPoint, RollingWindow, events,
+and the CamelCase / snake_case aliasing that pythonnet gives the real API.
+'''
+import re
+from collections import deque
+from datetime import date, datetime, time, timedelta
+from enum import IntEnum
+
+
+def to_snake(name):
+    return re.sub(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])', '_', name).lower()
+
+
+def to_camel(name):
+    return ''.join(part[:1].upper() + part[1:] for part in name.split('_'))
+
+
+def aliased(cls):
+    '''
+    Class decorator adding a snake_case alias for every CamelCase method and property of cls
+    '''
+    for name, value in list(vars(cls).items()):
+        if name[:1].isupper() and (callable(value) or isinstance(value, (property, staticmethod, classmethod))):
+            snake = to_snake(name)
+            if not any(snake in vars(klass) for klass in cls.__mro__):
+                setattr(cls, snake, value)
+    return cls
+
+
+class Aliased:
+    '''
+    Mixin resolving snake_case reads of CamelCase instance attributes (and the reverse),
+    writes go to the CamelCase attribute when it exists
+    '''
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        other = to_snake(name) if name[:1].isupper() else to_camel(name)
+        if other != name:
+            try:
+                return object.__getattribute__(self, other)
+            except AttributeError:
+                pass
+        raise AttributeError(f"{type(self).__name__} has no attribute {name}")
+
+    def __setattr__(self, name, value):
+        if name[:1].islower() and not name.startswith('_'):
+            camel = to_camel(name)
+            if camel in self.__dict__ or isinstance(getattr(type(self), camel, None), property):
+                name = camel
+        object.__setattr__(self, name, value)
+
+
+def dispatch(obj, name):
+    '''
+    The most derived definition of name or of its snake_case alias on obj
+    (user models override either of them)
+    '''
+    snake = to_snake(name)
+    for klass in type(obj).__mro__:
+        if name in vars(klass):
+            return getattr(obj, name)
+        if snake in vars(klass):
+            return getattr(obj, snake)
+    return None
+
+
+def _enum(name, members):
+    '''
+    IntEnum with CamelCase members and UPPER_SNAKE aliases (Resolution.Hour and Resolution.HOUR)
+    '''
+    items = []
+    for member, value in members.items():
+        items.append((member, value))
+        upper = to_snake(member).upper()
+        if upper != member:
+            items.append((upper, value))
+    return IntEnum(name, items)
+
+
+Resolution = _enum('Resolution', {'Tick': 0, 'Second': 1, 'Minute': 2, 'Hour': 3, 'Daily': 4})
+SecurityType = _enum('SecurityType', {'Base': 0, 'Equity': 1, 'Option': 2, 'Forex': 4, 'Future': 5, 'Cfd': 6, 'Crypto': 7})
+DataNormalizationMode = _enum('DataNormalizationMode', {'Raw': 0, 'Adjusted': 1, 'SplitAdjusted': 2, 'TotalReturn': 3,
+                                                        'ForwardPanamaCanal': 4, 'BackwardsRatio': 5, 'ScaledRaw': 9})
+DayOfWeek = _enum('DayOfWeek', {'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3, 'Friday': 4,
+                                'Saturday': 5, 'Sunday': 6})
+BrokerageName = _enum('BrokerageName', {'Default': 0, 'QuantConnectBrokerage': 0, 'InteractiveBrokersBrokerage': 1,
+                                        'Alpaca': 2, 'Binance': 3, 'Coinbase': 4, 'Bitfinex': 5, 'Kraken': 6})
+AccountType = _enum('AccountType', {'Margin': 0, 'Cash': 1})
+SeriesType = _enum('SeriesType', {'Line': 0, 'Scatter': 1, 'Candle': 2, 'Bar': 3, 'Flag': 4})
+
+RESOLUTION_SPANS = {
+    Resolution.Second: timedelta(seconds=1),
+    Resolution.Minute: timedelta(minutes=1),
+    Resolution.Hour: timedelta(hours=1),
+    Resolution.Daily: timedelta(days=1),
+}
+
+
+class Market:
+    USA = 'usa'
+
+
+class Color:
+    Red = 'red'
+    Green = 'green'
+    Blue = 'blue'
+    Black = 'black'
+    Orange = 'orange'
+    Purple = 'purple'
+    Gray = 'gray'
+
+
+class TimeSpan:
+    Zero = timedelta(0)
+
+    @staticmethod
+    def FromDays(days):
+        return timedelta(days=days)
+
+    @staticmethod
+    def FromHours(hours):
+        return timedelta(hours=hours)
+
+    @staticmethod
+    def FromMinutes(minutes):
+        return timedelta(minutes=minutes)
+
+    @staticmethod
+    def FromSeconds(seconds):
+        return timedelta(seconds=seconds)
+
+
+def Action(function):
+    return function
+
+
+class Event:
+    '''
+    .NET style event: handlers are added with += and removed with -=, and called with (sender, args)
+    '''
+
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+        return self
+
+    def __call__(self, sender, args):
+        for handler in self.handlers:
+            handler(sender, args)
+
+    def __len__(self):
+        return len(self.handlers)
+
+
+class SecurityIdentifier:
+    def __init__(self, ticker, security_type, market):
+        self.Symbol = ticker
+        self.SecurityType = security_type
+        self.Market = market
+
+    def __str__(self):
+        return f"{self.Symbol} {int(self.SecurityType)}"
+
+    __repr__ = __str__
+
+
+@aliased
+class Symbol:
+    '''
+    Interned symbol: Symbol.Create returns the same object for the same ticker, so symbols can be
+    compared and hashed by identity like the real ones
+    '''
+    _symbols = {}
+
+    def __init__(self, ticker, security_type=SecurityType.Equity, market=Market.USA):
+        self.Value = ticker
+        self.ID = SecurityIdentifier(ticker, security_type, market)
+        self.SecurityType = security_type
+
+    @classmethod
+    def Create(cls, ticker, security_type=SecurityType.Equity, market=Market.USA):
+        key = (ticker.upper(), security_type, market)
+        symbol = cls._symbols.get(key)
+        if symbol is None:
+            symbol = cls._symbols[key] = cls(ticker.upper(), security_type, market)
+        return symbol
+
+    @property
+    def value(self):
+        return self.Value
+
+    @property
+    def id(self):
+        return self.ID
+
+    def __str__(self):
+        return self.Value
+
+    __repr__ = __str__
+
+    def __lt__(self, other):
+        return self.Value < other.Value
+
+
+class TradeBar:
+    __slots__ = ('Time', 'EndTime', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume')
+
+    def __init__(self, time=None, symbol=None, open=0.0, high=0.0, low=0.0, close=0.0, volume=0.0, period=timedelta(minutes=1)):
+        self.Time = time
+        self.EndTime = None if time is None else time + period
+        self.Symbol = symbol
+        self.Open = open
+        self.High = high
+        self.Low = low
+        self.Close = close
+        self.Volume = volume
+
+    @property
+    def Period(self):
+        return self.EndTime - self.Time
+
+    @property
+    def Value(self):
+        return self.Close
+
+    Price = Value
+    price = Value
+    value = Value
+    period = Period
+    time = property(lambda self: self.Time)
+    end_time = property(lambda self: self.EndTime)
+    symbol = property(lambda self: self.Symbol)
+    open = property(lambda self: self.Open)
+    high = property(lambda self: self.High)
+    low = property(lambda self: self.Low)
+    close = property(lambda self: self.Close)
+    volume = property(lambda self: self.Volume)
+
+    def __repr__(self):
+        return f"TradeBar({self.Symbol} {self.EndTime} O:{self.Open} H:{self.High} L:{self.Low} C:{self.Close} V:{self.Volume})"
+
+
+class IndicatorDataPoint:
+    __slots__ = ('Symbol', 'Time', 'EndTime', 'Value')
+
+    def __init__(self, *args):
+        # (time, value) or (symbol, time, value)
+        if len(args) == 3:
+            self.Symbol, self.Time, self.Value = args
+        else:
+            self.Symbol = None
+            self.Time, self.Value = args
+        self.EndTime = self.Time
+
+    value = property(lambda self: self.Value)
+    time = property(lambda self: self.Time)
+    end_time = property(lambda self: self.EndTime)
+    symbol = property(lambda self: self.Symbol)
+
+    def __float__(self):
+        return float(self.Value)
+
+    def __repr__(self):
+        return f"{self.Time}: {self.Value}"
+
+
+SplitType = _enum('SplitType', {'Warning': 0, 'SplitOccurred': 1})
+
+
+class Split(Aliased):
+    '''
+    Split of symbol at time: the prices before it times split_factor are comparable with the next ones
+    (0.5 for a 2 for 1 split). The engine never emits them, they are built by the tests.
+    '''
+
+    def __init__(self, symbol, time, price, split_factor, type=SplitType.SplitOccurred):
+        self.Symbol = symbol
+        self.Time = time
+        self.ReferencePrice = price
+        self.SplitFactor = split_factor
+        self.Type = type
+
+
+class Dividend(Aliased):
+    '''
+    Dividend of symbol at time: distribution per share, reference_price the close before the ex-date
+    '''
+
+    def __init__(self, symbol, time, distribution, reference_price):
+        self.Symbol = symbol
+        self.Time = time
+        self.Distribution = distribution
+        self.ReferencePrice = reference_price
+
+
+@aliased
+class RollingWindow:
+    '''
+    Fixed size window, index 0 being the most recent value (RollingWindow[float](size))
+    '''
+
+    def __class_getitem__(cls, item):
+        return cls
+
+    def __init__(self, size):
+        self.Size = size
+        self.window = deque(maxlen=size)
+        self.Samples = 0
+
+    def Add(self, item):
+        self.window.appendleft(item)
+        self.Samples += 1
+
+    def Reset(self):
+        self.window.clear()
+        self.Samples = 0
+
+    @property
+    def Count(self):
+        return len(self.window)
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.Size
+
+    def __getitem__(self, i):
+        return self.window[i]
+
+    def __setitem__(self, i, value):
+        self.window[i] = value
+
+    def __iter__(self):
+        return iter(self.window)
+
+    def __len__(self):
+        return len(self.window)
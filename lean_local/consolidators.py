@@ -0,0 +1,130 @@
+'''
+Trade bar consolidators of the LEAN stand-in: by time span, by calendar period or by bar count.
+'''
+from datetime import datetime, timedelta
+
+from lean_local.common import Event, TradeBar, aliased
+
+_EPOCH = datetime(1900, 1, 1)
+
+
+class Calendar:
+    '''
+    Calendar periods for TradeBarConsolidator, as functions of a time returning (start, end)
+    '''
+
+    @staticmethod
+    def Daily(time):
+        start = datetime(time.year, time.month, time.day)
+        return start, start + timedelta(days=1)
+
+    @staticmethod
+    def Weekly(time):
+        start = datetime(time.year, time.month, time.day) - timedelta(days=time.weekday())
+        return start, start + timedelta(days=7)
+
+    @staticmethod
+    def Monthly(time):
+        start = datetime(time.year, time.month, 1)
+        if time.month == 12:
+            return start, datetime(time.year + 1, 1, 1)
+        return start, datetime(time.year, time.month + 1, 1)
+
+    DAILY = Daily
+    WEEKLY = Weekly
+    MONTHLY = Monthly
+
+
+@aliased
+class TradeBarConsolidator:
+    '''
+    TradeBarConsolidator(timedelta), TradeBarConsolidator(Calendar.Weekly) or TradeBarConsolidator(bar count).
+    A time window is emitted as soon as a bar reaches its end, or when a later bar or Scan arrives.
+    '''
+
+    def __init__(self, period):
+        self.count = None
+        self.window = None
+        if isinstance(period, int):
+            self.count = period
+        elif isinstance(period, timedelta):
+            self.window = lambda time: self._floor(time, period)
+        else:
+            self.window = period
+        self.DataConsolidated = Event()
+        self.Consolidated = None
+        self.working = None
+        self.working_end = None
+        self.working_count = 0
+
+    @staticmethod
+    def _floor(time, period):
+        start = _EPOCH + ((time - _EPOCH) // period) * period
+        return start, start + period
+
+    def Update(self, bar):
+        working = self.working
+        if working is not None and self.count is None and bar.Time >= self.working_end:
+            self._emit()
+            working = None
+        if working is None:
+            if self.count is None:
+                start, end = self.window(bar.Time)
+            else:
+                start, end = bar.Time, bar.EndTime
+            self.working = TradeBar(start, bar.Symbol, bar.Open, bar.High, bar.Low, bar.Close, bar.Volume, end - start)
+            self.working_end = end
+            self.working_count = 1
+        else:
+            if bar.High > working.High:
+                working.High = bar.High
+            if bar.Low < working.Low:
+                working.Low = bar.Low
+            working.Close = bar.Close
+            working.Volume += bar.Volume
+            self.working_count += 1
+            if self.count is not None:
+                working.EndTime = bar.EndTime
+        if self.count is None:
+            if bar.EndTime >= self.working_end:
+                self._emit()
+        elif self.working_count >= self.count:
+            self._emit()
+
+    def Scan(self, time):
+        if self.working is not None and self.count is None and time >= self.working_end:
+            self._emit()
+
+    def Reset(self):
+        self.working = None
+        self.working_count = 0
+        self.Consolidated = None
+
+    def _emit(self):
+        bar = self.working
+        self.working = None
+        self.Consolidated = bar
+        self.DataConsolidated(self, bar)
+
+    data_consolidated = property(lambda self: self.DataConsolidated, lambda self, event: setattr(self, 'DataConsolidated', event))
+
+
+@aliased
+class IdentityDataConsolidator(TradeBarConsolidator):
+    '''
+    Passes every bar through (indicators registered at the resolution of the data)
+    '''
+
+    def __class_getitem__(cls, item):
+        # IdentityDataConsolidator[TradeBar]()
+        return cls
+
+    def __init__(self):
+        super().__init__(1)
+
+    def Update(self, bar):
+        self.Consolidated = bar
+        self.DataConsolidated(self, bar)
+
+    def Scan(self, time):
+        pass
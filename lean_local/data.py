@@ -0,0 +1,247 @@
+'''
+Data sources of the LEAN stand-in. A data source gives the bars of a symbol as columnar arrays (BarArrays)
+at its native resolution, plus the fundamentals and ETF constituents used by universe selection.
+'''
+import os
+import zlib
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+from lean_local.common import Resolution, Symbol, TradeBar
+
+SECTOR_CODES = (101, 102, 103, 104, 205, 206, 207, 308, 309, 310, 311)
+
+
+def make_bar(start, end, symbol, open_, high, low, close, volume):
+    bar = TradeBar.__new__(TradeBar)
+    bar.Time = start
+    bar.EndTime = end
+    bar.Symbol = symbol
+    bar.Open = open_
+    bar.High = high
+    bar.Low = low
+    bar.Close = close
+    bar.Volume = volume
+    return bar
+
+
+class BarArrays:
+    '''
+    Bars of one symbol: time and end_time (datetime64[us]) and values, one (open, high, low, close, volume) row per bar
+    '''
+
+    def __init__(self, symbol, time, end_time, values, times=None, end_times=None):
+        self.symbol = symbol
+        self.time = time
+        self.end_time = end_time
+        self.values = values
+        # datetime lists, shared between the symbols of a common calendar
+        self._times = times
+        self._end_times = end_times
+        self._daily = None
+
+    def __len__(self):
+        return len(self.end_time)
+
+    @property
+    def close(self):
+        return self.values[:, 3]
+
+    @property
+    def times(self):
+        if self._times is None:
+            self._times = self.time.tolist()
+        return self._times
+
+    @property
+    def end_times(self):
+        if self._end_times is None:
+            self._end_times = self.end_time.tolist()
+        return self._end_times
+
+    def bar(self, i):
+        return make_bar(self.times[i], self.end_times[i], self.symbol, *self.values[i].tolist())
+
+    def daily(self):
+        '''
+        Bars aggregated from midnight to midnight, like a daily TradeBarConsolidator
+        '''
+        if self._daily is None:
+            self._daily = self.aggregate(np.timedelta64(1, 'D'))
+        return self._daily
+
+    def aggregate(self, span):
+        '''
+        Bars aggregated over the periods of length span (a numpy timedelta64) starting at midnight
+        '''
+        buckets = self.time.astype('datetime64[D]') + ((self.time - self.time.astype('datetime64[D]')) // span) * span
+        if len(buckets):
+            starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+            ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+        else:
+            starts = ends = np.zeros(0, dtype=int)
+        values = np.empty((len(starts), 5))
+        if len(starts):
+            values[:, 0] = self.values[starts, 0]
+            values[:, 1] = np.maximum.reduceat(self.values[:, 1], starts)
+            values[:, 2] = np.minimum.reduceat(self.values[:, 2], starts)
+            values[:, 3] = self.values[ends, 3]
+            values[:, 4] = np.add.reduceat(self.values[:, 4], starts)
+        start = buckets[starts].astype('datetime64[us]')
+        return BarArrays(self.symbol, start, start + span, values)
+
+
+class DataSource:
+    '''
+    Base of the data sources: arrays(symbol) are the native bars, symbols() the universe of fundamentals
+    '''
+    resolution = Resolution.Hour
+
+    def prepare(self, start, end):
+        '''
+        Called by the engine with the range of the backtest (warm-up included) before the first bar is read
+        '''
+
+    def symbols(self):
+        return []
+
+    def arrays(self, symbol):
+        raise NotImplementedError
+
+    def calendar(self):
+        '''
+        End times of all the bars
+        '''
+        ends = [self.arrays(symbol).end_time for symbol in self.symbols()]
+        return np.unique(np.concatenate(ends)) if ends else np.zeros(0, dtype='datetime64[us]')
+
+    def fundamental(self, symbol):
+        '''
+        (shares outstanding, morningstar sector code) of symbol
+        '''
+        return 0.0, 0
+
+    def constituents(self, etf_symbol):
+        '''
+        [(symbol, weight)] of an ETF
+        '''
+        return [(symbol, 1 / max(1, len(self.symbols()))) for symbol in self.symbols()]
+
+
+class SyntheticData(DataSource):
+    '''
+    Reproducible geometric brownian motion bars on weekdays, from history_days before start to end
+    (by default the range of the backtest): 7 hourly bars ending 10:00 to 16:00, 390 minute bars
+    or one daily bar per day. Any ticker can be requested, the first n are the universe.
+    '''
+
+    def __init__(self, symbols=100, start=None, end=None, seed=0, history_days=365, resolution=Resolution.Hour):
+        if isinstance(symbols, int):
+            symbols = [f"S{i:04d}" for i in range(symbols)]
+        self.universe = [s if isinstance(s, Symbol) else Symbol.Create(s) for s in symbols]
+        self.seed = seed
+        self.history_days = history_days
+        self.resolution = resolution
+        self.cache = {}
+        self.time = None
+        if start is not None and end is not None:
+            self.prepare(start, end)
+
+    def prepare(self, start, end):
+        if self.time is not None:
+            return
+        days = np.arange(np.datetime64(start - timedelta(days=self.history_days), 'D'), np.datetime64(end, 'D') + 1)
+        days = days[np.is_busday(days)]
+        if self.resolution == Resolution.Daily:
+            starts = np.array([0], dtype='timedelta64[m]')
+            ends = np.array([24 * 60], dtype='timedelta64[m]')
+        elif self.resolution == Resolution.Minute:
+            starts = np.arange(9 * 60 + 30, 16 * 60).astype('timedelta64[m]')
+            ends = starts + np.timedelta64(1, 'm')
+        else:
+            starts = np.array([9 * 60 + 30] + [h * 60 for h in range(10, 16)], dtype='timedelta64[m]')
+            ends = (np.arange(10, 17) * 60).astype('timedelta64[m]')
+        self.time = (days[:, None] + starts[None, :]).ravel().astype('datetime64[us]')
+        self.end_time = (days[:, None] + ends[None, :]).ravel().astype('datetime64[us]')
+        self.bars_per_day = len(starts)
+        self._times = self.time.tolist()
+        self._end_times = self.end_time.tolist()
+
+    def symbols(self):
+        return self.universe
+
+    def _rng(self, symbol):
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.Value.encode())])
+
+    def arrays(self, symbol):
+        arrays = self.cache.get(symbol)
+        if arrays is None:
+            rng = self._rng(symbol)
+            n = len(self.time)
+            drift = rng.normal(.0003, .0005) / self.bars_per_day
+            volatility = rng.uniform(.01, .03) / np.sqrt(self.bars_per_day)
+            returns = rng.normal(drift, volatility, n)
+            close = rng.uniform(20, 300) * np.exp(np.cumsum(returns))
+            open_ = np.concatenate(([close[0]], close[:-1])) * (1 + rng.normal(0, volatility / 4, n))
+            wick = np.abs(rng.normal(0, volatility / 2, (2, n)))
+            values = np.empty((n, 5))
+            values[:, 0] = open_
+            values[:, 1] = np.maximum(open_, close) * (1 + wick[0])
+            values[:, 2] = np.minimum(open_, close) * (1 - wick[1])
+            values[:, 3] = close
+            values[:, 4] = np.round(rng.lognormal(np.log(rng.uniform(1e5, 5e6) / self.bars_per_day), .5, n))
+            arrays = self.cache[symbol] = BarArrays(symbol, self.time, self.end_time, values, self._times, self._end_times)
+        return arrays
+
+    def calendar(self):
+        return self.end_time
+
+    def fundamental(self, symbol):
+        rng = self._rng(symbol)
+        return rng.uniform(5e7, 5e9), SECTOR_CODES[rng.integers(len(SECTOR_CODES))]
+
+    def constituents(self, etf_symbol):
+        weights = np.random.default_rng([self.seed, zlib.crc32(etf_symbol.Value.encode())]).dirichlet(np.ones(len(self.universe)))
+        return list(zip(self.universe, weights.tolist()))
+
+
+class CsvData(DataSource):
+    '''
+    Bars read from folder/<TICKER>.csv with the columns time, end_time (optional), open, high, low, close, volume.
+    fundamentals is an optional {ticker: (shares outstanding, sector code)}.
+    '''
+
+    def __init__(self, folder, resolution=Resolution.Hour, fundamentals=None):
+        self.folder = folder
+        self.resolution = resolution
+        self.fundamentals = fundamentals or {}
+        self.cache = {}
+
+    def symbols(self):
+        return [Symbol.Create(name[:-4]) for name in sorted(os.listdir(self.folder)) if name.endswith('.csv')]
+
+    def arrays(self, symbol):
+        arrays = self.cache.get(symbol)
+        if arrays is None:
+            path = os.path.join(self.folder, f"{symbol.Value}.csv")
+            if os.path.exists(path):
+                frame = pd.read_csv(path, parse_dates=['time'] + (['end_time'] if 'end_time' in pd.read_csv(path, nrows=0).columns else []))
+                frame = frame.sort_values('time')
+                start = frame['time'].values.astype('datetime64[us]')
+                if 'end_time' in frame:
+                    end = frame['end_time'].values.astype('datetime64[us]')
+                else:
+                    span = {Resolution.Daily: np.timedelta64(1, 'D'), Resolution.Hour: np.timedelta64(1, 'h'),
+                            Resolution.Minute: np.timedelta64(1, 'm')}[self.resolution]
+                    end = start + span
+                values = frame[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=float)
+            else:
+                start = end = np.zeros(0, dtype='datetime64[us]')
+                values = np.zeros((0, 5))
+            arrays = self.cache[symbol] = BarArrays(symbol, start, end, values)
+        return arrays
+
+    def fundamental(self, symbol):
+        return self.fundamentals.get(symbol.Value, (0.0, 0))
@@ -0,0 +1,389 @@
+'''
+Backtest loop of the LEAN stand-in. Each time step of the data runs, in order: universe selection (once a day),
+scheduled events, consolidators and OnData, then the framework models (alphas, portfolio construction,
+risk management, execution), and records the portfolio value.
+'''
+import tempfile
+import time as timer
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from lean_local.algorithm import ObjectStore, OrderTicket, QCAlgorithm, Security, Slice
+from lean_local.common import RESOLUTION_SPANS, DataNormalizationMode, Resolution, Symbol, dispatch
+from lean_local.framework import SecurityChanges
+from lean_local.universe import UNCHANGED, Fundamental
+
+
+class BacktestResult:
+    def __init__(self, algorithm, times, equity, orders, logs, runtime, steps):
+        self.algorithm = algorithm
+        self.times = times
+        self.equity = np.asarray(equity, dtype=float)
+        self.orders = orders
+        self.logs = logs
+        self.charts = algorithm._charts
+        self.runtime = runtime
+        self.steps = steps
+
+    @property
+    def statistics(self):
+        equity = self.equity
+        if len(equity) == 0:
+            return {'steps': self.steps, 'runtime': self.runtime}
+        peak = np.maximum.accumulate(equity)
+        return {
+            'start_value': float(equity[0]),
+            'end_value': float(equity[-1]),
+            'total_return': float(equity[-1] / equity[0] - 1),
+            'max_drawdown': float(np.max(1 - equity / peak)),
+            'trades': len(self.orders),
+            'steps': self.steps,
+            'runtime': self.runtime,
+        }
+
+
+class Engine:
+    '''
+    Engine(algorithm class or instance, data source).run() backtests the algorithm between its start and end dates,
+    after its warm-up. parameters are returned by GetParameter, object_store is the folder of the ObjectStore
+    (None: a temporary folder removed after the run, so nothing is written in the workspace).
+    '''
+
+    def __init__(self, algorithm, data, parameters=None, object_store=None, verbose=False):
+        self.algorithm = algorithm() if isinstance(algorithm, type) else algorithm
+        self.data = data
+        self.parameters = {k: str(v) for k, v in (parameters or {}).items()}
+        self.object_store = object_store
+        self.verbose = verbose
+        self.logs = []
+        self.orders = []
+        self.stopped = False
+
+        # subscriptions: symbol -> [arrays, next bar index, resolution]
+        self.feeds = {}
+        self.universe_members = {}
+        self.pending_added = []
+        self.pending_removed = []
+        self.fundamentals_day = None
+        self.fundamentals_cache = {}
+        self.fundamentals_list = []
+        self.months = {}
+        self.weeks = {}
+        self.time = None
+        self.prepared = False
+
+    # region services used by the algorithm
+
+    def log(self, time, message):
+        self.logs.append((time, message))
+        if self.verbose:
+            print(f"{time} {message}")
+
+    def resolution_of(self, symbol):
+        feed = self.feeds.get(symbol)
+        return feed[2] if feed else self.algorithm.UniverseSettings.Resolution
+
+    def arrays(self, symbol, resolution):
+        if resolution == self.data.resolution or resolution is None:
+            return self.data.arrays(symbol)
+        native = RESOLUTION_SPANS[self.data.resolution]
+        span = RESOLUTION_SPANS[resolution]
+        if span == timedelta(days=1):
+            return self.data.arrays(symbol).daily()
+        if span > native:
+            return self.data.arrays(symbol).aggregate(np.timedelta64(span))
+        name = Resolution(resolution).name
+        raise ValueError(f"{name} bars are not available from {Resolution(self.data.resolution).name} data, "
+                         f"the data must be of resolution {name} or finer (--resolution {name})")
+
+    def subscribed_resolution(self):
+        '''
+        Finest resolution of the subscriptions made in Initialize, universe settings included when the
+        algorithm has a universe
+        '''
+        algorithm = self.algorithm
+        resolutions = [feed[2] for feed in self.feeds.values() if feed[2] is not None]
+        if algorithm._universe_models or not resolutions:
+            resolutions.append(algorithm.UniverseSettings.Resolution)
+        return min(resolutions, key=lambda resolution: RESOLUTION_SPANS[resolution])
+
+    def subscribe(self, symbol, resolution, data_normalization_mode=None):
+        algorithm = self.algorithm
+        security = algorithm.Securities.get(symbol)
+        if security is None:
+            if data_normalization_mode is None:
+                data_normalization_mode = DataNormalizationMode.Adjusted
+            security = Security(algorithm, symbol, resolution, algorithm.UniverseSettings.Leverage, data_normalization_mode)
+            dict.__setitem__(algorithm.Securities, symbol, security)
+            if algorithm._security_initializer is not None:
+                algorithm._security_initializer(security)
+        if symbol not in self.feeds and not self.prepared:
+            # subscriptions of Initialize, the data source is prepared once the dates are known
+            self.feeds[symbol] = [None, 0, resolution]
+        elif symbol not in self.feeds:
+            arrays = self.arrays(symbol, resolution)
+            start = 0 if self.time is None else int(np.searchsorted(arrays.end_time, np.datetime64(self.time, 'us'), side='right'))
+            self.feeds[symbol] = [arrays, start, resolution]
+            if start > 0:
+                security.update(arrays.bar(start - 1))
+        if symbol not in algorithm.ActiveSecurities:
+            dict.__setitem__(algorithm.ActiveSecurities, symbol, security)
+            self.pending_added.append(security)
+        return security
+
+    def unsubscribe(self, symbol):
+        security = self.algorithm.ActiveSecurities.pop(symbol, None)
+        if security is None:
+            return
+        self.pending_removed.append(security)
+        self.algorithm.SubscriptionManager.consolidators.pop(symbol, None)
+        # the prices of a security still held keep being updated
+        if not security.Holdings.Quantity:
+            self.feeds.pop(symbol, None)
+
+    def fundamentals(self, time):
+        day = time.date()
+        if self.fundamentals_day != day:
+            limit = np.datetime64(datetime.combine(day, datetime.min.time()), 'us')
+            result = []
+            for symbol in self.data.symbols():
+                daily = self.arrays(symbol, self.data.resolution).daily()
+                i = int(np.searchsorted(daily.end_time, limit, side='right')) - 1
+                if i < 0:
+                    continue
+                price, volume = daily.values[i, 3], daily.values[i, 4]
+                shares, sector = self.fundamentals_cache.get(symbol) or self.fundamentals_cache.setdefault(symbol, self.data.fundamental(symbol))
+                result.append(Fundamental(symbol, float(price), float(volume), float(shares * price), sector))
+            self.fundamentals_day = day
+            self.fundamentals_list = result
+        return self.fundamentals_list
+
+    def fundamental(self, symbol, time):
+        shares, sector = self.fundamentals_cache.get(symbol) or self.fundamentals_cache.setdefault(symbol, self.data.fundamental(symbol))
+        security = self.algorithm.Securities.get(symbol)
+        price = security.Price if security is not None else 0.0
+        return Fundamental(symbol, price, security.Volume if security is not None else 0.0, shares * price, sector)
+
+    def constituents(self, etf_symbol, time):
+        return self.data.constituents(etf_symbol)
+
+    def trading_day_of_month(self, day):
+        return self.months.get(day, -1)
+
+    def trading_day_of_week(self, day):
+        return self.weeks.get(day, -1)
+
+    def fill(self, symbol, quantity, tag=""):
+        algorithm = self.algorithm
+        security = algorithm.Securities.get(symbol)
+        if security is None or quantity == 0:
+            return None
+        price = security.Price
+        if price == 0:
+            self.log(self.time, f"Order for {symbol} ignored: no price yet")
+            return None
+        holding = security.Holdings
+        held = holding.Quantity
+        after = held + quantity
+        if held == 0 or (held > 0) == (quantity > 0):
+            holding.AveragePrice = (holding.AveragePrice * abs(held) + price * abs(quantity)) / abs(after)
+        else:
+            closed = min(abs(quantity), abs(held))
+            holding.Profit += (price - holding.AveragePrice) * closed * (1 if held > 0 else -1)
+            if after == 0:
+                holding.AveragePrice = 0.0
+            elif (after > 0) != (held > 0):
+                holding.AveragePrice = price
+        holding.Quantity = after
+        algorithm.Portfolio.Cash -= quantity * price
+        ticket = OrderTicket(len(self.orders) + 1, symbol, quantity, price, self.time, tag)
+        self.orders.append(ticket)
+        algorithm.Transactions.orders.append(ticket)
+        if after == 0 and symbol not in algorithm.ActiveSecurities:
+            self.feeds.pop(symbol, None)
+        return ticket
+
+    # endregion
+
+    def _calendar(self, start, end):
+        # end times of the bars of the data source and of the subscriptions, between start and end
+        ends = [self.data.calendar()] + [feed[0].end_time for feed in self.feeds.values()]
+        steps = np.unique(np.concatenate(ends))
+        return steps[(steps > np.datetime64(start, 'us')) & (steps <= np.datetime64(end, 'us'))]
+
+    def _warm_up_start(self, algorithm):
+        if algorithm._warm_up is None:
+            return algorithm.StartDate
+        period, resolution = algorithm._warm_up
+        if isinstance(period, timedelta):
+            return algorithm.StartDate - period
+        span = RESOLUTION_SPANS[resolution or algorithm.UniverseSettings.Resolution]
+        # bars are counted during market hours only
+        if span < timedelta(days=1):
+            return algorithm.StartDate - timedelta(days=int(period * span / timedelta(hours=6.5) * 7 / 5) + 2)
+        return algorithm.StartDate - timedelta(days=int(period * 7 / 5) + 2)
+
+    def _select(self, day_start):
+        algorithm = self.algorithm
+        for model in algorithm._universe_models:
+            selected = dispatch(model, 'Select')(algorithm, day_start)
+            if selected is UNCHANGED or selected is None:
+                continue
+            selected = [Symbol.Create(s) if isinstance(s, str) else s for s in selected]
+            previous = self.universe_members.get(id(model), set())
+            members = set(selected)
+            for symbol in selected:
+                if symbol not in previous:
+                    self.subscribe(symbol, algorithm.UniverseSettings.Resolution, algorithm.UniverseSettings.DataNormalizationMode)
+            for symbol in previous - members:
+                if not any(symbol in other for key, other in self.universe_members.items() if key != id(model)):
+                    self.unsubscribe(symbol)
+            self.universe_members[id(model)] = members
+
+    def _security_changes(self):
+        if not (self.pending_added or self.pending_removed):
+            return
+        algorithm = self.algorithm
+        changes = SecurityChanges(self.pending_added, self.pending_removed)
+        self.pending_added = []
+        self.pending_removed = []
+        for model in algorithm._alphas + [algorithm._portfolio_construction, algorithm._execution] + algorithm._risk_management:
+            handler = dispatch(model, 'OnSecuritiesChanged')
+            if handler is not None:
+                handler(algorithm, changes)
+        dispatch(algorithm, 'OnSecuritiesChanged')(changes)
+
+    def _day_events(self, day):
+        events = []
+        for date_rule, time_rule, action in self.algorithm.Schedule.events:
+            if date_rule(day, self):
+                events.extend((at, i, action) for i, at in enumerate(time_rule(day)))
+        events.sort(key=lambda event: event[:2])
+        return events
+
+    def run(self):
+        if self.object_store is not None:
+            return self._run(self.object_store)
+        with tempfile.TemporaryDirectory() as object_store:
+            return self._run(object_store)
+
+    def _run(self, object_store):
+        algorithm = self.algorithm
+        algorithm._engine = self
+        algorithm._object_store = ObjectStore(object_store)
+        dispatch(algorithm, 'Initialize')()
+
+        start = algorithm.StartDate
+        end = algorithm.EndDate + timedelta(days=1)
+        first = self._warm_up_start(algorithm)
+        if self.data.resolution is None:
+            # data source created without a resolution: the one the algorithm subscribes to
+            self.data.resolution = self.subscribed_resolution()
+        self.data.prepare(first, end)
+        self.prepared = True
+        for symbol, feed in self.feeds.items():
+            feed[0] = self.arrays(symbol, feed[2])
+        steps = self._calendar(first, end)
+        step_times = steps.tolist()
+        step_days = steps.astype('datetime64[D]')
+
+        # trading day index within each month and week, for the date rules
+        unique_days = np.unique(step_days).tolist()
+        for i, day in enumerate(unique_days):
+            previous = unique_days[i - 1] if i else None
+            same_month = previous is not None and (previous.year, previous.month) == (day.year, day.month)
+            same_week = previous is not None and previous.isocalendar()[:2] == day.isocalendar()[:2]
+            self.months[day] = self.months[previous] + 1 if same_month else 0
+            self.weeks[day] = self.weeks[previous] + 1 if same_week else 0
+
+        alphas = algorithm._alphas
+        pcm = algorithm._portfolio_construction
+        risk_models = algorithm._risk_management
+        execution = algorithm._execution
+        on_data = dispatch(algorithm, 'OnData')
+        has_on_data = on_data.__func__ is not QCAlgorithm.OnData if hasattr(on_data, '__func__') else True
+        consolidators = algorithm.SubscriptionManager.consolidators
+        start_time = timer.perf_counter()
+        equity_times = []
+        equity = []
+        algorithm._warming_up = first < start
+        current_day = None
+        events = []
+        event_index = 0
+
+        for t in step_times:
+            if self.stopped:
+                break
+            day = t.date()
+            if day != current_day:
+                current_day = day
+                day_start = datetime.combine(day, datetime.min.time())
+                self.time = algorithm._time = day_start
+                for symbol, symbol_consolidators in consolidators.items():
+                    for consolidator in symbol_consolidators:
+                        consolidator.Scan(day_start)
+                self._select(day_start)
+                self._security_changes()
+                events = self._day_events(day)
+                event_index = 0
+
+            if algorithm._warming_up and t >= start:
+                algorithm._warming_up = False
+                dispatch(algorithm, 'OnWarmupFinished')()
+
+            while event_index < len(events) and events[event_index][0] <= t:
+                at, _, action = events[event_index]
+                event_index += 1
+                self.time = algorithm._time = at
+                action()
+
+            self.time = algorithm._time = t
+            bars = {}
+            securities = algorithm.Securities
+            for symbol, feed in self.feeds.items():
+                arrays, i = feed[0], feed[1]
+                if i < len(arrays.end_times) and arrays.end_times[i] <= t:
+                    # skip the bars of a gap (e.g. CSV data with missing steps)
+                    while i + 1 < len(arrays.end_times) and arrays.end_times[i + 1] <= t:
+                        i += 1
+                    bar = arrays.bar(i)
+                    feed[1] = i + 1
+                    bars[symbol] = bar
+                    securities[symbol].update(bar)
+            for symbol, bar in bars.items():
+                symbol_consolidators = consolidators.get(symbol)
+                if symbol_consolidators:
+                    for consolidator in list(symbol_consolidators):
+                        consolidator.Update(bar)
+
+            data = Slice(t, bars)
+            algorithm._current_slice = data
+            if has_on_data and bars:
+                on_data(data)
+
+            if alphas and bars:
+                insights = []
+                for alpha in alphas:
+                    generated = dispatch(alpha, 'Update')(algorithm, data)
+                    if generated:
+                        for insight in generated:
+                            insight.set_generated(t)
+                        insights.extend(generated)
+                if not algorithm._warming_up:
+                    targets = dispatch(pcm, 'CreateTargets')(algorithm, insights) or []
+                    for risk in risk_models:
+                        risk_targets = dispatch(risk, 'ManageRisk')(algorithm, targets) or []
+                        if risk_targets:
+                            overridden = {target.Symbol for target in risk_targets}
+                            targets = [target for target in targets if target.Symbol not in overridden] + list(risk_targets)
+                    if targets:
+                        dispatch(execution, 'Execute')(algorithm, targets)
+            self._security_changes()
+
+            if not algorithm._warming_up:
+                equity_times.append(t)
+                equity.append(algorithm.Portfolio.TotalPortfolioValue)
+
+        dispatch(algorithm, 'OnEndOfAlgorithm')()
+        return BacktestResult(algorithm, equity_times, equity, self.orders, self.logs, timer.perf_counter() - start_time, len(step_times))
@@ -0,0 +1,347 @@
+'''
+Algorithm framework of the LEAN stand-in: insights, portfolio targets, and the alpha, portfolio construction,
+execution and risk management models used by the projects of this workspace.
+'''
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from lean_local.common import Aliased, Resolution, TradeBar, _enum, aliased, dispatch, to_snake
+
+InsightDirection = _enum('InsightDirection', {'Down': -1, 'Flat': 0, 'Up': 1})
+InsightType = _enum('InsightType', {'Price': 0, 'Volatility': 1})
+PortfolioBias = _enum('PortfolioBias', {'Short': -1, 'LongShort': 0, 'Long': 1})
+
+
+class Expiry:
+    '''
+    Expiry functions: the time an insight generated at time expires at
+    '''
+
+    @staticmethod
+    def EndOfDay(time):
+        return datetime(time.year, time.month, time.day) + timedelta(days=1)
+
+    @staticmethod
+    def EndOfWeek(time):
+        return datetime(time.year, time.month, time.day) + timedelta(days=7 - time.weekday())
+
+    @staticmethod
+    def EndOfMonth(time):
+        if time.month == 12:
+            return datetime(time.year + 1, 1, 1)
+        return datetime(time.year, time.month + 1, 1)
+
+    @staticmethod
+    def OneMonth(time):
+        return time + timedelta(days=30)
+
+    END_OF_DAY = EndOfDay
+    END_OF_WEEK = EndOfWeek
+    END_OF_MONTH = EndOfMonth
+    ONE_MONTH = OneMonth
+
+
+@aliased
+class Insight(Aliased):
+    def __init__(self, symbol, period, type=InsightType.Price, direction=InsightDirection.Flat, magnitude=None,
+                 confidence=None, source_model=None, weight=None, tag=""):
+        self.Symbol = symbol
+        self.Period = period
+        self.Type = type
+        self.Direction = direction
+        self.Magnitude = magnitude
+        self.Confidence = confidence
+        self.SourceModel = source_model
+        self.Weight = weight
+        self.Tag = tag
+        self.GeneratedTimeUtc = None
+        self.CloseTimeUtc = None
+
+    @staticmethod
+    def Price(symbol, period, direction, magnitude=None, confidence=None, source_model=None, weight=None, tag=""):
+        return Insight(symbol, period, InsightType.Price, direction, magnitude, confidence, source_model, weight, tag)
+
+    def set_generated(self, time):
+        self.GeneratedTimeUtc = time
+        period = self.Period
+        if isinstance(period, timedelta):
+            self.CloseTimeUtc = time + period
+        elif callable(period):
+            self.CloseTimeUtc = period(time)
+        else:
+            # a number of bars: hourly bars unless told otherwise
+            self.CloseTimeUtc = time + timedelta(hours=period)
+
+    def IsActive(self, utc_time):
+        return self.CloseTimeUtc is None or utc_time < self.CloseTimeUtc
+
+    def IsExpired(self, utc_time):
+        return not self.IsActive(utc_time)
+
+    def __repr__(self):
+        return f"Insight({self.Symbol} {self.Direction.name} until {self.CloseTimeUtc} weight {self.Weight})"
+
+
+@aliased
+class PortfolioTarget(Aliased):
+    def __init__(self, symbol, quantity, tag=""):
+        self.Symbol = symbol
+        self.Quantity = quantity
+        self.Tag = tag
+
+    @staticmethod
+    def Percent(algorithm, symbol, percent, return_delta_quantity=False, tag=""):
+        security = algorithm.Securities[symbol]
+        if security.Price == 0:
+            return None
+        quantity = math.trunc(percent * algorithm.Portfolio.TotalPortfolioValue / security.Price)
+        if return_delta_quantity:
+            quantity -= algorithm.Portfolio[symbol].Quantity
+        return PortfolioTarget(symbol, quantity, tag)
+
+    def __repr__(self):
+        return f"PortfolioTarget({self.Symbol} {self.Quantity})"
+
+
+@aliased
+class SecurityChanges(Aliased):
+    def __init__(self, added, removed):
+        self.AddedSecurities = added
+        self.RemovedSecurities = removed
+
+    def __repr__(self):
+        return f"SecurityChanges(added {[s.Symbol for s in self.AddedSecurities]}, removed {[s.Symbol for s in self.RemovedSecurities]})"
+
+
+@aliased
+class AlphaModel:
+    def Update(self, algorithm, data):
+        return []
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+    @property
+    def Name(self):
+        return type(self).__name__
+
+
+@aliased
+class PearsonCorrelationPairsTradingAlphaModel(AlphaModel):
+    '''
+    Only holds the parameters: Update calls the generate_insights of the subclass
+    (FilteredPairsAlphaModel brings its own pairs and spread logic)
+    '''
+
+    def __init__(self, lookback=15, resolution=Resolution.Minute, threshold=1, minimum_correlation=.5):
+        self.lookback = lookback
+        self.resolution = resolution
+        self.threshold = threshold
+        self.minimum_correlation = minimum_correlation
+
+    def Update(self, algorithm, data):
+        generate = getattr(self, 'generate_insights', None)
+        return generate(algorithm, data) if generate is not None else []
+
+
+@aliased
+class PortfolioConstructionModel:
+    '''
+    Keeps the latest active insight per symbol and asks DetermineTargetPercent for the targets
+    when the insights change or when the rebalance time (a timedelta or a function of the time) is reached
+    '''
+
+    def __init__(self, rebalance=None, portfolio_bias=PortfolioBias.LongShort):
+        self.rebalance = rebalance
+        self.portfolio_bias = portfolio_bias
+        self.RebalancePortfolioOnSecurityChanges = True
+        self.RebalancePortfolioOnInsightChanges = True
+
+    def _state(self):
+        if '_active' not in self.__dict__:
+            self._active = {}
+            self._removed = set()
+            self._next_rebalance = None
+            for name, value in (('rebalance', None), ('portfolio_bias', PortfolioBias.LongShort),
+                                ('RebalancePortfolioOnSecurityChanges', True), ('RebalancePortfolioOnInsightChanges', True)):
+                if name not in self.__dict__:
+                    setattr(self, name, value)
+        return self._active
+
+    def _flag(self, algorithm, name):
+        # set on the model (either case) or on algorithm.Settings
+        value = self.__dict__.get(to_snake(name), self.__dict__.get(name, True))
+        return value and getattr(algorithm.Settings, name, True) is not False
+
+    def _next_rebalance_time(self, time):
+        if isinstance(self.rebalance, timedelta):
+            return time + self.rebalance
+        if callable(self.rebalance):
+            return self.rebalance(time)
+        return None
+
+    def CreateTargets(self, algorithm, insights):
+        active = self._state()
+        now = algorithm.Time
+        for insight in insights:
+            active[insight.Symbol] = insight
+        expired = [symbol for symbol, insight in active.items() if not insight.IsActive(now)]
+        for symbol in expired:
+            del active[symbol]
+
+        if self._next_rebalance is None and self.rebalance is not None:
+            self._next_rebalance = self._next_rebalance_time(now)
+        due = self._next_rebalance is not None and now >= self._next_rebalance
+        insight_changes = (len(insights) > 0 or len(expired) > 0) and self._flag(algorithm, 'RebalancePortfolioOnInsightChanges')
+        security_changes = len(self._removed) > 0 and self._flag(algorithm, 'RebalancePortfolioOnSecurityChanges')
+        if not (due or insight_changes or security_changes):
+            return []
+        if due:
+            following = self._next_rebalance_time(now)
+            self._next_rebalance = following if following is not None and following > now else None
+
+        targets = {}
+        percents = dispatch(self, 'DetermineTargetPercent')(list(active.values())) if active else {}
+        for insight, percent in percents.items():
+            if self.portfolio_bias == PortfolioBias.Long:
+                percent = max(percent, 0)
+            elif self.portfolio_bias == PortfolioBias.Short:
+                percent = min(percent, 0)
+            target = PortfolioTarget.Percent(algorithm, insight.Symbol, percent)
+            if target is not None:
+                targets[insight.Symbol] = target
+        for symbol in expired + list(self._removed):
+            if symbol not in targets:
+                targets[symbol] = PortfolioTarget(symbol, 0)
+        self._removed.clear()
+        return list(targets.values())
+
+    def DetermineTargetPercent(self, active_insights):
+        return {insight: 0 for insight in active_insights}
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        active = self._state()
+        for security in changes.RemovedSecurities:
+            active.pop(security.Symbol, None)
+            self._removed.add(security.Symbol)
+
+
+@aliased
+class EqualWeightingPortfolioConstructionModel(PortfolioConstructionModel):
+    def DetermineTargetPercent(self, active_insights):
+        count = sum(1 for insight in active_insights if insight.Direction != InsightDirection.Flat)
+        percent = 0 if count == 0 else 1.0 / count
+        return {insight: insight.Direction * percent for insight in active_insights}
+
+
+@aliased
+class InsightWeightingPortfolioConstructionModel(PortfolioConstructionModel):
+    def DetermineTargetPercent(self, active_insights):
+        total = sum(abs(insight.Weight or 0) for insight in active_insights)
+        scale = 1.0 / total if total > 1 else 1.0
+        return {insight: insight.Direction * abs(insight.Weight or 0) * scale for insight in active_insights}
+
+
+@aliased
+class RiskParityPortfolioConstructionModel(PortfolioConstructionModel):
+    '''
+    Stand-in: inverse volatility of the daily returns instead of the full risk parity optimisation
+    '''
+
+    def __init__(self, rebalance=None, portfolio_bias=PortfolioBias.LongShort, lookback=1, period=252, resolution=Resolution.Daily):
+        super().__init__(rebalance, portfolio_bias)
+        self.period = period
+        self.resolution = resolution
+        self.algorithm = None
+
+    def CreateTargets(self, algorithm, insights):
+        self.algorithm = algorithm
+        return super().CreateTargets(algorithm, insights)
+
+    def DetermineTargetPercent(self, active_insights):
+        symbols = [insight.Symbol for insight in active_insights]
+        history = self.algorithm.History[TradeBar](symbols, self.period, self.resolution)
+        closes = {symbol: [] for symbol in symbols}
+        for bars in history:
+            for bar in bars.Values:
+                closes[bar.Symbol].append(bar.Close)
+        inverse = {}
+        for symbol, values in closes.items():
+            returns = np.diff(np.log(values)) if len(values) > 2 else np.empty(0)
+            std = returns.std() if len(returns) > 1 else 0
+            inverse[symbol] = 1.0 / std if std > 0 else 0.0
+        total = sum(inverse.values())
+        return {insight: insight.Direction * (inverse[insight.Symbol] / total if total > 0 else 0) for insight in active_insights}
+
+
+@aliased
+class ExecutionModel:
+    def Execute(self, algorithm, targets):
+        pass
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+
+@aliased
+class ImmediateExecutionModel(ExecutionModel):
+    '''
+    Market orders for the difference between the targets and the holdings
+    '''
+
+    def Execute(self, algorithm, targets):
+        for target in targets:
+            quantity = target.Quantity - algorithm.Portfolio[target.Symbol].Quantity
+            if abs(quantity) >= 1:
+                algorithm.MarketOrder(target.Symbol, int(quantity))
+
+
+@aliased
+class VolumeWeightedAveragePriceExecutionModel(ImmediateExecutionModel):
+    '''
+    Stand-in: filled at once at the bar close like ImmediateExecutionModel
+    '''
+
+
+@aliased
+class RiskManagementModel:
+    def ManageRisk(self, algorithm, targets):
+        return []
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+
+@aliased
+class NullRiskManagementModel(RiskManagementModel):
+    pass
+
+
+@aliased
+class TrailingStopRiskManagementModel(RiskManagementModel):
+    def __init__(self, maximum_drawdown_percent=0.05):
+        self.maximum_drawdown_percent = abs(maximum_drawdown_percent)
+        self.trailing = {}
+
+    def ManageRisk(self, algorithm, targets):
+        risk_targets = []
+        for holding in algorithm.Portfolio.Values:
+            symbol = holding.Symbol
+            if not holding.Invested:
+                self.trailing.pop(symbol, None)
+                continue
+            price = holding.Price
+            is_long = holding.IsLong
+            extreme = self.trailing.get(symbol)
+            if extreme is None or extreme[1] != is_long:
+                self.trailing[symbol] = (holding.AveragePrice, is_long)
+                continue
+            extreme = max(extreme[0], price) if is_long else min(extreme[0], price)
+            self.trailing[symbol] = (extreme, is_long)
+            drawdown = (extreme - price) / extreme if is_long else (price - extreme) / extreme
+            if drawdown > self.maximum_drawdown_percent:
+                self.trailing.pop(symbol)
+                risk_targets.append(PortfolioTarget(symbol, 0))
+        return risk_targets
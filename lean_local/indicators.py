@@ -0,0 +1,414 @@
+'''
+Indicators of the LEAN stand-in, with the same update rules and warm-up periods as the LEAN ones
+they replace (EMA seeded with an SMA, Wilder smoothing for RSI, ATR and ADX, ...).
+'''
+import math
+from collections import deque
+from datetime import datetime
+
+from lean_local.common import Event, IndicatorDataPoint, TradeBar, _enum, aliased
+
+MovingAverageType = _enum('MovingAverageType', {'Simple': 0, 'Exponential': 1, 'Wilders': 2})
+
+
+@aliased
+class IndicatorBase:
+    '''
+    Update(time, value), Update(TradeBar) or Update(IndicatorDataPoint). Bar indicators (ATR, ADX, OBV)
+    need TradeBars, the other ones use the close of the bars they are given.
+    '''
+    bar_input = False
+
+    def __init__(self, name, warm_up_period):
+        self.Name = name
+        self.WarmUpPeriod = warm_up_period
+        self.Samples = 0
+        self.Current = IndicatorDataPoint(datetime.min, 0.0)
+        self.Previous = self.Current
+        self.Updated = Event()
+
+    def Update(self, *args):
+        if len(args) == 2:
+            time, value = args
+        else:
+            data = args[0]
+            time = data.EndTime
+            if isinstance(data, TradeBar):
+                value = data if self.bar_input else data.Close
+            else:
+                value = data.Value
+        if self.bar_input and not isinstance(value, TradeBar):
+            raise TypeError(f"{self.Name} needs TradeBars")
+        self.Samples += 1
+        self.Previous = self.Current
+        self.Current = IndicatorDataPoint(time, float(self.compute(time, value)))
+        if self.Updated.handlers:
+            self.Updated(self, self.Current)
+        return self.IsReady
+
+    def compute(self, time, value):
+        raise NotImplementedError
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.WarmUpPeriod
+
+    @property
+    def Value(self):
+        return self.Current.Value
+
+    def Reset(self):
+        self.Samples = 0
+        self.Current = IndicatorDataPoint(datetime.min, 0.0)
+        self.Previous = self.Current
+        self._reset()
+
+    def _reset(self):
+        pass
+
+    def __float__(self):
+        return self.Current.Value
+
+    def __repr__(self):
+        return f"{self.Name}: {self.Current.Value}"
+
+    current = property(lambda self: self.Current)
+    updated = property(lambda self: self.Updated, lambda self, event: setattr(self, 'Updated', event))
+    samples = property(lambda self: self.Samples)
+    warm_up_period = property(lambda self: self.WarmUpPeriod)
+
+
+class Identity(IndicatorBase):
+    def __init__(self, name='Identity'):
+        super().__init__(name, 1)
+
+    def compute(self, time, value):
+        return value
+
+
+class SimpleMovingAverage(IndicatorBase):
+    def __init__(self, period):
+        super().__init__(f"SMA({period})", period)
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+
+    def compute(self, time, value):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+        return self.total / len(self.window)
+
+    def _reset(self):
+        self.window.clear()
+        self.total = 0.0
+
+
+class ExponentialMovingAverage(IndicatorBase):
+    '''
+    Simple average of the first period values, exponential after
+    '''
+
+    def __init__(self, period, smoothing_factor=None):
+        super().__init__(f"EMA({period})", period)
+        self.period = period
+        self.k = 2.0 / (period + 1) if smoothing_factor is None else smoothing_factor
+        self.total = 0.0
+
+    def compute(self, time, value):
+        if self.Samples <= self.period:
+            self.total += value
+            return self.total / self.Samples
+        return value * self.k + self.Current.Value * (1 - self.k)
+
+    def _reset(self):
+        self.total = 0.0
+
+
+class WilderMovingAverage(ExponentialMovingAverage):
+    def __init__(self, period):
+        super().__init__(period, 1.0 / period)
+        self.Name = f"WWMA({period})"
+
+
+def moving_average(ma_type, period):
+    if ma_type == MovingAverageType.Simple:
+        return SimpleMovingAverage(period)
+    if ma_type == MovingAverageType.Wilders:
+        return WilderMovingAverage(period)
+    return ExponentialMovingAverage(period)
+
+
+class StandardDeviation(IndicatorBase):
+    '''
+    Population standard deviation of the last period values
+    '''
+
+    def __init__(self, period):
+        super().__init__(f"STD({period})", period)
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.total_squares = 0.0
+
+    def compute(self, time, value):
+        if len(self.window) == self.period:
+            old = self.window[0]
+            self.total -= old
+            self.total_squares -= old * old
+        self.window.append(value)
+        self.total += value
+        self.total_squares += value * value
+        n = len(self.window)
+        mean = self.total / n
+        return math.sqrt(max(self.total_squares / n - mean * mean, 0.0))
+
+    def _reset(self):
+        self.window.clear()
+        self.total = 0.0
+        self.total_squares = 0.0
+
+
+class RelativeStrengthIndex(IndicatorBase):
+    def __init__(self, period, moving_average_type=MovingAverageType.Wilders):
+        super().__init__(f"RSI({period})", period + 1)
+        self.AverageGain = moving_average(moving_average_type, period)
+        self.AverageLoss = moving_average(moving_average_type, period)
+        self.previous = None
+
+    def compute(self, time, value):
+        if self.previous is None:
+            self.previous = value
+            return 0.0
+        change = value - self.previous
+        self.previous = value
+        self.AverageGain.Update(time, max(change, 0.0))
+        self.AverageLoss.Update(time, max(-change, 0.0))
+        if self.AverageLoss.Current.Value == 0:
+            return 100.0
+        rs = self.AverageGain.Current.Value / self.AverageLoss.Current.Value
+        return 100.0 - 100.0 / (1 + rs)
+
+    def _reset(self):
+        self.AverageGain.Reset()
+        self.AverageLoss.Reset()
+        self.previous = None
+
+
+class MovingAverageConvergenceDivergence(IndicatorBase):
+    def __init__(self, fast_period, slow_period, signal_period, moving_average_type=MovingAverageType.Exponential):
+        super().__init__(f"MACD({fast_period},{slow_period},{signal_period})", slow_period + signal_period - 1)
+        self.Fast = moving_average(moving_average_type, fast_period)
+        self.Slow = moving_average(moving_average_type, slow_period)
+        self.Signal = moving_average(moving_average_type, signal_period)
+        self.Histogram = Identity('Histogram')
+        self.fast, self.slow, self.signal, self.histogram = self.Fast, self.Slow, self.Signal, self.Histogram
+
+    def compute(self, time, value):
+        fast_ready = self.Fast.Update(time, value)
+        slow_ready = self.Slow.Update(time, value)
+        macd = self.Fast.Current.Value - self.Slow.Current.Value
+        if fast_ready and slow_ready:
+            self.Signal.Update(time, macd)
+            self.Histogram.Update(time, macd - self.Signal.Current.Value)
+        return macd
+
+    @property
+    def IsReady(self):
+        return self.Signal.IsReady
+
+    def _reset(self):
+        for indicator in (self.Fast, self.Slow, self.Signal, self.Histogram):
+            indicator.Reset()
+
+
+class BollingerBands(IndicatorBase):
+    def __init__(self, period, k, moving_average_type=MovingAverageType.Simple):
+        super().__init__(f"BB({period},{k})", period)
+        self.k = k
+        self.MiddleBand = moving_average(moving_average_type, period)
+        self.StandardDeviation = StandardDeviation(period)
+        self.UpperBand = Identity('UpperBand')
+        self.LowerBand = Identity('LowerBand')
+        self.middle_band, self.upper_band, self.lower_band = self.MiddleBand, self.UpperBand, self.LowerBand
+        self.standard_deviation = self.StandardDeviation
+
+    def compute(self, time, value):
+        self.StandardDeviation.Update(time, value)
+        self.MiddleBand.Update(time, value)
+        middle = self.MiddleBand.Current.Value
+        std = self.StandardDeviation.Current.Value
+        self.UpperBand.Update(time, middle + self.k * std)
+        self.LowerBand.Update(time, middle - self.k * std)
+        return middle
+
+    def _reset(self):
+        for indicator in (self.MiddleBand, self.StandardDeviation, self.UpperBand, self.LowerBand):
+            indicator.Reset()
+
+
+class AverageTrueRange(IndicatorBase):
+    bar_input = True
+
+    def __init__(self, period, moving_average_type=MovingAverageType.Wilders):
+        super().__init__(f"ATR({period})", period)
+        self.average = moving_average(moving_average_type, period)
+        self.previous_close = None
+
+    def compute(self, time, bar):
+        true_range = bar.High - bar.Low
+        if self.previous_close is not None:
+            true_range = max(true_range, abs(bar.High - self.previous_close), abs(bar.Low - self.previous_close))
+        self.previous_close = bar.Close
+        self.average.Update(time, true_range)
+        return self.average.Current.Value
+
+    def _reset(self):
+        self.average.Reset()
+        self.previous_close = None
+
+
+class AverageDirectionalIndex(IndicatorBase):
+    '''
+    Wilder's ADX: smoothed true range and directional movements, then the Wilder average of DX
+    '''
+    bar_input = True
+
+    def __init__(self, period):
+        super().__init__(f"ADX({period})", period * 2)
+        self.period = period
+        self.previous = None
+        self.true_range = 0.0
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.smoothed = 0
+        self.dx = WilderMovingAverage(period)
+        self.PositiveDirectionalIndex = Identity('+DI')
+        self.NegativeDirectionalIndex = Identity('-DI')
+
+    def compute(self, time, bar):
+        previous = self.previous
+        self.previous = bar
+        if previous is None:
+            return 0.0
+        true_range = max(bar.High - bar.Low, abs(bar.High - previous.Close), abs(bar.Low - previous.Close))
+        up = bar.High - previous.High
+        down = previous.Low - bar.Low
+        plus_dm = up if up > down and up > 0 else 0.0
+        minus_dm = down if down > up and down > 0 else 0.0
+
+        self.smoothed += 1
+        if self.smoothed <= self.period:
+            self.true_range += true_range
+            self.plus_dm += plus_dm
+            self.minus_dm += minus_dm
+            if self.smoothed < self.period:
+                return 0.0
+        else:
+            self.true_range += true_range - self.true_range / self.period
+            self.plus_dm += plus_dm - self.plus_dm / self.period
+            self.minus_dm += minus_dm - self.minus_dm / self.period
+        if self.true_range == 0:
+            return self.Current.Value
+        plus_di = 100 * self.plus_dm / self.true_range
+        minus_di = 100 * self.minus_dm / self.true_range
+        self.PositiveDirectionalIndex.Update(time, plus_di)
+        self.NegativeDirectionalIndex.Update(time, minus_di)
+        total = plus_di + minus_di
+        self.dx.Update(time, 0.0 if total == 0 else 100 * abs(plus_di - minus_di) / total)
+        return self.dx.Current.Value
+
+    def _reset(self):
+        self.previous = None
+        self.true_range = self.plus_dm = self.minus_dm = 0.0
+        self.smoothed = 0
+        self.dx.Reset()
+        self.PositiveDirectionalIndex.Reset()
+        self.NegativeDirectionalIndex.Reset()
+
+
+class OnBalanceVolume(IndicatorBase):
+    bar_input = True
+
+    def __init__(self, name='OBV'):
+        super().__init__(name, 2)
+        self.previous_close = None
+
+    def compute(self, time, bar):
+        previous = self.previous_close
+        self.previous_close = bar.Close
+        if previous is None:
+            return bar.Volume
+        if bar.Close > previous:
+            return self.Current.Value + bar.Volume
+        if bar.Close < previous:
+            return self.Current.Value - bar.Volume
+        return self.Current.Value
+
+    def _reset(self):
+        self.previous_close = None
+
+
+class LogReturn(IndicatorBase):
+    def __init__(self, period):
+        super().__init__(f"LOGR({period})", period + 1)
+        self.window = deque(maxlen=period + 1)
+
+    def compute(self, time, value):
+        self.window.append(value)
+        if len(self.window) < self.window.maxlen or self.window[0] == 0:
+            return 0.0
+        return math.log(value / self.window[0])
+
+    def _reset(self):
+        self.window.clear()
+
+
+class MomentumPercent(IndicatorBase):
+    def __init__(self, period):
+        super().__init__(f"MOMP({period})", period + 1)
+        self.window = deque(maxlen=period + 1)
+
+    def compute(self, time, value):
+        self.window.append(value)
+        if self.window[0] == 0:
+            return 0.0
+        return 100 * (value - self.window[0]) / self.window[0]
+
+    def _reset(self):
+        self.window.clear()
+
+
+class RateOfChange(IndicatorBase):
+    '''
+    (value - value period bars ago) / value period bars ago
+    '''
+
+    def __init__(self, period):
+        super().__init__(f"ROC({period})", period + 1)
+        self.window = deque(maxlen=period + 1)
+
+    def compute(self, time, value):
+        self.window.append(value)
+        if self.window[0] == 0:
+            return 0.0
+        return (value - self.window[0]) / self.window[0]
+
+    def _reset(self):
+        self.window.clear()
+
+
+class RateOfChangePercent(RateOfChange):
+    def __init__(self, period):
+        super().__init__(period)
+        self.Name = f"ROCP({period})"
+
+    def compute(self, time, value):
+        return 100 * super().compute(time, value)
+
+
+for _indicator in (Identity, SimpleMovingAverage, ExponentialMovingAverage, WilderMovingAverage, StandardDeviation,
+                   RelativeStrengthIndex, MovingAverageConvergenceDivergence, BollingerBands, AverageTrueRange,
+                   AverageDirectionalIndex, OnBalanceVolume, LogReturn, MomentumPercent, RateOfChange, RateOfChangePercent):
+    aliased(_indicator)
@@ -0,0 +1,251 @@
+'''
+Parameter sweep of the trend following alpha (custom_alpha) on a process pool.
+
+    python -m lean_local.sweep --grid adx_threshold=15,20,25 --grid atr_stop_multiplier=1.5,2,3 \
+        --grid macd_params.long_macd_threshold=.1,.25 --symbols 60 --output sweep.csv
+
+The bars of the data source are loaded once by the parent into shared memory, the workers attach to them
+without copying and backtest one combination per task (the custom_alpha parameters given by name, see
+custom_alpha(algo, params)). The results are one row per combination with its total return, max drawdown
+and trade count.
+'''
+import argparse
+import ast
+import itertools
+import os
+import sys
+import tempfile
+import time as timer
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from lean_local.common import Resolution, Symbol
+from lean_local.data import BarArrays, DataSource
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT = os.path.join(ROOT, 'Exemple-Python-Trend following')
+
+# no checkpoints between the runs of a sweep
+BASE_PARAMS = {'checkpoint_every': None}
+
+
+def grid(**axes):
+    '''
+    Every combination of the values of axes, as a list of {name: value}
+    '''
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def share(data, start, end, tickers=()):
+    '''
+    Copies the bars of data (its universe plus tickers) into shared memory.
+    Returns the description passed to SharedBars and the shared memory blocks, to close and unlink after the sweep.
+    '''
+    data.prepare(start, end)
+    symbols = list(data.symbols())
+    symbols += [Symbol.Create(t) for t in tickers if Symbol.Create(t) not in symbols]
+    arrays = [data.arrays(symbol) for symbol in symbols]
+    lengths = [len(a) for a in arrays]
+    offsets = np.concatenate(([0], np.cumsum(lengths))).tolist()
+    # the symbols of a synthetic source share one calendar: its times are stored once
+    common = len(set(lengths)) == 1 and all(a.end_time is arrays[0].end_time or np.array_equal(a.end_time, arrays[0].end_time)
+                                            for a in arrays)
+    time_rows = lengths[0] if common and arrays else offsets[-1]
+
+    times = shared_memory.SharedMemory(create=True, size=max(8, time_rows * 2 * 8))
+    values = shared_memory.SharedMemory(create=True, size=max(8, offsets[-1] * 5 * 8))
+    time_view = np.ndarray((time_rows, 2), dtype=np.int64, buffer=times.buf)
+    value_view = np.ndarray((offsets[-1], 5), dtype=np.float64, buffer=values.buf)
+    for i, a in enumerate(arrays):
+        value_view[offsets[i]:offsets[i + 1]] = a.values
+        if not common or i == 0:
+            rows = slice(0, time_rows) if common else slice(offsets[i], offsets[i + 1])
+            time_view[rows, 0] = a.time.astype('datetime64[us]').view(np.int64)
+            time_view[rows, 1] = a.end_time.astype('datetime64[us]').view(np.int64)
+    spec = {
+        'times': times.name,
+        'values': values.name,
+        'time_rows': time_rows,
+        'common': common,
+        'tickers': [s.Value for s in symbols],
+        'universe': len(data.symbols()),
+        'offsets': offsets,
+        'resolution': int(data.resolution),
+        'fundamentals': [data.fundamental(s) for s in symbols],
+    }
+    return spec, [times, values]
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # before python 3.13 the block is registered again with the resource tracker of the parent, which unlinks it
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedBars(DataSource):
+    '''
+    Data source reading the bars written by share() from shared memory
+    '''
+
+    def __init__(self, spec):
+        self.blocks = [_attach(spec['times']), _attach(spec['values'])]
+        self.time_view = np.ndarray((spec['time_rows'], 2), dtype=np.int64, buffer=self.blocks[0].buf)
+        self.value_view = np.ndarray((spec['offsets'][-1], 5), dtype=np.float64, buffer=self.blocks[1].buf)
+        self.common = spec['common']
+        self.resolution = Resolution(spec['resolution'])
+        self.offsets = spec['offsets']
+        self.all_symbols = [Symbol.Create(t) for t in spec['tickers']]
+        self.index = {symbol: i for i, symbol in enumerate(self.all_symbols)}
+        self.universe = self.all_symbols[:spec['universe']]
+        self.fundamentals = dict(zip(self.all_symbols, spec['fundamentals']))
+        self.cache = {}
+        self.shared_times = None
+        if self.common:
+            time = self.time_view[:, 0].view('datetime64[us]')
+            end_time = self.time_view[:, 1].view('datetime64[us]')
+            self.shared_times = (time, end_time, time.tolist(), end_time.tolist())
+
+    def symbols(self):
+        return self.universe
+
+    def arrays(self, symbol):
+        arrays = self.cache.get(symbol)
+        if arrays is None:
+            i = self.index.get(symbol)
+            if i is None:
+                empty = np.zeros(0, dtype='datetime64[us]')
+                arrays = BarArrays(symbol, empty, empty, np.zeros((0, 5)))
+            elif self.common:
+                time, end_time, times, end_times = self.shared_times
+                arrays = BarArrays(symbol, time, end_time, self.value_view[self.offsets[i]:self.offsets[i + 1]], times, end_times)
+            else:
+                rows = self.time_view[self.offsets[i]:self.offsets[i + 1]]
+                arrays = BarArrays(symbol, rows[:, 0].view('datetime64[us]'), rows[:, 1].view('datetime64[us]'),
+                                   self.value_view[self.offsets[i]:self.offsets[i + 1]])
+            self.cache[symbol] = arrays
+        return arrays
+
+    def calendar(self):
+        if self.common:
+            return self.shared_times[1]
+        return np.unique(self.time_view[:, 1]).view('datetime64[us]')
+
+    def fundamental(self, symbol):
+        return self.fundamentals.get(symbol, (0.0, 0))
+
+
+_worker = {}
+
+
+def _init_worker(spec, project, object_store):
+    import lean_local
+    lean_local.activate(project)
+    _worker['data'] = SharedBars(spec)
+    _worker['project'] = project
+    # one object store per worker: the history cache of the alpha is reused by its runs
+    _worker['object_store'] = tempfile.mkdtemp(prefix='sweep_', dir=object_store)
+
+
+def _run(index, params, start, end, cash):
+    import lean_local
+    from lean_local.algorithm import QCAlgorithm
+    from lean_local.common import Resolution
+    from lean_local.framework import ImmediateExecutionModel
+    from lean_local.universe import ManualUniverseSelectionModel
+    from alpha import custom_alpha
+    from main import CompetitionAlgorithm
+
+    data = _worker['data']
+
+    class SweepAlgorithm(QCAlgorithm):
+        '''
+        The framework of CompetitionAlgorithm on the universe of the data source
+        '''
+
+        def Initialize(self):
+            self.SetStartDate(start)
+            self.SetEndDate(end)
+            self.SetCash(cash)
+            self.UniverseSettings.Resolution = Resolution.Hour
+            self.AddUniverseSelection(ManualUniverseSelectionModel(data.symbols()))
+            self.SetPortfolioConstruction(CompetitionAlgorithm.MyPCM())
+            self.SetAlpha(custom_alpha(self, dict(BASE_PARAMS, **params)))
+            self.SetExecution(ImmediateExecutionModel())
+
+    row = dict(params)
+    began = timer.perf_counter()
+    try:
+        statistics = lean_local.Engine(SweepAlgorithm, data, object_store=_worker['object_store']).run().statistics
+        row.update(total_return=statistics.get('total_return'), max_drawdown=statistics.get('max_drawdown'),
+                   trades=statistics.get('trades'), error=None)
+    except Exception as e:
+        row.update(total_return=None, max_drawdown=None, trades=None, error=f"{type(e).__name__}: {e}")
+    row['runtime'] = timer.perf_counter() - began
+    return index, row
+
+
+def sweep(combinations, data, start, end, cash=1000000, workers=None, project=PROJECT, progress=False):
+    '''
+    Backtests every combination (a {custom_alpha parameter: value}) on data, returns the results as a DataFrame
+    '''
+    spec, blocks = share(data, start, end, tickers=('TYL',))
+    rows = [None] * len(combinations)
+    try:
+        with tempfile.TemporaryDirectory() as object_store, \
+                ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=get_context('spawn'),
+                                    initializer=_init_worker, initargs=(spec, project, object_store)) as pool:
+            futures = [pool.submit(_run, i, params, start, end, cash) for i, params in enumerate(combinations)]
+            for done, future in enumerate(as_completed(futures), 1):
+                index, row = future.result()
+                rows[index] = row
+                if progress:
+                    print(f"{done}/{len(combinations)} {row}", file=sys.stderr)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return pd.DataFrame(rows)
+
+
+def _parse_axis(text):
+    name, values = text.split('=', 1)
+    return name, [ast.literal_eval(value) for value in values.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep of the trend following alpha")
+    parser.add_argument('--grid', action='append', default=[], type=_parse_axis,
+                        help="name=v1,v2,... values of a custom_alpha parameter (repeat for each parameter)")
+    parser.add_argument('--symbols', type=int, default=60, help="number of synthetic symbols")
+    parser.add_argument('--csv', help="folder of <TICKER>.csv hourly bars instead of synthetic data")
+    parser.add_argument('--start', default='2021-01-04')
+    parser.add_argument('--end', default='2021-03-31')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history-days', type=int, default=400, help="synthetic bars before the start date")
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output', help="CSV file of the results")
+    args = parser.parse_args()
+
+    import lean_local
+    if args.csv:
+        data = lean_local.CsvData(args.csv, Resolution.Hour)
+    else:
+        data = lean_local.SyntheticData(args.symbols, seed=args.seed, history_days=args.history_days)
+    combinations = grid(**dict(args.grid))
+    results = sweep(combinations, data, datetime.fromisoformat(args.start), datetime.fromisoformat(args.end),
+                    workers=args.workers, progress=True)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(results.sort_values('total_return', ascending=False).to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
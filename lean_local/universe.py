@@ -0,0 +1,152 @@
+'''
+Universe selection of the LEAN stand-in: coarse/fine fundamental selection, ETF constituents and manual universes,
+fed by the fundamentals of the data source.
+'''
+from lean_local.common import Aliased, Symbol, aliased
+
+
+class _Unchanged:
+    def __repr__(self):
+        return "Universe.Unchanged"
+
+
+UNCHANGED = _Unchanged()
+
+
+@aliased
+class AssetClassification(Aliased):
+    def __init__(self, morningstar_sector_code=0):
+        self.MorningstarSectorCode = morningstar_sector_code
+
+
+@aliased
+class Fundamental(Aliased):
+    '''
+    Coarse and fine fundamental data of one symbol on one day
+    '''
+
+    def __init__(self, symbol, price, volume, market_cap=0.0, sector_code=0):
+        self.Symbol = symbol
+        self.Value = symbol.Value
+        self.Price = price
+        self.Volume = volume
+        self.DollarVolume = price * volume
+        self.MarketCap = market_cap
+        self.HasFundamentalData = True
+        self.AssetClassification = AssetClassification(sector_code)
+
+    @property
+    def price(self):
+        return self.Price
+
+
+CoarseFundamental = Fundamental
+FineFundamental = Fundamental
+
+
+@aliased
+class ETFConstituentData(Aliased):
+    def __init__(self, symbol, weight):
+        self.Symbol = symbol
+        self.Weight = weight
+
+
+ETFConstituentUniverse = ETFConstituentData
+
+
+@aliased
+class UniverseSettings(Aliased):
+    def __init__(self, resolution):
+        self.Resolution = resolution
+        self.DataNormalizationMode = None
+        self.Leverage = 1
+        self.FillForward = True
+        self.Asynchronous = False
+        self.MinimumTimeInUniverse = None
+        self.ExtendedMarketHours = False
+
+
+@aliased
+class UniverseSelectionModel:
+    '''
+    Select(algorithm, time) returns the symbols of the universe or UNCHANGED
+    '''
+
+    def Select(self, algorithm, time):
+        return UNCHANGED
+
+
+@aliased
+class ManualUniverseSelectionModel(UniverseSelectionModel):
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.done = False
+
+    def Select(self, algorithm, time):
+        if self.done:
+            return UNCHANGED
+        self.done = True
+        return self.symbols
+
+
+@aliased
+class FundamentalUniverseSelectionModel(UniverseSelectionModel):
+    '''
+    AddUniverse(coarse, fine): called once a day with the fundamentals of the previous day
+    '''
+
+    def __init__(self, coarse, fine=None):
+        self.coarse = coarse
+        self.fine = fine
+
+    def Select(self, algorithm, time):
+        fundamentals = algorithm._engine.fundamentals(time)
+        selected = self.coarse(fundamentals)
+        if selected is UNCHANGED or self.fine is None:
+            return selected
+        by_symbol = {x.Symbol: x for x in fundamentals}
+        return self.fine([by_symbol[symbol] for symbol in selected if symbol in by_symbol])
+
+
+@aliased
+class ETFConstituentsUniverseSelectionModel(UniverseSelectionModel):
+    '''
+    Constituents of an ETF from the data source, refreshed at the start of each month
+    '''
+
+    def __init__(self, etf_symbol, universe_settings=None, universe_filter_func=None):
+        if isinstance(etf_symbol, str):
+            etf_symbol = Symbol.Create(etf_symbol)
+        self.etf_symbol = etf_symbol
+        self.universe_settings = universe_settings
+        self.universe_filter_func = universe_filter_func
+        self.month = None
+
+    def Select(self, algorithm, time):
+        if self.month == (time.year, time.month):
+            return UNCHANGED
+        self.month = (time.year, time.month)
+        constituents = [ETFConstituentData(symbol, weight) for symbol, weight in algorithm._engine.constituents(self.etf_symbol, time)]
+        if self.universe_filter_func is None:
+            return [c.Symbol for c in constituents]
+        return self.universe_filter_func(constituents)
+
+
+class Universe:
+    Unchanged = UNCHANGED
+    UNCHANGED = UNCHANGED
+
+
+@aliased
+class UniverseDefinitions:
+    '''
+    algorithm.Universe: Universe.Unchanged and the universe helpers (Universe.ETF)
+    '''
+    Unchanged = UNCHANGED
+    UNCHANGED = UNCHANGED
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+
+    def ETF(self, etf, universe_settings=None, universe_filter_func=None):
+        return ETFConstituentsUniverseSelectionModel(etf, universe_settings, universe_filter_func)
@@ -0,0 +1,22 @@
+'''
+Code of the ETF pairs project before the optimizations, as the reference of the parity tests
+'''
+from itertools import combinations
+
+from arch.unitroot.cointegration import engle_granger
+
+
+def rebalance_pairs(symbols, prices, max_pairs):
+    # ETFPairsTrading.RebalancePairs from the unstacked history to the top pairs
+    results = []
+    for etf1, etf2 in combinations(symbols, 2):
+        etf1_prices = prices[etf1].dropna()
+        etf2_prices = prices[etf2].dropna()
+        if len(etf1_prices) == len(etf2_prices) and len(etf1_prices) > 50:
+            model = engle_granger(etf1_prices, etf2_prices, trend="n", lags=0)
+            corr = etf1_prices.corr(etf2_prices)
+            vol = etf1_prices.std() + etf2_prices.std()
+            if model.pvalue < 0.1 and corr > 0.6 and vol > 0.01:
+                results.append((etf1, etf2, model.pvalue, corr, vol))
+    results.sort(key=lambda x: (-x[3] * x[4], x[2]))
+    return [(etf1, etf2) for etf1, etf2, _, _, _ in results[:max_pairs]]
@@ -0,0 +1,45 @@
+'''
+The modules of the ETF pairs project import AlgorithmImports and their siblings by name: lean_local
+provides the first, and the project folder is put on sys.path next to the trend following one (their
+modules have other names). Without arch, engle_granger is replaced by
+a deterministic stand-in: the same regression without constant, and a p-value that grows with the lag-1
+autocorrelation of the residuals (not the ADF distribution, but ordered the same way).
+'''
+import os
+import sys
+import types
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT = os.path.join(ROOT, "Exemple-Python-ETF Basket Pairs Trading")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def engle_granger(y, x, trend="n", lags=0):
+    y = np.asarray(y, dtype=float)
+    x = np.asarray(x, dtype=float).reshape(len(y), -1)
+    beta = np.linalg.lstsq(x, y, rcond=None)[0]
+    residuals = y - x @ beta
+    rho = np.corrcoef(residuals[1:], residuals[:-1])[0, 1]
+    pvalue = float(max(rho, 0.0) ** 2) if np.isfinite(rho) else 1.0
+    return types.SimpleNamespace(pvalue=pvalue, cointegrating_vector=np.concatenate(([1.0], -beta)))
+
+
+try:
+    import arch.unitroot.cointegration
+except ImportError:
+    arch = types.ModuleType('arch')
+    arch.unitroot = types.ModuleType('arch.unitroot')
+    arch.unitroot.cointegration = types.ModuleType('arch.unitroot.cointegration')
+    arch.unitroot.cointegration.engle_granger = engle_granger
+    sys.modules.update({'arch': arch, 'arch.unitroot': arch.unitroot,
+                        'arch.unitroot.cointegration': arch.unitroot.cointegration})
+
+import lean_local
+
+lean_local.activate()
+if PROJECT not in sys.path:
+    sys.path.insert(0, PROJECT)
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from AlgorithmImports import QCAlgorithm, Resolution, Security, Symbol, TradeBar
+from lean_local.data import BarArrays
+from portfolio import CointegratedVectorPortfolioConstructionModel
+from return_panel import ReturnPanel
+from utils import reset_and_warm_up
+
+START = datetime(2021, 1, 4, 10)
+HOUR = timedelta(hours=1)
+BARS = 200
+SYMBOLS = [Symbol.Create(ticker) for ticker in ('XLK', 'XLF', 'XLE', 'XLV')]
+
+
+def bar_arrays(symbol, indices, rng):
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, .01, len(indices))))
+    values = np.column_stack([closes, closes, closes, closes, np.full(len(indices), 1000.0)])
+    time = np.array([np.datetime64(START + int(i) * HOUR, 'us') for i in indices], dtype='datetime64[us]')
+    return BarArrays(symbol, time, time + np.timedelta64(HOUR), values)
+
+
+def algorithm_with_history(seed):
+    # full history, history with gaps, a short history and none at all
+    rng = np.random.default_rng(seed)
+    everything = np.arange(BARS)
+    indices = [everything, np.sort(rng.choice(everything, BARS * 4 // 5, replace=False)), everything[-30:], everything[:0]]
+    arrays = {symbol: bar_arrays(symbol, i, rng) for symbol, i in zip(SYMBOLS, indices)}
+    algorithm = QCAlgorithm()
+    algorithm._engine = SimpleNamespace(arrays=lambda symbol, resolution: arrays[symbol], log=lambda time, message: None)
+    algorithm._time = START + BARS * HOUR
+    return algorithm
+
+
+def warmed_pcm(seed, lookback, bulk):
+    algorithm = algorithm_with_history(seed)
+    pcm = CointegratedVectorPortfolioConstructionModel(algorithm, lookback=lookback, return_panel=ReturnPanel(2 * lookback))
+    data_dicts = [pcm.init_security_data(algorithm, Security(algorithm, symbol, Resolution.Hour)) for symbol in SYMBOLS]
+    if bulk:
+        pcm.warm_up_indicators(data_dicts)
+    else:
+        # warm-up of the pcm before bulk_warm_up: every history bar replayed through a new consolidator
+        for data_dict in data_dicts:
+            reset_and_warm_up(algorithm, data_dict, Resolution.Hour, lookback)
+    return pcm
+
+
+def written(panel, symbol):
+    times, _ = panel.window()
+    return {time: value for time, value in zip(times.tolist(), panel.column(symbol)) if not np.isnan(value)}
+
+
+def first_bar(pcm, symbol):
+    history = pcm.algorithm.History(symbol, pcm.lookback, Resolution.Hour)
+    return history.index.get_level_values('time')[0].to_pydatetime()
+
+
+def history_returns(pcm, symbol):
+    # log-returns of the lookback bars of every symbol, on the capacity most recent times of them all
+    history = pcm.algorithm.History(SYMBOLS, pcm.lookback, Resolution.Hour)
+    closes = history["close"].unstack(level=0)
+    returns = {}
+    for column in closes.columns:
+        series = closes[column].dropna()
+        returns[column] = dict(zip(series.index[1:].to_pydatetime(), np.log(series.to_numpy()[1:] / series.to_numpy()[:-1])))
+    kept = sorted(set().union(*returns.values()))[-pcm.return_panel.capacity:]
+    return {time: value for time, value in returns.get(symbol, {}).items() if time >= kept[0]}
+
+
+@pytest.mark.parametrize('lookback', [5, 120, 500])
+@pytest.mark.parametrize('seed', range(3))
+def test_bulk_warm_up_matches_bar_replay(seed, lookback):
+    replayed = warmed_pcm(seed, lookback, bulk=False)
+    bulk = warmed_pcm(seed, lookback, bulk=True)
+
+    for symbol in SYMBOLS:
+        expected, actual = replayed.security_data[symbol], bulk.security_data[symbol]
+        assert actual["logr"].IsReady == expected["logr"].IsReady
+        assert actual["logr"].Current.EndTime == expected["logr"].Current.EndTime
+        assert actual["logr"].Current.Value == pytest.approx(expected["logr"].Current.Value, rel=1e-12)
+        assert list(actual["logr"].window) == pytest.approx(list(expected["logr"].window), rel=1e-12)
+
+        window, expected_window = actual["prices"], expected["prices"]
+        assert window.count == expected_window.count
+        assert window.times[window.size - window.count:] == expected_window.times[window.size - window.count:]
+        np.testing.assert_allclose(window.prices[window.size - window.count:],
+                                   expected_window.prices[window.size - window.count:], rtol=1e-12)
+
+        # replayed bar by bar, write() dropped the returns older than the rows of the symbols warmed before,
+        # and wrote the 0 of the first bar, when LogReturn was not ready yet
+        actual_returns = written(bulk.return_panel, symbol)
+        assert actual_returns == pytest.approx(history_returns(bulk, symbol), rel=1e-12)
+        expected_returns = written(replayed.return_panel, symbol)
+        if expected_returns:
+            assert expected_returns.pop(first_bar(bulk, symbol), 0.0) == 0.0
+        assert {time: actual_returns[time] for time in expected_returns} == pytest.approx(expected_returns, rel=1e-12)
+
+
+def test_bars_after_the_warm_up():
+    replayed = warmed_pcm(0, 120, bulk=False)
+    bulk = warmed_pcm(0, 120, bulk=True)
+    rng = np.random.default_rng(1)
+    for i in range(BARS, BARS + 20):
+        for symbol in SYMBOLS:
+            close = float(100 * np.exp(rng.normal(0, .01)))
+            for pcm in (replayed, bulk):
+                bar = TradeBar(START + i * HOUR, symbol, close, close, close, close, 1000, HOUR)
+                pcm.security_data[symbol]["consolidator"].Update(bar)
+
+    for symbol in SYMBOLS:
+        expected = written(replayed.return_panel, symbol)
+        actual = written(bulk.return_panel, symbol)
+        live = [time for time in expected if time > START + BARS * HOUR]
+        assert len(live) == 20
+        np.testing.assert_allclose([actual[time] for time in live], [expected[time] for time in live], rtol=1e-12)
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import cointegration_cache
+from cointegration_cache import RecursiveCointegration
+
+START = datetime(2021, 1, 4, 10)
+HOUR = timedelta(hours=1)
+
+
+def lstsq_beta(rows):
+    rows = np.array(rows)
+    return np.linalg.lstsq(rows[:, 1:], rows[:, 0], rcond=None)[0]
+
+
+def log_returns(n, k, seed):
+    # first column regressed on the others, plus noise
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, .01, (n, k - 1))
+    y = x @ rng.uniform(.5, 1.5, k - 1) + rng.normal(0, .005, n)
+    return np.column_stack([y, x])
+
+
+@pytest.fixture
+def tests_run(monkeypatch):
+    calls = []
+    engle_granger = cointegration_cache.engle_granger
+    monkeypatch.setattr(cointegration_cache, 'engle_granger', lambda *args, **kwargs: calls.append(1) or engle_granger(*args, **kwargs))
+    return calls
+
+
+def run(rows, window, test_every=35, warm=None):
+    # windowed RLS beta after each bar, and the lstsq beta of the same window
+    warm = window if warm is None else warm
+    estimator = RecursiveCointegration(['A', 'B', 'C'][:rows.shape[1]], rows[:warm], START, window=window,
+                                       test_every=test_every, drift_bound=np.inf)
+    for i in range(warm, len(rows)):
+        estimator.push(START + (i + 1) * HOUR, rows[i])
+        if estimator.needs_test():
+            estimator.test()
+        yield estimator, lstsq_beta(rows[max(0, i + 1 - window):i + 1])
+
+
+@pytest.mark.parametrize('k', [2, 3, 4])
+@pytest.mark.parametrize('window', [10, 120])
+def test_beta_matches_lstsq_after_adds_and_downdates(k, window, tests_run):
+    rows = log_returns(3 * window + 40, k, k)
+    for estimator, expected in run(rows, window, warm=window // 2):
+        np.testing.assert_allclose(estimator.beta, expected, rtol=1e-7, atol=1e-10)
+        np.testing.assert_allclose(estimator.vector[1:], -estimator.beta)
+        assert estimator.recursive
+    # the full regression runs every test_every bars only
+    assert len(tests_run) == 1 + (len(rows) - window // 2) // 35
+
+
+@pytest.mark.parametrize('degenerate', ['flat', 'collinear'])
+def test_singular_window_falls_back_to_full_regression(degenerate, tests_run):
+    window = 20
+    rows = log_returns(200, 3, 0)
+    if degenerate == 'flat':
+        # no trades: both regressors at 0
+        rows[40:90, 1:] = 0.0
+    else:
+        rows[40:90, 2] = rows[40:90, 1]
+    fallbacks = 0
+    for estimator, expected in run(rows, window):
+        np.testing.assert_allclose(estimator.beta, expected, rtol=1e-6, atol=1e-9)
+        fallbacks += not estimator.recursive
+    assert fallbacks >= 50 - window
+    # recursive again once the window is regular
+    assert estimator.recursive
+
+
+def test_window_becoming_collinear_gradually(tests_run):
+    window = 30
+    rows = log_returns(300, 3, 1)
+    # the second regressor converges to the first one
+    rows[:, 2] = rows[:, 1] + rows[:, 2] * np.exp(-np.arange(300) / 10)
+    for estimator, expected in run(rows, window):
+        # beta is not identified any more, the fit is
+        x = np.array(estimator.rows)[:, 1:]
+        assert np.linalg.norm(x @ (estimator.beta - expected)) <= 1e-9 * np.linalg.norm(x @ expected)
+    assert not estimator.recursive
+
+
+def test_old_bars_are_ignored():
+    rows = log_returns(60, 2, 3)
+    estimator = RecursiveCointegration(['A', 'B'], rows[:30], START + 30 * HOUR, window=30)
+    beta = estimator.beta.copy()
+    estimator.push(START + 30 * HOUR, rows[30])
+    estimator.push(START + 29 * HOUR, rows[31])
+    estimator.push(START + 31 * HOUR, np.array([np.nan, .01]))
+    assert np.array_equal(estimator.beta, beta) and len(estimator.rows) == 30
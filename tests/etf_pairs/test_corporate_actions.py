@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from AlgorithmImports import (DataNormalizationMode, Dividend, LogReturn, MomentumPercent, QCAlgorithm, Resolution,
+                              Security, Slice, Split, SplitType, Symbol, TradeBar)
+from corporate_actions import PriceWindow, price_adjustment_factor
+from portfolio import CointegratedVectorPortfolioConstructionModel
+
+HOUR = timedelta(hours=1)
+START = datetime(2021, 1, 4, 10)
+SYMBOL = Symbol.Create('XLK')
+
+
+def corporate_action(kind, mode):
+    # slice of the ex-date and the factor that adjusted history applies to the prices before it
+    data = Slice(START, {})
+    if kind == 'split':
+        data.Splits[SYMBOL] = Split(SYMBOL, START, 100.0, 0.5)
+        factor = 0.5
+    else:
+        data.Dividends[SYMBOL] = Dividend(SYMBOL, START, 2.0, 100.0)
+        factor = 0.98
+    raw = mode in (DataNormalizationMode.Raw, DataNormalizationMode.ScaledRaw)
+    if not raw and (kind == 'split' or mode != DataNormalizationMode.SplitAdjusted):
+        factor = 1.0
+    return data, factor
+
+
+@pytest.mark.parametrize('kind', ['split', 'dividend'])
+@pytest.mark.parametrize('mode', list(DataNormalizationMode))
+def test_adjustment_factor(kind, mode):
+    data, factor = corporate_action(kind, mode)
+    assert price_adjustment_factor(data, SYMBOL, mode) == pytest.approx(factor)
+
+
+def test_split_warning_is_ignored():
+    data = Slice(START, {})
+    data.Splits[SYMBOL] = Split(SYMBOL, START, 100.0, 0.5, SplitType.Warning)
+    assert price_adjustment_factor(data, SYMBOL, DataNormalizationMode.Raw) == 1.0
+
+
+@pytest.mark.parametrize('factor', [0.5, 0.98, 3.0])
+@pytest.mark.parametrize('period', [1, 10])
+def test_rescale_matches_adjusted_history(factor, period):
+    # indicator rebuilt from its rescaled window == indicator warmed again on the adjusted history
+    rng = np.random.default_rng(period)
+    before = 100 * np.exp(np.cumsum(rng.normal(0, .01, 40)))
+    after = before[-1] * factor * np.exp(np.cumsum(rng.normal(0, .01, 20)))
+    times = [START + i * HOUR for i in range(60)]
+
+    for indicator_type in (LogReturn, MomentumPercent):
+        indicator = indicator_type(period)
+        window = PriceWindow(indicator.WarmUpPeriod)
+        for time, price in zip(times, before):
+            indicator.Update(time, price)
+            window.record(time, price)
+        window.rescale(factor)
+        window.replay(indicator)
+
+        expected = indicator_type(period)
+        for time, price in zip(times, before * factor):
+            expected.Update(time, price)
+        assert indicator.IsReady == expected.IsReady
+        assert indicator.Current.Value == pytest.approx(expected.Current.Value)
+        for time, price in zip(times[40:], after):
+            indicator.Update(time, price)
+            expected.Update(time, price)
+            assert indicator.Current.Value == pytest.approx(expected.Current.Value, rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize('kind', ['split', 'dividend'])
+@pytest.mark.parametrize('security_mode,universe_mode', [(DataNormalizationMode.Raw, DataNormalizationMode.Adjusted),
+                                                         (DataNormalizationMode.Adjusted, DataNormalizationMode.Raw),
+                                                         (DataNormalizationMode.SplitAdjusted, DataNormalizationMode.Raw)])
+def test_pcm_uses_the_mode_of_the_security(kind, security_mode, universe_mode):
+    # a security added with AddEquity(..., dataNormalizationMode) next to a universe in another mode
+    algorithm = QCAlgorithm()
+    algorithm.UniverseSettings.DataNormalizationMode = universe_mode
+    security = Security(algorithm, SYMBOL, Resolution.Hour, 1, security_mode)
+    dict.__setitem__(algorithm.Securities, SYMBOL, security)
+    pcm = CointegratedVectorPortfolioConstructionModel(algorithm)
+    data = pcm.init_security_data(algorithm, security)
+
+    closes = [100.0, 101.0, 99.0, 102.0]
+    for i, close in enumerate(closes):
+        data["consolidator"].Update(TradeBar(START + i * HOUR, SYMBOL, close, close, close, close, 1000, HOUR))
+    slice_, factor = corporate_action(kind, security_mode)
+    pcm.handle_corporate_actions(algorithm, slice_)
+
+    np.testing.assert_allclose(data["prices"].prices, np.array(closes[-2:]) * factor)
+    assert data["logr"].Current.Value == pytest.approx(np.log(closes[-1] / closes[-2]))
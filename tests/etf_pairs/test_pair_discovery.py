@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from AlgorithmImports import Symbol
+import baseline
+from pair_discovery import discover_pairs, price_panel
+
+# ActiveSecurities order, not the alphabetical one
+TICKERS = ['XLY', 'XLB', 'XLV', 'XLE', 'XLK', 'XLF', 'XLU', 'XLI', 'XLP', 'XLC', 'XLRE', 'SPY']
+
+
+def history(tickers, seed, gaps=False):
+    '''
+    History(symbols, ...) frame: (symbol, time) index sorted by symbol, close column. The prices share a
+    random walk, plus AR(1) noises from white noise to persistent: some pairs are cointegrated.
+    '''
+    rng = np.random.default_rng(seed)
+    n, k = 300, len(tickers)
+    factor = np.cumsum(rng.normal(size=n))
+    phi = rng.permutation(np.linspace(0, .8, k))
+    noise = np.zeros((n, k))
+    for t in range(1, n):
+        noise[t] = phi * noise[t - 1] + rng.normal(size=k)
+    values = 100 + factor[:, None] * rng.uniform(.5, 2, k) + 2 * noise
+    if gaps:
+        values[:7, 1] = np.nan
+        values[:7, 4] = np.nan
+        values[-3:, 2] = np.nan
+    symbols = [Symbol.Create(t) for t in tickers]
+    frame = pd.DataFrame(values, index=pd.date_range('2021-01-04', periods=n, freq='h'), columns=symbols)
+    frame = frame.stack().swaplevel().sort_index().to_frame('close')
+    return symbols, frame.rename_axis(['symbol', 'time'])
+
+
+@pytest.mark.parametrize('gaps', [False, True])
+@pytest.mark.parametrize('seed', range(4))
+def test_rebalance_pairs_matches_baseline(seed, gaps):
+    symbols, frame = history(TICKERS, seed, gaps)
+    results = discover_pairs(price_panel(frame, symbols), min_correlation=0.6, max_pvalue=0.1,
+                             min_volatility=0.01, min_bars=50, workers=1)
+    results.sort(key=lambda x: (-x[3] * x[4], x[2]))
+
+    expected = baseline.rebalance_pairs(symbols, frame.close.unstack(level=0), max_pairs=len(results) + 1)
+    assert expected, "the panel has cointegrated pairs"
+    assert [(etf1, etf2) for etf1, etf2, *_ in results] == expected
+
+
+def test_price_panel_keeps_the_symbols_order():
+    symbols, frame = history(TICKERS, 0, gaps=True)
+    prices = price_panel(frame, symbols)
+    assert list(prices.columns) == symbols
+    assert prices.isna().sum().tolist() == [0, 7, 3, 0, 7] + [0] * 7
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from return_panel import ReturnPanel
+
+START = datetime(2021, 1, 4, 10)
+HOUR = timedelta(hours=1)
+
+
+class Reference:
+    '''
+    The panel's rules on a {time: {symbol: value}} dict: the capacity most recent times are kept,
+    write ignores a time older than the last one unless it is a row, write_many inserts it
+    '''
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = {}
+
+    def _trim(self):
+        for time in sorted(self.data)[:-self.capacity]:
+            del self.data[time]
+
+    def write(self, symbol, time, value):
+        if time in self.data or not self.data or time > max(self.data):
+            self.data.setdefault(time, {})[symbol] = value
+            self._trim()
+            return True
+        return False
+
+    def write_many(self, symbol, times, values):
+        for time, value in zip(times[-self.capacity:], values[-self.capacity:]):
+            self.data.setdefault(time, {})[symbol] = value
+        self._trim()
+
+    def remove(self, symbol):
+        for row in self.data.values():
+            row.pop(symbol, None)
+
+    def column(self, symbol, n):
+        return np.array([self.data[time].get(symbol, np.nan) for time in sorted(self.data)[-n:]])
+
+    def aligned(self, symbols, n):
+        rows = [(time, [self.data[time].get(symbol, np.nan) for symbol in symbols]) for time in sorted(self.data)[-n:]]
+        rows = [(time, values) for time, values in rows if np.isfinite(values).all()]
+        return [time for time, _ in rows], np.array([values for _, values in rows]).reshape(len(rows), len(symbols))
+
+
+def assert_same(panel, reference, symbols):
+    times = sorted(reference.data)
+    for n in (None, 1, 5, len(times) + 3):
+        m = len(times) if n is None else min(n, len(times))
+        window_times, _ = panel.window(n)
+        assert window_times.tolist() == times[len(times) - m:]
+        for symbol in symbols:
+            np.testing.assert_array_equal(panel.column(symbol, n), reference.column(symbol, m))
+        aligned_times, aligned_values = panel.aligned(symbols, n)
+        expected_times, expected_values = reference.aligned(symbols, m)
+        assert aligned_times.tolist() == expected_times
+        np.testing.assert_array_equal(aligned_values, expected_values)
+    for time in times[-3:]:
+        np.testing.assert_array_equal(panel.row(time, symbols), [reference.data[time].get(s, np.nan) for s in symbols])
+
+
+@pytest.mark.parametrize('capacity', [1, 4, 30])
+def test_wrap_around(capacity):
+    panel, reference = ReturnPanel(capacity, columns=2), Reference(capacity)
+    rng = np.random.default_rng(capacity)
+    symbols = ['A', 'B', 'C']
+    for symbol in symbols:
+        panel.add(symbol)
+    for step in range(5 * capacity + 7):
+        time = START + step * HOUR
+        for symbol in symbols:
+            # a few missing values
+            if rng.random() < .9:
+                value = rng.normal()
+                assert panel.write(symbol, time, value) == reference.write(symbol, time, value)
+        assert_same(panel, reference, symbols)
+    assert panel.row(START - HOUR, symbols) is None
+
+
+def test_old_times_are_ignored_by_write():
+    panel, reference = ReturnPanel(10), Reference(10)
+    for step in (0, 1, 3, 4):
+        panel.write('A', START + step * HOUR, float(step))
+        reference.write('A', START + step * HOUR, float(step))
+    assert panel.write('B', START + 2 * HOUR, 1.0) is False
+    assert panel.write('B', START + 1 * HOUR, 1.0) is True
+    reference.write('B', START + 1 * HOUR, 1.0)
+    assert_same(panel, reference, ['A', 'B'])
+
+
+def test_column_reuse():
+    panel = ReturnPanel(8, columns=2)
+    for step in range(5):
+        panel.write('A', START + step * HOUR, 1.0)
+        panel.write('B', START + step * HOUR, 2.0)
+    column = panel.columns['A']
+    panel.remove('A')
+    # the free column goes to the next symbol, without the values of the removed one
+    assert panel.add('C') == column
+    assert np.isnan(panel.column('C')).all()
+    # more symbols than columns: the panel grows and keeps the values
+    panel.add('D')
+    panel.add('E')
+    assert panel.values.shape[1] >= 4
+    assert (panel.column('B') == 2.0).all()
+    assert panel.add('B') == panel.columns['B']
+
+
+@pytest.mark.parametrize('capacity', [6, 40])
+def test_write_many_inserts_missing_old_times(capacity):
+    # symbols of one batch covering other spans: their bars are inserted at their place
+    panel, reference = ReturnPanel(capacity, columns=2), Reference(capacity)
+    rng = np.random.default_rng(capacity)
+    symbols = ['A', 'B', 'C', 'D']
+    for symbol in symbols:
+        panel.add(symbol)
+    spans = {'A': range(10, 60), 'B': range(0, 45, 2), 'C': range(20, 70, 3), 'D': range(5, 25)}
+    for symbol in symbols:
+        times = [START + i * HOUR for i in spans[symbol]]
+        values = rng.normal(size=len(times))
+        written = panel.write_many(symbol, times, values)
+        reference.write_many(symbol, times, values)
+        assert written == sum(time in reference.data for time in times[-capacity:])
+        assert_same(panel, reference, symbols)
+    # and the bars that follow
+    for step in range(70, 70 + capacity + 3):
+        for symbol in symbols:
+            value = rng.normal()
+            panel.write(symbol, START + step * HOUR, value)
+            reference.write(symbol, START + step * HOUR, value)
+        assert_same(panel, reference, symbols)
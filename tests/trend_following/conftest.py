@@ -0,0 +1,16 @@
+'''
+The modules of the trend following project import AlgorithmImports and their siblings by name:
+lean_local provides the first and puts the project folder on sys.path.
+'''
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT = os.path.join(ROOT, "Exemple-Python-Trend following")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import lean_local
+
+lean_local.activate(PROJECT)
@@ -0,0 +1,311 @@
+'''
+The code of custom_alpha before its incremental rewrites, as the reference of the parity tests.
+The functions are copied from the first commit of the project; the entry and trailing stop loops from
+custom_alpha.Update and atr_trail_stop_loss, with the alpha state passed in explicitly.
+'''
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from scipy.signal import argrelextrema
+
+
+# trendCalculator.py
+
+def getHigherLows(data, order, K):
+  low_idx = argrelextrema(data, np.less, order=order)[0]
+  lows = data[low_idx]
+  extrema = []
+  ex_deque = deque(maxlen=K)
+  for i, idx in enumerate(low_idx):
+    if i == 0:
+      ex_deque.append(idx)
+      continue
+    if lows[i] < lows[i-1]:
+      ex_deque.clear()
+
+    ex_deque.append(idx)
+    if len(ex_deque) == K:
+      extrema.append(ex_deque.copy())
+
+  return extrema
+
+def getLowerHighs(data, order=5, K=2):
+  high_idx = argrelextrema(data, np.greater, order=order)[0]
+  highs = data[high_idx]
+  extrema = []
+  ex_deque = deque(maxlen=K)
+  for i, idx in enumerate(high_idx):
+    if i == 0:
+      ex_deque.append(idx)
+      continue
+    if highs[i] > highs[i-1]:
+      ex_deque.clear()
+
+    ex_deque.append(idx)
+    if len(ex_deque) == K:
+      extrema.append(ex_deque.copy())
+
+  return extrema
+
+def getHigherHighs(data, order, K):
+  high_idx = argrelextrema(data, np.greater, order = order)[0]
+  highs = data[high_idx]
+  extrema = []
+  ex_deque = deque(maxlen=K)
+  for i, idx in enumerate(high_idx):
+    if i == 0:
+      ex_deque.append(idx)
+      continue
+    if highs[i] < highs[i-1]:
+      ex_deque.clear()
+
+    ex_deque.append(idx)
+    if len(ex_deque) == K:
+      extrema.append(ex_deque.copy())
+
+  return extrema
+
+def getLowerLows(data, order, K):
+  low_idx = argrelextrema(data, np.less, order=order)[0]
+  lows = data[low_idx]
+  extrema = []
+  ex_deque = deque(maxlen=K)
+  for i, idx in enumerate(low_idx):
+    if i == 0:
+      ex_deque.append(idx)
+      continue
+    if lows[i] > lows[i-1]:
+      ex_deque.clear()
+
+    ex_deque.append(idx)
+    if len(ex_deque) == K:
+      extrema.append(ex_deque.copy())
+
+  return extrema
+
+def get_trend(close_data, order, K):
+    '''
+    close_data most recent first, like a RollingWindow
+    '''
+    close_data = [x for x in close_data]
+    close_data.reverse()
+
+    data = pd.DataFrame()
+    data['Close'] = close_data
+    close = data['Close'].values
+
+    hh = getHigherHighs(close, order, K)
+    hl = getHigherLows(close, order, K)
+    ll = getLowerLows(close, order, K)
+    lh = getLowerHighs(close, order, K)
+
+    patterns = []
+    for pattern in hh:
+        patterns.append(('hh', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
+    for pattern in hl:
+        patterns.append(('hl', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
+    for pattern in ll:
+        patterns.append(('ll', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
+    for pattern in lh:
+        patterns.append(('lh', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
+
+    patterns.sort(key=lambda x: x[2], reverse=True)
+
+    total_movements = patterns
+    total_swing_up = 0
+    total_swing_down = 0
+    for x in total_movements:
+        if x[0] == 'hh' or x[0] == 'hl':
+            total_swing_up += (x[4] - x[3])
+        else:
+            total_swing_down += (x[4] - x[3])
+
+    total_swing = total_swing_up + total_swing_down
+
+    return total_swing
+
+
+# alpha.py holders, bollinger_oracle.py and macd_oracle.py
+
+class bollinger_holder:
+    def __init__(self, lower, middle, upper, price):
+        self.lower = lower
+        self.middle = middle
+        self.upper = upper
+        self.price = price
+
+class macd_holder:
+    def __init__(self, fast, slow, signal, macd, hist):
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self.macd = macd
+        self.hist = hist
+
+def get_bollinger_buy_and_short(QCalgo, bollinger_rolling_window,trend, bollinger_params):
+    score = 0
+    lowers = [x.lower for x in bollinger_rolling_window]
+    middles = [x.middle for x in bollinger_rolling_window]
+    uppers = [x.upper for x in bollinger_rolling_window]
+    prices = [x.price for x in bollinger_rolling_window]
+    lowers.reverse()
+    middles.reverse()
+    uppers.reverse()
+    prices.reverse()
+
+    above_upper = 0
+    middle_upper = 0
+    lower_middle = 0
+    below_lower = 0
+
+    amount_above = 0
+    amount_below = .0001
+    for i in range(len(lowers)):
+        low = lowers[i]
+        middle = middles[i]
+        high = uppers[i]
+        price = prices[i]
+
+        if price >= high:
+            above_upper += 1
+        elif price >= middle:
+            middle_upper += 1
+        elif price >= low:
+            lower_middle += 1
+        else:
+            below_lower += 1
+
+        if price >= middle and amount_below == .0001:
+            amount_above += (price-middle)
+        elif price < middle:
+            amount_below += (middle-price)
+
+    most_recent = prices[0]
+    current_location = None
+    if most_recent >= uppers[0]:
+        current_location = "above_upper"
+    elif most_recent >= middles[0]:
+        current_location = "middle_upper"
+    elif most_recent >= lowers[0]:
+        current_location = "lower_middle"
+    else:
+        current_location = "below_lower"
+
+    if trend > 0:
+        if current_location == "above_upper" or current_location == "middle_upper":
+            if amount_above/amount_below >= bollinger_params['long_threshold']:
+                score = 1
+            else:
+                return .5
+    elif trend < 0:
+        if current_location == "lower_middle" or current_location == "below_lower":
+            if (lower_middle + below_lower) / len(prices) >= bollinger_params['short_threshold']:
+                score = 2
+
+    return score
+
+def get_macd_score(macd_rolling, trend, macd_params):
+    '''
+    Also returns the cross flag, which the original computed and dropped
+    '''
+    hists = [x.hist for x in macd_rolling][:macd_params['cross_check_length']]
+    macds = [x.macd for x in macd_rolling][:macd_params['macd_above_below_length']]
+
+    cross = 0
+    current = hists[0]
+    if current >= 0:
+        if any(x < 0 for x in hists):
+            cross = 1
+    elif current <= 0:
+        if any(x > 0 for x in hists):
+            cross = -1
+
+    score = 0
+    if trend > 0:
+        if all(x > macd_params['long_macd_threshold'] for x in macds) and macds[0] > macd_params['long_macd_threshold']:
+            score = 1
+    elif trend < 0:
+        if all(x > macd_params['short_macd_threshold'] for x in macds) and macds[0] > macd_params['short_macd_threshold']:
+            score = 2
+
+    return score, cross
+
+
+# custom_alpha.Update: pending entries
+
+class LookForEntries:
+    '''
+    look_for_entries / entry_scores / hold_length of custom_alpha, with the scheduling of the entry signals
+    and the loop over the pending entries of Update. triggered(key, direction) stands for the bollinger
+    middle band test of the current bar.
+    '''
+
+    def __init__(self):
+        self.look_for_entries = {}
+        self.entry_scores = {}
+        self.hold_length = {}
+
+    def schedule(self, long_entries, short_entries):
+        for symbol, score in long_entries:
+            if symbol not in self.look_for_entries or self.look_for_entries[symbol] == 0:
+                self.look_for_entries[symbol] = 1
+                self.entry_scores[symbol] = score
+        for symbol, score in short_entries:
+            self.look_for_entries[symbol] = -1
+            self.entry_scores[symbol] = score
+
+    def step(self, triggered):
+        entries = []
+        for key in self.look_for_entries:
+            if self.look_for_entries[key] > 0:
+                self.look_for_entries[key] += 1
+                if self.look_for_entries[key] > 70:
+                    self.look_for_entries[key] = 0
+                    self.hold_length[key] = None
+                else:
+                    if triggered(key, 1):
+                        entries.append((key, 1, self.entry_scores[key]))
+                        self.hold_length[key] = 1
+                        self.look_for_entries[key] = 0
+            elif self.look_for_entries[key] < 0:
+                self.look_for_entries[key] -= 1
+                if self.look_for_entries[key] < -70:
+                    self.look_for_entries[key] = 0
+                    self.hold_length[key] = None
+                else:
+                    if triggered(key, -1):
+                        entries.append((key, -1, self.entry_scores[key]))
+                        self.hold_length[key] = -1
+                        self.look_for_entries[key] = 0
+        return entries
+
+
+# custom_alpha.atr_trail_stop_loss
+
+def atr_trail_stop_loss(portfolio_keys, peak_prices, hold_length, atr_stop_multiplier, prices, atrs, is_long):
+    '''
+    Moves the peaks of peak_prices / hold_length in place, returns the symbols liquidated
+    '''
+    liquidated = []
+    for key in portfolio_keys:
+        if key in peak_prices and peak_prices[key] != None and key in hold_length:
+            if hold_length[key] != None:
+                hold_length[key] += 1
+            if is_long[key]:
+                price = prices[key]
+                if price > peak_prices[key]:
+                    peak_prices[key] = price
+                if price < peak_prices[key] - atr_stop_multiplier * atrs[key]:
+                    liquidated.append(key)
+                    hold_length[key] = None
+                    peak_prices[key] = None
+            else:
+                price = prices[key]
+                if price < peak_prices[key]:
+                    peak_prices[key] = price
+                if price > peak_prices[key] + atr_stop_multiplier * atrs[key]:
+                    liquidated.append(key)
+                    hold_length[key] = None
+                    peak_prices[key] = None
+    return liquidated
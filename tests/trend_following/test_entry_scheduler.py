@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import legacy
+from entry_scheduler import EntryScheduler
+
+SYMBOLS = [f"S{i:02d}" for i in range(12)]
+
+
+def signals(rng):
+    # entry signals of one bar, and the symbols whose price crossed their bollinger middle band
+    long_entries = [(s, int(rng.integers(1000, 2000))) for s in SYMBOLS if rng.random() < .05]
+    short_entries = [(s, int(rng.integers(1000, 2000))) for s in SYMBOLS if rng.random() < .04]
+    crossed = {s: int(rng.choice([1, -1])) for s in SYMBOLS if rng.random() < .03}
+    return long_entries, short_entries, crossed
+
+
+def step(scheduler, long_entries, short_entries, crossed):
+    # the pending entries part of custom_alpha.Update
+    for symbol, score in long_entries:
+        if symbol not in scheduler:
+            scheduler.schedule(symbol, 1, score)
+    for symbol, score in short_entries:
+        scheduler.schedule(symbol, -1, score)
+    expired = scheduler.step()
+    entries = []
+    for key, direction, score in scheduler.items():
+        if crossed.get(key) == direction:
+            entries.append((key, direction, score))
+            scheduler.remove(key)
+    return entries, expired
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_entry_scheduler_matches_legacy(seed):
+    rng = np.random.default_rng(seed)
+    old = legacy.LookForEntries()
+    new = EntryScheduler(max_wait=70)
+    for bar in range(1500):
+        long_entries, short_entries, crossed = signals(rng)
+
+        old.schedule(long_entries, short_entries)
+        waiting = {key for key, count in old.look_for_entries.items() if count != 0}
+        old_entries = old.step(lambda key, direction: crossed.get(key) == direction)
+        old_expired = {key for key in waiting if old.look_for_entries[key] == 0} - {key for key, _, _ in old_entries}
+
+        new_entries, new_expired = step(new, long_entries, short_entries, crossed)
+        assert sorted(new_entries) == sorted(old_entries)
+        assert set(new_expired) == old_expired
+        assert {key for key, _, _ in new.items()} == {key for key, count in old.look_for_entries.items() if count != 0}
+
+
+def test_entry_scheduler_restored_from_state():
+    # a checkpoint saves (direction, score, bars left): the restored scheduler goes on like the saved one
+    rng = np.random.default_rng(0)
+    saved = EntryScheduler(max_wait=70)
+    bars = [signals(rng) for _ in range(400)]
+    for bar in bars[:200]:
+        step(saved, *bar)
+    restored = EntryScheduler(max_wait=70)
+    for symbol in SYMBOLS:
+        state = saved.state(symbol)
+        if state is not None:
+            direction, score, bars_left = state
+            restored.schedule(symbol, direction, score, wait=bars_left)
+    for bar in bars[200:]:
+        assert sorted(step(restored, *bar)[0]) == sorted(step(saved, *bar)[0])
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from AlgorithmImports import Resolution, Symbol, TradeBar
+from lean_local.algorithm import DataDictionary, ObjectStore
+from history_cache import HistoryCache
+
+HOUR = timedelta(hours=1)
+START = datetime(2021, 1, 4)
+
+
+class History:
+    '''
+    History[TradeBar](symbols, count | start, end, resolution) over hourly bars of a price scale that
+    can change, like adjusted history after a split. Keeps the requests made.
+    '''
+
+    def __init__(self, algo, closes):
+        self.algo = algo
+        self.closes = closes
+        self.scale = {symbol: 1.0 for symbol in closes}
+        self.requests = []
+
+    def __getitem__(self, data_type):
+        return self.bars
+
+    def bars(self, symbols, *args):
+        self.requests.append((sorted(str(s) for s in symbols), 'count' if isinstance(args[0], int) else 'since'))
+        now = self.algo.Time
+        steps = {}
+        for symbol in symbols:
+            end_times = [START + (i + 1) * HOUR for i in range(len(self.closes[symbol]))]
+            if isinstance(args[0], int):
+                rows = [i for i, end in enumerate(end_times) if end <= now][-args[0]:]
+            else:
+                rows = [i for i, end in enumerate(end_times) if args[0] < end <= min(args[1], now)]
+            for i in rows:
+                close = self.closes[symbol][i] * self.scale[symbol]
+                bar = TradeBar(START + i * HOUR, symbol, close, close + 1, close - 1, close, 100.0, HOUR)
+                steps.setdefault(bar.EndTime, DataDictionary())[symbol] = bar
+        return [steps[t] for t in sorted(steps)]
+
+
+class Algorithm:
+    def __init__(self, folder, closes):
+        self.Time = START
+        self.ObjectStore = ObjectStore(folder)
+        self.History = History(self, closes)
+
+
+@pytest.fixture
+def algo(tmp_path):
+    rng = np.random.default_rng(0)
+    closes = {Symbol.Create(ticker): list(100 + np.cumsum(rng.normal(size=600))) for ticker in ('AAA', 'BBB')}
+    return Algorithm(str(tmp_path), closes)
+
+
+def fresh(algo, count):
+    # what a cache without any file returns
+    folder = algo.ObjectStore.root + '_fresh'
+    cache = HistoryCache(Algorithm(folder, algo.History.closes))
+    cache.algo.Time = algo.Time
+    cache.algo.History.scale = dict(algo.History.scale)
+    return cache.history_columns(list(algo.History.closes), count, Resolution.Hour)
+
+
+def assert_same(result, expected):
+    assert result.keys() == expected.keys()
+    for symbol in result:
+        for name in HistoryCache.columns:
+            np.testing.assert_array_equal(result[symbol][name], expected[symbol][name])
+
+
+def test_warm_up_requests_only_new_bars(algo):
+    symbols = list(algo.History.closes)
+    algo.Time = START + 300 * HOUR
+    HistoryCache(algo).history_columns(symbols, 200, Resolution.Hour)
+    algo.Time += 50 * HOUR
+    # a new run: the cache is read back from the ObjectStore
+    result = HistoryCache(algo).history_columns(symbols, 200, Resolution.Hour)
+    assert [kind for _, kind in algo.History.requests] == ['count', 'since']
+    assert_same(result, fresh(algo, 200))
+
+
+def test_split_refetches_the_symbol(algo):
+    symbols = list(algo.History.closes)
+    algo.Time = START + 300 * HOUR
+    HistoryCache(algo).history_columns(symbols, 200, Resolution.Hour)
+    # the whole history of AAA is adjusted again
+    algo.History.scale[symbols[0]] = .5
+    algo.Time += 50 * HOUR
+    result = HistoryCache(algo).history_columns(symbols, 200, Resolution.Hour)
+    assert algo.History.requests[1:] == [(sorted(map(str, symbols)), 'since'), ([str(symbols[0])], 'count')]
+    assert_same(result, fresh(algo, 200))
+
+
+def test_cache_keeps_the_lookback_only(algo):
+    symbols = list(algo.History.closes)
+    cache = HistoryCache(algo)
+    for step in range(10):
+        algo.Time = START + (300 + 25 * step) * HOUR
+        cache.history_columns(symbols, 200, Resolution.Hour)
+    for symbol in symbols:
+        assert len(cache.frames[(symbol, Resolution.Hour)]['end_time']) == 200
+        with np.load(cache._path(symbol, Resolution.Hour)) as stored:
+            assert len(stored['close']) == 200
@@ -0,0 +1,123 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+import legacy
+import bollinger_oracle
+import macd_oracle
+from bollinger_oracle import BollingerScorer
+from macd_oracle import MacdScorer
+from ring_buffer import RingBuffer
+
+BOLLINGER_PARAMS = [{'long_threshold': 1, 'short_threshold': 1}, {'long_threshold': .5, 'short_threshold': .3}]
+MACD_PARAMS = [{'cross_check_length': 35, 'macd_above_below_length': 28, 'long_macd_threshold': 0.25, 'short_macd_threshold': -0.25},
+               {'cross_check_length': 5, 'macd_above_below_length': 8, 'long_macd_threshold': 0, 'short_macd_threshold': -0.5}]
+
+
+def bollinger_bars(n, seed):
+    # prices on, between and outside the bands, often exactly on one of them
+    rng = np.random.default_rng(seed)
+    middle = 100 + np.cumsum(rng.normal(size=n))
+    width = rng.uniform(1, 3, size=n)
+    lower, upper = middle - width, middle + width
+    price = middle + rng.normal(scale=2, size=n)
+    on_band = rng.integers(0, 5, size=n)
+    price = np.where(on_band == 1, lower, np.where(on_band == 2, middle, np.where(on_band == 3, upper, price)))
+    # long runs above and below the middle band
+    price = np.where(np.sin(np.arange(n) / 15) > .5, np.maximum(price, middle), price)
+    return np.column_stack([lower, middle, upper, price]).tolist()
+
+
+def macd_bars(n, seed, thresholds):
+    # macd on the thresholds, histogram at zero, and a few nans
+    rng = np.random.default_rng(seed)
+    macd = np.round(np.cumsum(rng.normal(scale=.2, size=n)), 1)
+    macd = np.where(rng.random(n) < .1, rng.choice(thresholds, size=n), macd)
+    hist = np.round(rng.normal(scale=.3, size=n), 1)
+    macd[rng.random(n) < .02] = np.nan
+    hist[rng.random(n) < .02] = np.nan
+    fast, slow, signal = rng.normal(size=(3, n))
+    return np.column_stack([fast, slow, signal, macd, hist]).tolist()
+
+
+@pytest.mark.parametrize('capacity', [1, 7, 140])
+def test_ring_buffer_views(capacity):
+    ring = RingBuffer(capacity, ('lower', 'middle', 'upper', 'price'))
+    window = deque(maxlen=capacity)
+    for bar in bollinger_bars(3 * capacity + 5, capacity):
+        ring.append(*bar)
+        window.append(bar)
+        assert len(ring) == len(window)
+        for i, field in enumerate(('lower', 'middle', 'upper', 'price')):
+            assert ring.view(field).tolist() == [row[i] for row in window]
+            assert ring.newest_first(field).tolist() == [row[i] for row in reversed(window)]
+
+
+@pytest.mark.parametrize('params', BOLLINGER_PARAMS)
+@pytest.mark.parametrize('capacity', [1, 10, 140])
+def test_bollinger_scan_matches_legacy(capacity, params):
+    for seed in range(3):
+        ring = RingBuffer(capacity, ('lower', 'middle', 'upper', 'price'))
+        window = deque(maxlen=capacity)
+        for bar in bollinger_bars(4 * capacity + 50, seed):
+            ring.append(*bar)
+            window.append(legacy.bollinger_holder(*bar))
+            for trend in (1, -1, 0):
+                expected = legacy.get_bollinger_buy_and_short(None, window, trend, params)
+                assert bollinger_oracle.get_bollinger_buy_and_short(None, ring, trend, params) == expected
+
+
+@pytest.mark.parametrize('params', MACD_PARAMS)
+@pytest.mark.parametrize('capacity', [1, 12, 35])
+def test_macd_scan_matches_legacy(capacity, params):
+    thresholds = [params['long_macd_threshold'], params['short_macd_threshold']]
+    for seed in range(3):
+        ring = RingBuffer(capacity, ('fast', 'slow', 'signal', 'macd', 'hist'))
+        window = deque(maxlen=capacity)
+        for bar in macd_bars(4 * capacity + 50, seed, thresholds):
+            ring.append(*bar)
+            window.append(legacy.macd_holder(*bar))
+            for trend in (1, -1, 0):
+                assert macd_oracle.get_macd_score(ring, trend, params) == legacy.get_macd_score(window, trend, params)[0]
+
+
+@pytest.mark.parametrize('params', BOLLINGER_PARAMS)
+@pytest.mark.parametrize('capacity', [1, 10, 140])
+def test_bollinger_scorer_matches_legacy(capacity, params):
+    for seed in range(3):
+        scorer = BollingerScorer(capacity)
+        window = deque(maxlen=capacity)
+        for bar in bollinger_bars(4 * capacity + 50, seed):
+            scorer.append(*bar)
+            window.append(legacy.bollinger_holder(*bar))
+            for trend in (1, -1, 0):
+                assert scorer.score(trend, params) == legacy.get_bollinger_buy_and_short(None, window, trend, params)
+
+
+@pytest.mark.parametrize('params', MACD_PARAMS)
+@pytest.mark.parametrize('capacity', [1, 12, 35])
+def test_macd_scorer_matches_legacy(capacity, params):
+    thresholds = [params['long_macd_threshold'], params['short_macd_threshold']]
+    for seed in range(3):
+        scorer = MacdScorer(capacity, params)
+        window = deque(maxlen=capacity)
+        for bar in macd_bars(4 * capacity + 50, seed, thresholds):
+            scorer.append(*bar)
+            window.append(legacy.macd_holder(*bar))
+            for trend in (1, -1, 0):
+                expected, cross = legacy.get_macd_score(window, trend, params)
+                assert scorer.score(trend, params) == expected
+            assert scorer.cross() == cross
+
+
+def test_macd_scorer_with_other_lengths():
+    # score() asked with other lengths than the scorer tracks falls back to the scan
+    params, other = MACD_PARAMS
+    scorer = MacdScorer(35, params)
+    window = deque(maxlen=35)
+    for bar in macd_bars(200, 0, [0, -.5]):
+        scorer.append(*bar)
+        window.append(legacy.macd_holder(*bar))
+        for trend in (1, -1):
+            assert scorer.score(trend, other) == legacy.get_macd_score(window, trend, other)[0]
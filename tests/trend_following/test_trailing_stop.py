@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import legacy
+from trailing_stop import TrailingStops
+
+SYMBOLS = [f"S{i:02d}" for i in range(12)]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_trailing_stops_match_legacy(seed):
+    rng = np.random.default_rng(seed)
+    multiplier = 2
+    peak_prices = {}
+    hold_length = {}
+    stops = TrailingStops(multiplier, capacity=4)
+    prices = {s: 100.0 for s in SYMBOLS}
+    is_long = {s: False for s in SYMBOLS}
+    for bar in range(2000):
+        for s in SYMBOLS:
+            # round prices: equal to the peak now and then
+            prices[s] = max(1.0, prices[s] + float(np.round(rng.normal(scale=1.5))))
+        atrs = {s: float(rng.uniform(.5, 2)) for s in SYMBOLS}
+
+        # new positions, and candidacies expiring without one
+        for s in SYMBOLS:
+            u = rng.random()
+            if u < .02:
+                direction = int(rng.choice([1, -1]))
+                peak_prices[s] = prices[s]
+                hold_length[s] = direction
+                stops.open(s, prices[s], direction)
+                is_long[s] = direction > 0
+            elif u < .03:
+                hold_length[s] = None
+                stops.stop_counting(s)
+            elif u < .035:
+                # position closed by its insight expiring: no longer long
+                is_long[s] = False
+
+        old = legacy.atr_trail_stop_loss(SYMBOLS, peak_prices, hold_length, multiplier, prices, atrs, is_long)
+        new = stops.update({s: prices[s] for s in stops.rows}, {s: atrs[s] for s in stops.rows},
+                           {s: is_long[s] for s in stops.rows})
+        assert sorted(new) == sorted(old)
+        tracked = {s: (peak_prices[s], hold_length[s]) for s in SYMBOLS if peak_prices.get(s) is not None}
+        assert {s: stops.state(s) for s in stops.rows} == tracked
@@ -0,0 +1,65 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+import legacy
+from trendCalculator import TrendTracker, get_trend, rolling_trend, trend_kernel
+
+# (window size, trend_order, K_order): the price / rsi and obv settings of custom_alpha, and smaller windows
+# where the extrema are close to the edges
+PARAMS = [(90, 5, 2), (250, 2, 2), (40, 3, 3), (20, 1, 2), (15, 5, 4), (30, 2, 5)]
+
+
+def series(kind, n, seed):
+    rng = np.random.default_rng(seed)
+    if kind == 'random':
+        return 100 + np.cumsum(rng.normal(size=n))
+    if kind == 'plateaus':
+        # integer steps, some of them repeated: flat runs and equal highs / lows
+        return np.repeat(np.cumsum(rng.integers(-3, 4, size=n)), rng.choice([1, 1, 1, 2], size=n))[:n].astype(float)
+    if kind == 'equal extremes':
+        # the same few levels over and over
+        return rng.choice([1.0, 2.0, 3.0], size=n)
+    raise ValueError(kind)
+
+
+KINDS = ['random', 'plateaus', 'equal extremes']
+
+
+@pytest.mark.parametrize('size, order, K', PARAMS)
+@pytest.mark.parametrize('kind', KINDS)
+def test_tracker_matches_get_trend(kind, size, order, K):
+    for seed in range(3):
+        tracker = TrendTracker(size, order, K)
+        window = deque(maxlen=size)
+        for value in series(kind, 3 * size, seed):
+            tracker.update(value)
+            window.append(value)
+            # a RollingWindow, most recent first, also while it fills up
+            assert tracker.get_trend() == legacy.get_trend(list(window)[::-1], order, K)
+
+
+@pytest.mark.parametrize('size, order, K', PARAMS)
+@pytest.mark.parametrize('kind', KINDS)
+def test_get_trend_matches_legacy(kind, size, order, K):
+    for seed in range(20):
+        window = list(series(kind, size, seed))
+        assert get_trend(window, order, K) == legacy.get_trend(window, order, K)
+
+
+@pytest.mark.parametrize('size, order, K', PARAMS)
+@pytest.mark.parametrize('kind', KINDS)
+def test_rolling_trend_matches_legacy(kind, size, order, K):
+    values = series(kind, 3 * size, 7)
+    expected = [legacy.get_trend(values[end - size:end][::-1], order, K) for end in range(size, len(values) + 1)]
+    assert rolling_trend(values, size, order, K).tolist() == expected
+
+
+@pytest.mark.parametrize('size, order, K', PARAMS)
+def test_trend_kernel_rows(size, order, K):
+    # one window per row, of every kind
+    rows = np.array([series(kind, size, seed) for kind in KINDS for seed in range(10)])
+    expected = [legacy.get_trend(row[::-1], order, K) for row in rows]
+    assert trend_kernel(rows, order, K).tolist() == expected
+    assert [trend_kernel(row, order, K) for row in rows] == expected
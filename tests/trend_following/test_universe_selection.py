@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from universe_selection import TopKSelection, top_k
+
+
+def fundamentals(n, seed):
+    # rounded dollar volumes so that ties happen, prices and market caps around the filters
+    rng = np.random.default_rng(seed)
+    return [SimpleNamespace(Symbol=f"S{i}", HasFundamentalData=bool(rng.random() < .9),
+                            DollarVolume=float(rng.integers(0, 50)) * 1e6,
+                            price=float(rng.choice([5, 10, 10.5, 50])),
+                            MarketCap=float(rng.choice([1e9, 2e9, 3e9])))
+            for i in range(n)]
+
+
+@pytest.mark.parametrize('k', [0, 1, 7, 50, 500])
+def test_top_k_matches_sorted(k):
+    for seed in range(5):
+        values = np.round(np.random.default_rng(seed).normal(size=200), 1)
+        expected = sorted(range(len(values)), key=lambda i: values[i], reverse=True)[:k]
+        assert top_k(values, k).tolist() == expected
+
+
+@pytest.mark.parametrize('coarse_size,final_size', [(1000, 600), (100, 30), (10, 10)])
+def test_selection_matches_legacy(coarse_size, final_size):
+    selection = TopKSelection(coarse_size=coarse_size, final_size=final_size)
+    for seed in range(3):
+        coarse = fundamentals(400, seed)
+        by_dollar_volume = sorted(coarse, key=lambda x: x.DollarVolume, reverse=True)
+        expected = [x.Symbol for x in by_dollar_volume if x.HasFundamentalData][:coarse_size]
+        assert selection.coarse(coarse) == expected
+
+        fine = [x for x in coarse if x.Symbol in set(expected)]
+        by_volume = sorted(fine, key=lambda x: x.DollarVolume, reverse=True)
+        expected = [x.Symbol for x in by_volume if x.price > 10 and x.MarketCap > 2000000000][:final_size]
+        assert selection.fine(fine) == expected